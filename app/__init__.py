@@ -1,18 +1,32 @@
 from flask import Flask, render_template
 from sqlalchemy import event
-from sqlalchemy.engine import Engine
 import os
 
+from . import assets as static_assets
+from . import metrics
+from . import read_only
+from . import templating
+from .commands import register_commands
+from .conditional import register_cache_policies
 from .config import Config
 from .extensions import csrf, db, login_manager
+from .instrumentation import sql_profiler
+from .occupancy import occupancy_index
+from .page_cache import page_cache
+from .slow_queries import slow_query_log
+from .user_cache import user_cache
+from . import search, stats  # noqa: F401  (DDL поиска, события счётчиков)
 from .routes.main import main
 from .routes.user import user
 from .routes.admin import admin
 
 
-@event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
-    """Включаем поддержку foreign keys для SQLite"""
+    """
+    Включаем поддержку foreign keys для SQLite. Только для движков
+    Flask-SQLAlchemy: соединения движка только для чтения (app/read_only.py)
+    не могут сменить journal_mode, если снимок базы не в режиме WAL.
+    """
     if dbapi_connection.__class__.__module__ == 'sqlite3':
         cursor = dbapi_connection.cursor()
         cursor.execute("PRAGMA foreign_keys=ON;")
@@ -28,10 +42,22 @@ def create_app(config: type[Config] = Config) -> Flask:
     # Создаем директорию instance если её нет
     os.makedirs(app.instance_path, exist_ok=True)
 
-    # Инициализация расширений
+    # Инициализация расширений (метрики — до db: они задают пул соединений)
+    metrics.init_app(app)
     db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "connect", set_sqlite_pragma)
+    read_only.init_app(app)
+    sql_profiler.init_app(app)
+    slow_query_log.init_app(app)
     login_manager.init_app(app)
     csrf.init_app(app)
+    occupancy_index.init_app(app)
+    page_cache.init_app(app)
+    user_cache.init_app(app)
+    static_assets.init_app(app)
+    templating.init_app(app)
 
     # Настройка Flask-Login
     login_manager.login_view = "user.login"
@@ -43,7 +69,16 @@ def create_app(config: type[Config] = Config) -> Flask:
     app.register_blueprint(main)
     app.register_blueprint(admin)
 
-    # Создание таблиц
+    # Cache-Control для ответов blueprints
+    register_cache_policies(app)
+
+    # CLI-команды
+    register_commands(app)
+
+    # Создание таблиц. Под gunicorn/uWSGI (wsgi.py) это делается один раз
+    # в мастер-процессе (app/server.py) или командой `flask init-db`
+    if not app.config.get("DB_CREATE_ALL", True):
+        return app
     with app.app_context():
         try:
             db.create_all()
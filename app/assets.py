@@ -0,0 +1,257 @@
+"""
+Сборка статики: бандл CSS, имена с хешем содержимого, сжатые копии.
+
+Команда `flask build-assets` создаёт каталог static/dist/:
+- статические файлы копируются под именами с хешем содержимого
+  (fonts/Montserrat-Bold.woff2 -> dist/fonts/Montserrat-Bold.<хеш>.woff2);
+- css/main.css вместе со всеми @import собирается Flask-Assets в один
+  минифицированный файл, ссылки url() в нём ведут на копии с хешем;
+- для текстовых файлов рядом кладутся .gz и, если установлен пакет
+  brotli, .br;
+- manifest.json связывает исходные имена с итоговыми.
+
+Если манифест есть (и STATIC_MANIFEST_ENABLED), url_for('static', ...)
+сам подставляет имя с хешем, а файлы из dist/ отдаются с Cache-Control
+immutable на год и в сжатом виде, если клиент это принимает.
+Без сборки статика отдаётся из исходных файлов, как раньше.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+
+from flask import request, send_from_directory
+from webassets import Bundle
+from webassets.filter import Filter
+
+from .extensions import assets
+
+try:
+    import brotli
+except ImportError:  # необязательная зависимость: без неё только .gz
+    brotli = None
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+CSS_ENTRY = "css/main.css"
+
+# Уже сжатые форматы (woff2, webp, png) повторно не сжимаются
+COMPRESSIBLE = (".css", ".js", ".json", ".map", ".svg", ".txt")
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_URL_RE = re.compile(r"url\(\s*(['\"]?)([^'\")]+)\1\s*\)")
+_IMPORT_RE = re.compile(r"@import\s+url\(\s*['\"]?([^'\")]+)['\"]?\s*\)\s*;")
+_STRING_OR_COMMENT = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/""", re.S)
+
+
+class StaticUrls(Filter):
+    """
+    Готовит CSS-файл к склейке: убирает @import (их содержимое уже
+    в бандле) и переписывает url() на копии с хешем относительно бандла.
+    """
+
+    name = "static_urls"
+
+    def __init__(self, static_folder, manifest):
+        super().__init__()
+        self.static_folder = static_folder
+        self.manifest = manifest
+
+    def input(self, _in, out, source_path, output_path, **kw):
+        source_dir = os.path.dirname(source_path)
+        output_dir = os.path.dirname(output_path)
+
+        def rewrite(match):
+            url = match.group(2).strip()
+            if url.startswith(("data:", "http:", "https:", "//", "/")):
+                return match.group(0)
+            path, suffix = re.match(r"([^?#]*)(.*)", url).groups()
+            name = _static_name(
+                self.static_folder, os.path.join(source_dir, path))
+            target = os.path.join(
+                self.static_folder, self.manifest.get(name, name))
+            return f'url("{_posix_relpath(target, output_dir)}{suffix}")'
+
+        out.write(_URL_RE.sub(rewrite, _IMPORT_RE.sub("", _in.read())))
+
+
+class MinifyCss(Filter):
+    """Минификация CSS без внешних зависимостей."""
+
+    name = "minify_css"
+
+    def output(self, _in, out, **kw):
+        out.write(minify_css(_in.read()))
+
+
+def minify_css(css):
+    """Удаляет комментарии и лишние пробелы, не трогая строки в кавычках."""
+    parts = []
+    pos = 0
+    for match in _STRING_OR_COMMENT.finditer(css):
+        parts.append(_squeeze(css[pos:match.start()]))
+        if match.group(1):
+            parts.append(match.group(1))
+        pos = match.end()
+    parts.append(_squeeze(css[pos:]))
+    return "".join(parts).strip()
+
+
+def _squeeze(chunk):
+    chunk = re.sub(r"\s+", " ", chunk)
+    chunk = re.sub(r" ?([{};,>]) ?", r"\1", chunk)
+    return chunk.replace(";}", "}")
+
+
+def _posix_relpath(path, start):
+    return os.path.relpath(path, start).replace(os.sep, "/")
+
+
+def _static_name(static_folder, path):
+    return _posix_relpath(os.path.normpath(path), static_folder)
+
+
+def _hashed_name(name, content):
+    root, ext = os.path.splitext(name)
+    return f"{root}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+
+def css_sources(static_folder, entry=CSS_ENTRY):
+    """Файлы CSS в порядке подключения: сначала @import, затем сам файл."""
+    sources = []
+
+    def visit(name):
+        if name in sources:
+            return
+        with open(os.path.join(static_folder, name), encoding="utf-8") as f:
+            css = f.read()
+        base = os.path.dirname(os.path.join(static_folder, name))
+        for url in _IMPORT_RE.findall(css):
+            visit(_static_name(static_folder, os.path.join(base, url)))
+        sources.append(name)
+
+    visit(entry)
+    return sources
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def _precompress(path):
+    with open(path, "rb") as f:
+        content = f.read()
+    # mtime=0: одинаковый результат при повторной сборке
+    _write(path + ".gz", gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write(path + ".br", brotli.compress(content))
+
+
+def build_static(app):
+    """Собирает static/dist/ и возвращает манифест {исходное имя: итоговое}."""
+    static_folder = app.static_folder
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+
+    bundled = set(css_sources(static_folder))
+    manifest = {}
+    emitted = []
+
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist]
+        for filename in sorted(files):
+            name = _static_name(static_folder, os.path.join(root, filename))
+            if name in bundled or name.endswith(".map") and name[:-4] in bundled:
+                continue
+            with open(os.path.join(root, filename), "rb") as f:
+                content = f.read()
+            if name.endswith(".map"):
+                # Карты исходников ищутся по исходному имени рядом с файлом
+                target = f"{DIST_DIR}/{name}"
+            else:
+                target = f"{DIST_DIR}/{_hashed_name(name, content)}"
+                manifest[name] = target
+            _write(os.path.join(static_folder, target), content)
+            emitted.append(target)
+
+    # Бандл CSS: собирается после копий, чтобы url() ссылались на них
+    build_output = f"{DIST_DIR}/.build/{os.path.basename(CSS_ENTRY)}"
+    bundle = Bundle(
+        *css_sources(static_folder),
+        filters=[StaticUrls(static_folder, manifest), MinifyCss()],
+        output=build_output,
+        env=assets,
+    )
+    bundle.build(force=True, disable_cache=True)
+    build_path = os.path.join(static_folder, build_output)
+    with open(build_path, "rb") as f:
+        content = f.read()
+    target = f"{DIST_DIR}/{_hashed_name(CSS_ENTRY, content)}"
+    _write(os.path.join(static_folder, target), content)
+    manifest[CSS_ENTRY] = target
+    emitted.append(target)
+    shutil.rmtree(os.path.dirname(build_path))
+
+    for target in emitted:
+        if target.endswith(COMPRESSIBLE):
+            _precompress(os.path.join(static_folder, target))
+
+    with open(os.path.join(dist, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def _send_precompressed(static_folder, filename):
+    """Отдаёт .br/.gz-копию файла, если клиент принимает такое сжатие."""
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if encoding in request.accept_encodings \
+                and os.path.isfile(os.path.join(static_folder, filename + suffix)):
+            mimetype = mimetypes.guess_type(filename)[0]
+            response = send_from_directory(
+                static_folder, filename + suffix, mimetype=mimetype)
+            response.headers["Content-Encoding"] = encoding
+            return response
+    return None
+
+
+def init_app(app):
+    """Подключает Flask-Assets и, если статика собрана, имена с хешем."""
+    assets.init_app(app)
+
+    manifest_path = os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME)
+    if not app.config.get("STATIC_MANIFEST_ENABLED", True) \
+            or not os.path.isfile(manifest_path):
+        return
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    app.extensions["static_manifest"] = manifest
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == "static" and values.get("filename") in manifest:
+            values["filename"] = manifest[values["filename"]]
+
+    static_view = app.view_functions["static"]
+
+    def send_static(filename):
+        if not filename.startswith(DIST_DIR + "/"):
+            return static_view(filename=filename)
+        response = _send_precompressed(app.static_folder, filename) \
+            or static_view(filename=filename)
+        # Имя меняется вместе с содержимым: файл можно кешировать навсегда
+        response.cache_control.no_cache = False
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+        if filename.endswith(COMPRESSIBLE):
+            response.vary.add("Accept-Encoding")
+        return response
+
+    app.view_functions["static"] = send_static
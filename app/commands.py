@@ -0,0 +1,314 @@
+"""
+CLI-команды приложения (flask <команда>).
+"""
+
+import os
+import time
+from datetime import date, datetime, timedelta
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from sqlalchemy.dialects.sqlite import insert
+
+from . import assets, importer, passwords, search, server, startup, stats, templating
+from .extensions import db
+from .models.booking import Booking
+from .models.hotel import Hotel
+from .models.room import Room
+from .models.room_night import RoomNight
+from .models.user import User
+
+
+@click.command("init-db")
+@with_appcontext
+def init_db():
+    """Создаёт недостающие таблицы (при запуске через wsgi.py не создаются)."""
+    server.create_schema(current_app)
+    click.echo("Таблицы созданы")
+
+
+@click.command("rebuild-room-nights")
+@with_appcontext
+@click.option("--batch-size", default=1000, show_default=True,
+              help="Сколько бронирований обрабатывать за один INSERT.")
+def rebuild_room_nights(batch_size):
+    """Пересоздаёт журнал room_nights по активным бронированиям."""
+    db.session.execute(db.delete(RoomNight))
+
+    bookings = (
+        db.session.query(
+            Booking.id, Booking.room_id, Booking.check_in, Booking.check_out)
+        .filter(Booking.status != "cancelled")
+        .order_by(Booking.id)
+        .yield_per(batch_size)
+    )
+
+    # Исторические пересечения (созданные до появления журнала)
+    # не роняют команду: такие ночи пропускаются и выводятся в отчёт.
+    stmt = insert(RoomNight.__table__).on_conflict_do_nothing()
+    total = inserted = 0
+    rows = []
+    for booking in bookings:
+        rows.extend(RoomNight.rows_for(*booking))
+        if len(rows) >= batch_size:
+            inserted += db.session.execute(stmt, rows).rowcount
+            total += len(rows)
+            rows = []
+    if rows:
+        inserted += db.session.execute(stmt, rows).rowcount
+        total += len(rows)
+
+    db.session.commit()
+    click.echo(f"Записано ночей: {inserted} из {total}")
+    if inserted < total:
+        click.echo(f"Пропущено пересекающихся ночей: {total - inserted}", err=True)
+
+
+@click.command("rebuild-stats")
+@with_appcontext
+def rebuild_stats():
+    """Пересчитывает счётчики статистики админки с нуля."""
+    counters = stats.rebuild()
+    db.session.commit()
+    click.echo(f"Пересчитано счётчиков: {len(counters)}")
+
+
+@click.command("rebuild-search-index")
+@with_appcontext
+def rebuild_search_index():
+    """Пересоздаёт полнотекстовые индексы (hotels_fts, users_fts, rooms_fts)."""
+    search.rebuild_all()
+    db.session.commit()
+    click.echo("Поисковые индексы пересозданы")
+
+
+def _hot_queries():
+    """Запросы, повторяющие то, что выполняют самые нагруженные страницы."""
+    check_in = date.today() + timedelta(days=1)
+    check_out = check_in + timedelta(days=3)
+    week_ago = datetime.utcnow() - timedelta(days=7)
+
+    return {
+        "Room.is_available (bookings)": Booking.query.filter(
+            Booking.room_id == 1,
+            Booking.status != "cancelled",
+            Booking.check_in < check_out,
+            Booking.check_out > check_in,
+        ).limit(1),
+        "Room.is_available (room_nights)": RoomNight.query.filter(
+            RoomNight.room_id == 1,
+            RoomNight.night >= check_in,
+            RoomNight.night < check_out,
+        ).limit(1),
+        "main.catalog (даты и гости)": Hotel.query.filter(
+            Hotel.rooms.any(Room.availability_filter(check_in, check_out, 2))),
+        "main.catalog (город)": search.search_hotels(
+            Hotel.query, "моск", columns=["city"]),
+        "admin.hotels_list (поиск)": search.search_hotels(
+            Hotel.query, "гранд отель", columns=["name", "description"]
+        ).order_by(Hotel.created_at.desc()).limit(15),
+        "main.hotel_detail": Room.query.filter_by(hotel_id=1),
+        "user.my_bookings": (
+            Booking.query.filter_by(user_id=1)
+            .join(Room, Room.id == Booking.room_id)
+            .join(Hotel, Hotel.id == Room.hotel_id)
+            .order_by(Booking.created_at.desc())
+        ),
+        "user.my_hotels": Hotel.query.filter_by(owner_id=1),
+        "admin.users_list": User.query.order_by(User.created_at.desc()).limit(20),
+        "admin.users_list (email)": search.search_users(User.query, "ivan@"),
+        "admin.users_list (телефон)": search.search_users(User.query, "+7 999"),
+        "admin.users_list (имя)": search.search_users(User.query, "иван"),
+        "admin.hotels_list (города)": (
+            db.session.query(Hotel.city).distinct().order_by(Hotel.city)),
+        "admin.bookings_list": (
+            Booking.query.join(User).join(Room).join(Hotel)
+            .filter(Booking.status == "pending")
+            .order_by(Booking.created_at.desc()).limit(30)
+        ),
+        "admin.bookings_list (поиск)": search.search_bookings(
+            Booking.query, "иван").order_by(Booking.created_at.desc()).limit(30),
+        "admin.dashboard (за неделю)": User.query.filter(
+            User.created_at >= week_ago),
+    }
+
+
+@click.command("explain-hot-queries")
+@with_appcontext
+def explain_hot_queries():
+    """Печатает EXPLAIN QUERY PLAN для основных запросов приложения."""
+    connection = db.session.connection()
+    for title, query in _hot_queries().items():
+        statement = getattr(query, "statement", query)
+        sql = str(statement.compile(
+            dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+
+        click.secho(f"\n== {title}", bold=True)
+        depth = {0: -1}
+        for node_id, parent_id, _, detail in connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {sql}"):
+            depth[node_id] = depth.get(parent_id, -1) + 1
+            # Полный просмотр таблицы без индекса — повод насторожиться
+            color = "red" if detail.startswith("SCAN") and "INDEX" not in detail else None
+            click.secho("  " * depth[node_id] + detail, fg=color)
+
+
+@click.command("build-assets")
+@with_appcontext
+def build_assets():
+    """Собирает статику в static/dist/: бандл CSS, имена с хешем, .gz/.br."""
+    manifest = assets.build_static(current_app)
+    click.echo(f"Собрано файлов: {len(manifest)}, манифест: "
+               f"{assets.DIST_DIR}/{assets.MANIFEST_NAME}")
+    if assets.brotli is None:
+        click.echo("Пакет brotli не установлен: созданы только .gz", err=True)
+    click.echo("Перезапустите приложение, чтобы подхватить новый манифест.")
+
+
+@click.command("build-templates")
+@with_appcontext
+def build_templates():
+    """Компилирует все шаблоны в кеш байткода (JINJA_BYTECODE_CACHE_DIR)."""
+    if current_app.jinja_env.bytecode_cache is None:
+        raise click.ClickException("Кеш байткода выключен (JINJA_BYTECODE_CACHE_ENABLED)")
+    started = time.perf_counter()
+    names = templating.precompile(current_app)
+    click.echo(f"Скомпилировано шаблонов: {len(names)} за "
+               f"{(time.perf_counter() - started) * 1000:.0f} мс")
+
+
+@click.command("bench-passwords")
+@with_appcontext
+@click.option("--seconds", default=2.0, show_default=True,
+              help="Сколько секунд измерять каждый метод.")
+@click.option("--method", "methods", multiple=True,
+              help="Метод Werkzeug; можно указать несколько. "
+                   "По умолчанию — текущий и типовые варианты.")
+def bench_passwords(seconds, methods):
+    """Замеряет проверку пароля: входов в секунду на одно ядро."""
+    current = passwords.current_method()
+    methods = methods or (
+        current, "scrypt:16384:8:1", "scrypt:32768:8:1", "scrypt:65536:8:1",
+        "pbkdf2:sha256:600000", "pbkdf2:sha256:1000000")
+
+    click.echo(f"{'метод':<28}{'мс на вход':>12}{'входов/с на ядро':>20}")
+    for method in dict.fromkeys(passwords.normalize_method(m) for m in methods):
+        pwhash = passwords.generate_password_hash("benchmark-password", method)
+        count = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            passwords.check_password_hash(pwhash, "benchmark-password")
+            count += 1
+        elapsed = time.perf_counter() - started
+        marker = " *" if method == current else ""
+        click.echo(f"{method:<28}{elapsed / count * 1000:>12.1f}"
+                   f"{count / elapsed:>20.1f}{marker}")
+    click.echo("* — текущий PASSWORD_HASH_METHOD")
+
+
+@click.command("profile-imports")
+@with_appcontext
+@click.option("--top", default=25, show_default=True,
+              help="Сколько самых долгих модулей показать.")
+@click.option("--config", "config_name", default="app.config.ProductionConfig",
+              show_default=True, help="Класс конфигурации для create_app.")
+def profile_imports(top, config_name):
+    """Время импортов при create_app (python -X importtime) по пакетам и модулям."""
+    sample, entries = startup.import_profile(config_name)
+    total = sum(entry.self_us for entry in entries)
+    click.echo(f"create_app: {sample.seconds * 1000:.0f} мс, импорты: "
+               f"{total / 1000:.0f} мс, модулей: {len(entries)}")
+
+    click.echo(f"\n{'пакет':<32}{'мс':>10}{'доля':>8}")
+    for package, self_us in startup.by_package(entries)[:top]:
+        click.echo(f"{package:<32}{self_us / 1000:>10.1f}{self_us / total:>8.0%}")
+
+    click.echo(f"\n{'модуль (с зависимостями)':<48}{'всего, мс':>10}{'свой, мс':>10}")
+    for entry in sorted(entries, key=lambda e: e.cumulative_us, reverse=True)[:top]:
+        click.echo(f"{'  ' * entry.depth + entry.name:<48}"
+                   f"{entry.cumulative_us / 1000:>10.1f}{entry.self_us / 1000:>10.1f}")
+
+
+@click.command("check-startup")
+@with_appcontext
+@click.option("--runs", default=3, show_default=True,
+              help="Сколько раз запускать create_app (берётся медиана).")
+@click.option("--budget-ms", type=float,
+              help="Бюджет холодного старта; по умолчанию STARTUP_BUDGET_MS.")
+@click.option("--config", "config_name", default="app.config.ProductionConfig",
+              show_default=True, help="Класс конфигурации для create_app.")
+def check_startup(runs, budget_ms, config_name):
+    """Проверяет время холодного старта и ленивую загрузку модулей (код 1 — провал)."""
+    budget_ms = budget_ms or current_app.config["STARTUP_BUDGET_MS"]
+    samples = startup.measure(config_name, runs)
+    median_ms = startup.median_seconds(samples) * 1000
+    runs_ms = ", ".join(f"{sample.seconds * 1000:.0f}" for sample in samples)
+    click.echo(f"create_app: медиана {median_ms:.0f} мс ({runs_ms}), "
+               f"бюджет {budget_ms:.0f} мс")
+
+    failed = False
+    if median_ms > budget_ms:
+        click.secho("Бюджет холодного старта превышен", fg="red", err=True)
+        failed = True
+    eager = startup.eager_modules(samples[0], current_app.config["STARTUP_LAZY_MODULES"])
+    if eager:
+        click.secho("Загружены при старте, хотя должны загружаться лениво: "
+                    + ", ".join(eager), fg="red", err=True)
+        failed = True
+    if failed:
+        raise click.exceptions.Exit(1)
+    click.echo("OK")
+
+
+@click.command("import")
+@with_appcontext
+@click.argument("kind", type=click.Choice(sorted(importer.KINDS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]),
+              help="Формат файла; по умолчанию — по расширению.")
+@click.option("--batch-size", default=1000, show_default=True,
+              help="Сколько записей записывать и фиксировать за раз.")
+@click.option("--owner", help="Email владельца для отелей без owner_email.")
+@click.option("--resume", is_flag=True,
+              help="Продолжить с контрольной точки прерванного импорта.")
+@click.option("--checkpoint", type=click.Path(dir_okay=False),
+              help="Файл контрольной точки; по умолчанию <файл>.checkpoint.")
+def import_data(kind, path, fmt, batch_size, owner, resume, checkpoint):
+    """Импортирует отели или номера из CSV/JSONL (upsert по external_id)."""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    checkpoint = checkpoint or path + ".checkpoint"
+    if not resume and os.path.exists(checkpoint):
+        click.echo(f"Найдена контрольная точка {checkpoint}: импорт начнётся "
+                   f"с начала (для продолжения укажите --resume)", err=True)
+
+    def on_error(number, message):
+        click.echo(f"Запись {number}: {message}", err=True)
+
+    started = time.perf_counter()
+    progress = None
+    try:
+        for progress in importer.run_import(
+                kind, path, fmt, checkpoint, batch_size=batch_size,
+                resume=resume, default_owner=owner, on_error=on_error):
+            click.echo(f"Обработано записей: {progress.processed}, записано: "
+                       f"{progress.written}, ошибок: {progress.errors}")
+    except importer.ImportSourceChanged as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Готово за {time.perf_counter() - started:.1f} с")
+    if progress is not None and progress.errors:
+        raise click.exceptions.Exit(1)
+
+
+def register_commands(app: Flask) -> None:
+    app.cli.add_command(init_db)
+    app.cli.add_command(rebuild_room_nights)
+    app.cli.add_command(explain_hot_queries)
+    app.cli.add_command(rebuild_stats)
+    app.cli.add_command(rebuild_search_index)
+    app.cli.add_command(build_assets)
+    app.cli.add_command(build_templates)
+    app.cli.add_command(bench_passwords)
+    app.cli.add_command(import_data)
+    app.cli.add_command(profile_imports)
+    app.cli.add_command(check_startup)
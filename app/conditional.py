@@ -0,0 +1,163 @@
+"""
+Условные GET-запросы (ETag / Last-Modified) и политика Cache-Control.
+
+Для страниц, помеченных @conditional_get, до рендеринга выполняется один
+дешёвый запрос состояния данных страницы. Из этого состояния, адреса
+страницы и текущего пользователя строится слабый ETag. Если копия
+клиента актуальна, отдаётся 304 без обращения к шаблону.
+
+Состояние собирается из подзапросов:
+- changes() — max(updated_at) и число строк (удаление строки не меняет
+  max(updated_at)); только для небольшой выборки по индексу, например
+  номеров одного отеля;
+- versions() — метки версий из stats_counters (чтение по первичному
+  ключу); для страниц, зависящих от целых таблиц. Время изменения
+  метки не дают, поэтому у таких страниц нет Last-Modified.
+"""
+
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import func, select, true
+
+from .extensions import db
+from .models.stats_counter import StatsCounter
+
+
+def changes(model, *criteria, count=True):
+    """
+    Подзапрос (max(updated_at)[, count(*)]) по строкам model, подходящим
+    под criteria. count=False — только время изменения (для больших таблиц,
+    где строки не удаляются напрямую и max берётся по индексу).
+    """
+    columns = [func.max(model.updated_at).label("changed_at")]
+    if count:
+        columns.append(func.count().label("rows"))
+    return select(*columns).select_from(model).where(*criteria).subquery()
+
+
+def versions(*names):
+    """Подзапрос со значениями меток версий names из stats_counters."""
+    table = StatsCounter.__table__
+    return select(*(
+        func.coalesce(select(table.c.value).where(table.c.name == name)
+                      .scalar_subquery(), 0).label(name)
+        for name in names
+    )).subquery()
+
+
+def page_state(*sources):
+    """
+    Состояние данных страницы одним запросом по подзапросам changes()
+    и versions().
+
+    Возвращает (last_modified, fingerprint): время последнего изменения
+    (UTC) и кортеж всех значений для ETag.
+    """
+    columns = [column for source in sources for column in source.c]
+    # Каждый подзапрос возвращает ровно одну строку: соединяем без условия
+    statement = select(*columns).select_from(sources[0])
+    for source in sources[1:]:
+        statement = statement.join(source, true())
+    row = db.session.execute(statement).one()
+    changed = [value for value, column in zip(row, columns)
+               if column.name == "changed_at" and value is not None]
+    last_modified = max(changed).replace(tzinfo=timezone.utc) if changed else None
+    return last_modified, tuple(row)
+
+
+def _user_state():
+    # Шапка страницы показывает имя и меню по роли пользователя
+    if current_user.is_authenticated:
+        return current_user.id, current_user.role, current_user.updated_at
+    return "anonymous"
+
+
+def _etag(fingerprint):
+    # Ожидающие flash-сообщения тоже часть страницы, если шаблон их выводит
+    raw = repr((request.full_path, _user_state(), session.get("_flashes"),
+                fingerprint))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional_get(state):
+    """
+    Декоратор маршрута: ETag/Last-Modified и ответ 304.
+
+    state(**view_args) возвращает результат page_state() для страницы.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(*args, **kwargs)
+
+            last_modified, fingerprint = state(**kwargs)
+            etag = _etag(fingerprint)
+
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            return response
+        return wrapped
+    return decorator
+
+
+def _public(response):
+    # Персональные страницы и ответы, меняющие сессию, в общий кеш не попадают
+    if current_user.is_authenticated or session.modified \
+            or "Set-Cookie" in response.headers:
+        return _private(response)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get("PUBLIC_PAGE_MAX_AGE", 0)
+    response.cache_control.must_revalidate = True
+    response.vary.add("Cookie")
+    return response
+
+
+def _private(response):
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add("Cookie")
+    return response
+
+
+def _no_store(response):
+    response.cache_control.no_store = True
+    return response
+
+
+CACHE_POLICIES = {
+    "main": _public,
+    "user": _private,
+    "admin": _no_store,
+}
+
+
+def register_cache_policies(app):
+    """Заголовок Cache-Control для ответов каждого blueprint."""
+
+    @app.after_request
+    def _apply_cache_policy(response):
+        policy = CACHE_POLICIES.get(request.blueprint)
+        if policy is not None and not response.headers.get("Cache-Control"):
+            response = policy(response)
+        return response
@@ -18,10 +18,38 @@ class Config:
     # База данных SQLite - исправленный путь
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(basedir, "instance", "hotel_booking.db")}'
 
+    # Движок только для чтения (app/read_only.py) для GET-запросов
+    # blueprints main и admin. READ_ONLY_DB_URI — другой файл или снимок
+    # базы; по умолчанию тот же файл, открытый с mode=ro.
+    READ_ONLY_DB_ENABLED = True
+    READ_ONLY_DB_URI = os.environ.get('READ_ONLY_DB_URI')
+    READ_ONLY_DB_BLUEPRINTS = ('main', 'admin')
+    READ_ONLY_DB_MMAP_SIZE = 256 * 1024 * 1024
+    READ_ONLY_DB_CACHE_SIZE = -64 * 1024  # в КиБ (отрицательное значение)
+
 
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # db.create_all() при создании приложения (удобно в разработке).
+    # Под gunicorn/uWSGI см. ProductionConfig и app/server.py
+    DB_CREATE_ALL = True
+    DB_CREATE_ALL_ON_START = False
+
+    # Прогрев воркера после fork: шаблоны и соединения с базой
+    WORKER_WARMUP = os.environ.get('WORKER_WARMUP', '0') == '1'
+
+    # Кеш байткода шаблонов (app/templating.py, `flask build-templates`),
+    # общий для всех воркеров
+    JINJA_BYTECODE_CACHE_ENABLED = True
+    JINJA_BYTECODE_CACHE_DIR = None  # по умолчанию instance/jinja_cache
+
+    # Холодный старт (flask check-startup): бюджет на create_app в новом
+    # процессе и модули, которые не должны импортироваться при старте
+    STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 1500))
+    STARTUP_LAZY_MODULES = ('app.forms', 'app.routes.admin_views',
+                            'email_validator', 'dns')
+
     # CSRF защита
     WTF_CSRF_ENABLED = True
     WTF_CSRF_SECRET_KEY = os.environ.get('CSRF_SECRET_KEY', 'csrf-secret-key')
@@ -32,5 +60,92 @@ class Config:
     # Настройки загрузки файлов
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  
 
+    # Индекс занятости номеров в памяти (app/occupancy.py). Брони других
+    # воркеров видны сразу (метка bookings_version); TTL — страховка от
+    # правок базы в обход приложения.
+    OCCUPANCY_INDEX_ENABLED = True
+    OCCUPANCY_INDEX_TTL = float(os.environ.get('OCCUPANCY_INDEX_TTL', 30))
+
+    # Списки админки: показывать общее число строк и сколько секунд
+    # кешировать его (вместо COUNT(*) на каждой странице)
+    ADMIN_LIST_TOTALS = True
+    ADMIN_LIST_TOTAL_TTL = 60
+
+    # Кеш страниц для анонимных пользователей (app/page_cache.py).
+    # "sqlite" — общий для всех воркеров файл в instance/,
+    # "memory" — LRU в памяти процесса (только для одного процесса).
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'sqlite')
+    RESPONSE_CACHE_PATH = None  # по умолчанию instance/response_cache.db
+    RESPONSE_CACHE_TTL = 300
+    RESPONSE_CACHE_MAX_ENTRIES = 5000
+
+    # Cache-Control публичных страниц (blueprint main) для анонимных
+    # пользователей: сколько секунд браузер/CDN может не перепроверять ETag
+    PUBLIC_PAGE_MAX_AGE = 0
+
+    # Хеширование паролей (app/passwords.py): метод Werkzeug и его стоимость.
+    # При смене параметров пароли перехешируются при входе пользователя.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # 0 — хешировать в процессе воркера; > 0 — в пуле из стольких процессов.
+    # Сверх пула в очереди ждут не больше QUEUE_LIMIT задач, остальным — 503.
+    PASSWORD_HASH_POOL_SIZE = int(os.environ.get('PASSWORD_HASH_POOL_SIZE', 0))
+    PASSWORD_HASH_QUEUE_LIMIT = 8
+    PASSWORD_HASH_TIMEOUT = 10
+
+    # Кеш пользователей для Flask-Login (app/user_cache.py). Метки версий
+    # хранятся в хранилище кеша страниц (RESPONSE_CACHE_BACKEND)
+    USER_CACHE_ENABLED = True
+    USER_CACHE_TTL = 300
+    USER_CACHE_MAX_ENTRIES = 1024
+
+    # Статика (app/assets.py): после `flask build-assets` url_for('static')
+    # отдаёт файлы из static/dist/ с хешем в имени. В разработке выключено,
+    # чтобы правки CSS были видны без пересборки.
+    STATIC_MANIFEST_ENABLED = os.environ.get('FLASK_ENV') != 'development'
+    ASSETS_AUTO_BUILD = False
+    ASSETS_CACHE = False
+    ASSETS_MANIFEST = False
+
+    # Профиль SQL и рендеринга (app/instrumentation.py): доля запросов в
+    # выборке, заголовок Server-Timing, порог повторов одного запроса (N+1),
+    # журнал (по умолчанию stderr; WARNING — только предупреждения N+1)
+    SQL_PROFILE_ENABLED = True
+    SQL_PROFILE_SAMPLE_RATE = float(os.environ.get('SQL_PROFILE_SAMPLE_RATE', 0.05))
+    SQL_PROFILE_HEADER = True
+    SQL_PROFILE_N_PLUS_ONE_THRESHOLD = 5
+    SQL_PROFILE_SLOWEST = 3
+    SQL_PROFILE_LOG_LEVEL = os.environ.get('SQL_PROFILE_LOG_LEVEL', 'INFO')
+    SQL_PROFILE_LOG_PATH = os.environ.get('SQL_PROFILE_LOG_PATH')
+
+    # Журнал медленных запросов (app/slow_queries.py, /admin/slow-queries):
+    # порог, файл (у каждого процесса свой, slow_queries.<pid>.log, с
+    # ротацией по размеру) и таблицы, полный просмотр которых помечается
+    SLOW_QUERY_ENABLED = True
+    SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+    SLOW_QUERY_LOG_PATH = None  # по умолчанию instance/slow_queries.log
+    SLOW_QUERY_LOG_MAX_BYTES = 5 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS = 3
+    SLOW_QUERY_LARGE_TABLES = ('bookings', 'room_nights', 'users', 'hotels')
+
+    # Метрики Prometheus (app/metrics.py, GET /metrics). Каталог общий для
+    # всех воркеров; если задан METRICS_TOKEN, нужен заголовок
+    # Authorization: Bearer <токен>.
+    METRICS_ENABLED = True
+    METRICS_DIR = os.environ.get('METRICS_DIR')  # по умолчанию instance/metrics
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
     # Режим отладки
     DEBUG = os.environ.get('FLASK_ENV') == 'development'
+
+
+class ProductionConfig(Config):
+    """
+    Конфигурация для wsgi.py: приложение предзагружается в мастер-процессе
+    gunicorn/uWSGI, таблицы создаются там же один раз, а не в каждом воркере.
+    """
+    DB_CREATE_ALL = False
+    DB_CREATE_ALL_ON_START = os.environ.get('DB_CREATE_ALL_ON_START', '1') == '1'
+    # Шаблоны компилируются в мастере и не перечитываются с диска
+    TEMPLATES_PRECOMPILE_ON_START = True
+    TEMPLATES_AUTO_RELOAD = False
@@ -1,13 +1,17 @@
+from flask_assets import Environment
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_wtf import CSRFProtect
 
-db = SQLAlchemy()
+from app.read_only import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 login_manager = LoginManager()
 csrf = CSRFProtect()
+assets = Environment()
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    from app.models.user import User
-    return User.query.get(int(user_id))
+    from app.user_cache import user_cache
+    return user_cache.load(int(user_id))
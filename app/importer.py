@@ -0,0 +1,271 @@
+"""
+Потоковый импорт отелей и номеров из CSV или JSONL (flask import).
+
+Записи читаются генератором по одной, проверяются правилами HotelForm и
+RoomForm и записываются пачками: один INSERT ... ON CONFLICT (external_id)
+DO UPDATE на пачку (executemany). Ключ записи — external_id, поэтому
+повторный импорт того же файла обновляет строки, а не дублирует их.
+
+Каждая пачка фиксируется отдельным commit, после чего номер последней
+обработанной записи сохраняется в файл контрольной точки: прерванный
+импорт продолжается с того же места (--resume). В памяти одновременно
+находится только одна пачка, поэтому расход памяти не зависит от
+размера файла.
+
+Поля записей:
+- hotels: external_id, name, description, address, city, phone, email,
+  owner_email (или владелец по умолчанию --owner);
+- rooms: external_id, hotel_external_id, name, description,
+  price_per_night, capacity, amenities, image_url.
+"""
+
+import csv
+import json
+import os
+from itertools import islice
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from werkzeug.datastructures import MultiDict
+from werkzeug.utils import import_string
+
+from . import stats
+from .extensions import db
+from .models.hotel import Hotel
+from .models.room import Room
+from .models.user import User
+from .page_cache import invalidate_after_commit
+
+
+class ImportProgress(NamedTuple):
+    """Состояние после очередной пачки."""
+    processed: int  # номер последней обработанной записи в файле
+    written: int
+    errors: int
+
+
+class ImportSourceChanged(Exception):
+    """Файл изменился после сохранения контрольной точки."""
+
+
+def read_records(path, fmt):
+    """
+    Генератор (номер записи, dict или None, ошибка) по CSV или JSONL.
+    Номер — порядковый номер записи (для CSV — без строки заголовка).
+    """
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            for number, record in enumerate(csv.DictReader(f), 1):
+                yield number, record, None
+            return
+
+        number = 0
+        for line in f:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, None, f"некорректный JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield number, None, "ожидается JSON-объект"
+                continue
+            yield number, record, None
+
+
+def validate(records, form_class, extra_fields):
+    """
+    Проверяет записи правилами формы. Для корректных записей возвращает
+    данные формы плюс external_id и extra_fields (ссылки на другие сущности).
+    """
+    for number, record, error in records:
+        if error:
+            yield number, None, error
+            continue
+
+        values = {key: "" if value is None else str(value).strip()
+                  for key, value in record.items() if key is not None}
+        form = form_class(formdata=MultiDict(values), meta={"csrf": False})
+        if not form.validate():
+            yield number, None, "; ".join(
+                f"{name}: {', '.join(messages)}"
+                for name, messages in form.errors.items())
+            continue
+        if not values.get("external_id"):
+            yield number, None, "external_id: обязательное поле"
+            continue
+
+        data = {name: field.data for name, field in form._fields.items()
+                if name != "submit"}
+        data["external_id"] = values["external_id"]
+        for name in extra_fields:
+            data[name] = values.get(name) or None
+        yield number, data, None
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _upsert(model, rows, columns):
+    """INSERT ... ON CONFLICT (external_id) DO UPDATE для пачки строк."""
+    table = model.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.external_id],
+        set_={name: stmt.excluded[name] for name in (*columns, "updated_at")},
+    )
+    db.session.execute(stmt, rows)
+
+
+def _lookup(column, key_column, keys):
+    """{ключ: значение column} одним запросом по индексированному key_column."""
+    if not keys:
+        return {}
+    return dict(db.session.execute(
+        select(key_column, column).where(key_column.in_(keys))).all())
+
+
+HOTEL_COLUMNS = ("name", "description", "address", "city", "phone", "email",
+                 "owner_id")
+ROOM_COLUMNS = ("name", "description", "price_per_night", "capacity",
+                "amenities", "image_url", "hotel_id")
+
+
+def _write_hotels(batch, default_owner, on_error):
+    owners = _lookup(User.id, User.email, {
+        data["owner_email"] or default_owner for _, data in batch} - {None})
+    existing = _lookup(Hotel.id, Hotel.external_id,
+                       {data["external_id"] for _, data in batch})
+
+    rows = {}
+    for number, data in batch:
+        owner_email = data["owner_email"] or default_owner
+        if owner_email not in owners:
+            on_error(number, f"владелец не найден: {owner_email or '(не указан)'}")
+            continue
+        rows[data["external_id"]] = {
+            "external_id": data["external_id"],
+            "owner_id": owners[owner_email],
+            **{name: data[name] for name in HOTEL_COLUMNS if name != "owner_id"},
+        }
+    if not rows:
+        return 0
+
+    _upsert(Hotel, list(rows.values()), HOTEL_COLUMNS)
+    # Массовая вставка не вызывает события моделей: счётчики и кеш страниц
+    stats.adjust(db.session.connection(),
+                 {"hotels": len(rows.keys() - existing.keys()), stats.CATALOG_VERSION: 1})
+    invalidate_after_commit(
+        db.session, "hotels", *(f"hotel:{hotel_id}" for hotel_id in existing.values()))
+    return len(rows)
+
+
+def _write_rooms(batch, default_owner, on_error):
+    hotels = _lookup(Hotel.id, Hotel.external_id,
+                     {data["hotel_external_id"] for _, data in batch} - {None})
+    # Номер мог переехать в другой отель: страница прежнего тоже меняется
+    previous = _lookup(Room.hotel_id, Room.external_id,
+                       {data["external_id"] for _, data in batch})
+
+    rows = {}
+    for number, data in batch:
+        hotel_id = hotels.get(data["hotel_external_id"])
+        if hotel_id is None:
+            on_error(number, f"отель не найден: {data['hotel_external_id'] or '(не указан)'}")
+            continue
+        rows[data["external_id"]] = {
+            "external_id": data["external_id"],
+            "hotel_id": hotel_id,
+            **{name: data[name] for name in ROOM_COLUMNS if name != "hotel_id"},
+        }
+    if not rows:
+        return 0
+
+    _upsert(Room, list(rows.values()), ROOM_COLUMNS)
+    stats.adjust(db.session.connection(), {stats.CATALOG_VERSION: 1})
+    hotel_ids = {row["hotel_id"] for row in rows.values()} | set(previous.values())
+    invalidate_after_commit(
+        db.session, "hotels", *(f"hotel:{hotel_id}" for hotel_id in hotel_ids))
+    return len(rows)
+
+
+# Вид импорта: форма для проверки (импортируется при запуске импорта),
+# дополнительные поля, запись пачки
+KINDS = {
+    "hotels": ("app.forms.hotel_forms.HotelForm", ("owner_email",), _write_hotels),
+    "rooms": ("app.forms.room_forms.RoomForm", ("hotel_external_id",), _write_rooms),
+}
+
+
+def _source_state(path):
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size,
+            "mtime": stat.st_mtime}
+
+
+def load_checkpoint(checkpoint_path, kind, path):
+    """Номер последней импортированной записи или 0."""
+    if not os.path.exists(checkpoint_path):
+        return 0
+    with open(checkpoint_path, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("kind") != kind or checkpoint.get("source") != _source_state(path):
+        raise ImportSourceChanged(
+            f"Контрольная точка {checkpoint_path} относится к другому файлу "
+            f"или файл изменился")
+    return checkpoint["processed"]
+
+
+def _save_checkpoint(checkpoint_path, kind, path, processed):
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"kind": kind, "source": _source_state(path),
+                   "processed": processed}, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def run_import(kind, path, fmt, checkpoint_path, batch_size=1000,
+               resume=False, default_owner=None, on_error=None):
+    """
+    Импортирует файл, возвращая генератор ImportProgress после каждой пачки.
+
+    on_error(номер записи, сообщение) вызывается для отклонённых записей.
+    По завершении контрольная точка удаляется.
+    """
+    form_name, extra_fields, write = KINDS[kind]
+    form_class = import_string(form_name)
+    start_after = load_checkpoint(checkpoint_path, kind, path) if resume else 0
+    written = errors = 0
+
+    def report(number, message):
+        nonlocal errors
+        errors += 1
+        if on_error is not None:
+            on_error(number, message)
+
+    def valid_records():
+        records = (item for item in read_records(path, fmt) if item[0] > start_after)
+        for number, data, error in validate(records, form_class, extra_fields):
+            if error:
+                report(number, error)
+            else:
+                yield number, data
+
+    processed = start_after
+    for batch in batched(valid_records(), batch_size):
+        written += write(batch, default_owner, report)
+        db.session.commit()
+        processed = batch[-1][0]
+        _save_checkpoint(checkpoint_path, kind, path, processed)
+        yield ImportProgress(processed, written, errors)
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    if processed == start_after:
+        yield ImportProgress(processed, written, errors)
@@ -0,0 +1,224 @@
+"""
+Профиль SQL и рендеринга для отдельных запросов.
+
+Для запроса, попавшего в выборку (SQL_PROFILE_SAMPLE_RATE), считаются:
+число SQL-запросов и их суммарное время, время рендеринга шаблонов и
+самые медленные запросы. Результат отдаётся заголовком Server-Timing
+(виден в DevTools браузера) и пишется одной JSON-строкой в журнал
+app.instrumentation: в stderr (его собирают и flask run, и gunicorn)
+или в файл SQL_PROFILE_LOG_PATH. Уровень журнала задаётся явно
+(SQL_PROFILE_LOG_LEVEL), иначе без настройки logging строки уровня
+INFO отбрасывались бы.
+
+Если один и тот же запрос (с точностью до параметров) выполнен за
+запрос больше SQL_PROFILE_N_PLUS_ONE_THRESHOLD раз, это похоже на N+1:
+такие запросы перечисляются в журнале с уровнем WARNING.
+
+Для запросов вне выборки обработчики событий сводятся к чтению
+ContextVar, поэтому профиль можно оставлять включённым в продакшене.
+"""
+
+import heapq
+import json
+import logging
+import random
+import re
+import sys
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from logging.handlers import WatchedFileHandler
+
+from flask import before_render_template, request, request_started, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_profile = ContextVar("sql_profile", default=None)
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_SPACES = re.compile(r"\s+")
+_SELECT_LIST = re.compile(r"^SELECT .+? FROM ")
+
+
+@lru_cache(maxsize=1024)
+def normalize(statement):
+    """Текст запроса без параметров: IN (?, ?, ?) и числа сворачиваются."""
+    statement = _SPACES.sub(" ", statement).strip()
+    statement = _IN_LIST.sub("(?)", statement)
+    return _NUMBER.sub("?", statement)
+
+
+class RequestProfile:
+    """Счётчики одного запроса."""
+
+    __slots__ = ("started", "statements", "db_time", "render_time",
+                 "counts", "slowest", "slowest_limit", "_render_depth",
+                 "_render_started")
+
+    def __init__(self, slowest_limit=3):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.counts = Counter()
+        self.slowest = []  # куча (время, запрос) размером slowest_limit
+        self.slowest_limit = slowest_limit
+        self._render_depth = 0
+        self._render_started = 0.0
+
+    def record(self, statement, duration):
+        self.statements += 1
+        self.db_time += duration
+        key = normalize(statement)
+        self.counts[key] += 1
+        if len(self.slowest) < self.slowest_limit:
+            heapq.heappush(self.slowest, (duration, key))
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (duration, key))
+
+    def render_started(self):
+        # Вложенный render_template учитывается один раз
+        if self._render_depth == 0:
+            self._render_started = time.perf_counter()
+        self._render_depth += 1
+
+    def render_finished(self):
+        self._render_depth -= 1
+        if self._render_depth == 0:
+            self.render_time += time.perf_counter() - self._render_started
+
+    def repeated(self, threshold):
+        """Запросы, выполненные больше threshold раз (вероятные N+1)."""
+        return [(statement, count) for statement, count in self.counts.most_common()
+                if count > threshold]
+
+
+def current_profile():
+    """Профиль текущего запроса или None, если запрос не в выборке."""
+    return _profile.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _profile.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _profile.get()
+    if profile is not None and conn.info.get("query_started"):
+        profile.record(statement, time.perf_counter() - conn.info["query_started"].pop())
+
+
+def _short(statement, limit=300):
+    # Для журнала список столбцов не важен, важны FROM и WHERE
+    return _SELECT_LIST.sub("SELECT … FROM ", statement)[:limit]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class SqlProfiler:
+    """Выборка запросов, заголовок Server-Timing и журнал (один на процесс)."""
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.threshold = 5
+        self.slowest = 3
+        self.header = True
+        self._handler = None
+
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config.get("SQL_PROFILE_ENABLED", True)
+        self.sample_rate = config.get("SQL_PROFILE_SAMPLE_RATE", 0.05)
+        self.threshold = config.get("SQL_PROFILE_N_PLUS_ONE_THRESHOLD", 5)
+        self.slowest = config.get("SQL_PROFILE_SLOWEST", 3)
+        self.header = config.get("SQL_PROFILE_HEADER", True)
+        app.extensions["sql_profiler"] = self
+        if not self.enabled:
+            return
+        self._configure_logger(config)
+
+        request_started.connect(self._start, app)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+        app.after_request(self._finish)
+        app.teardown_request(self._discard)
+
+    def _configure_logger(self, config):
+        if self._handler is not None:
+            logger.removeHandler(self._handler)
+            self._handler.close()
+        path = config.get("SQL_PROFILE_LOG_PATH")
+        # WatchedFileHandler переоткрывает файл после внешней ротации
+        # (logrotate) и безопасен для нескольких воркеров
+        self._handler = (WatchedFileHandler(path, encoding="utf-8") if path
+                         else logging.StreamHandler(sys.stderr))
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(self._handler)
+        logger.setLevel(config.get("SQL_PROFILE_LOG_LEVEL", "INFO"))
+        # Только в свой обработчик, не в общий журнал приложения
+        logger.propagate = False
+
+    def _start(self, sender, **extra):
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            _profile.set(RequestProfile(self.slowest))
+        else:
+            _profile.set(None)
+
+    def _render_started(self, sender, **extra):
+        profile = _profile.get()
+        if profile is not None:
+            profile.render_started()
+
+    def _render_finished(self, sender, **extra):
+        profile = _profile.get()
+        if profile is not None:
+            profile.render_finished()
+
+    def _finish(self, response):
+        profile = _profile.get()
+        if profile is None:
+            return response
+
+        total = time.perf_counter() - profile.started
+        if self.header:
+            response.headers.add("Server-Timing", ", ".join((
+                f'db;dur={_ms(profile.db_time)};desc="{profile.statements} statements"',
+                f"render;dur={_ms(profile.render_time)}",
+                f"total;dur={_ms(total)}",
+            )))
+
+        repeated = profile.repeated(self.threshold)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "total_ms": _ms(total),
+            "db_ms": _ms(profile.db_time),
+            "render_ms": _ms(profile.render_time),
+            "statements": profile.statements,
+            "slowest": [{"ms": _ms(duration), "sql": _short(statement)}
+                        for duration, statement in sorted(profile.slowest, reverse=True)],
+        }
+        if repeated:
+            record["n_plus_one"] = [{"count": count, "sql": _short(statement)}
+                                    for statement, count in repeated]
+        logger.log(logging.WARNING if repeated else logging.INFO, "%s",
+                   json.dumps(record, ensure_ascii=False))
+        return response
+
+    def _discard(self, exc):
+        _profile.set(None)
+
+
+sql_profiler = SqlProfiler()
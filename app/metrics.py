@@ -0,0 +1,453 @@
+"""
+Метрики в формате Prometheus (GET /metrics).
+
+Собираются:
+- по запросам (метка endpoint — имя маршрута, например main.catalog):
+  счётчик по кодам ответа, гистограмма времени ответа, запросы
+  в обработке, число SQL-запросов;
+- по пулу соединений: время получения соединения из пула;
+- бизнес-события: созданные и отменённые брони, неудачные входы;
+- время запуска воркеров gunicorn/uWSGI (app/server.py).
+
+Значения хранятся не в памяти, а в файле каждого процесса (mmap) в
+каталоге METRICS_DIR: каждый воркер gunicorn/uWSGI пишет только в свой
+файл, а /metrics в любом воркере суммирует все файлы. Счётчики умерших
+воркеров продолжают учитываться (счётчик не должен уменьшаться), а
+значения «запросов в обработке» — нет. Каталог очищается при старте
+сервера (reset_directory), иначе счётчики продолжатся с прошлого запуска.
+"""
+
+import glob
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from flask import Response, abort, g, request
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.pool import QueuePool
+
+from .models.booking import Booking
+
+_PENDING_KEY = "metrics_pending"
+_statements = ContextVar("metrics_statements", default=None)
+
+# Время ответа и ожидания соединения, секунды
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+STARTUP_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _ValueFile:
+    """
+    Файл значений одного процесса, отображённый в память.
+
+    Заголовок — занятый объём (uint32). Запись: длина ключа (uint32),
+    ключ в UTF-8 с выравниванием до 8 байт, значение (double). Запись
+    добавляется целиком до обновления заголовка, поэтому читатель из
+    другого процесса никогда не видит её наполовину.
+    """
+
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self._file = open(path, "a+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self._file.truncate(self.INITIAL_SIZE)
+            size = self.INITIAL_SIZE
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._positions = {}
+        used = struct.unpack_from("I", self._map, 0)[0] or 8
+        for key, _, position in _entries(self._map, used):
+            self._positions[key] = position
+        self._used = used
+        struct.pack_into("I", self._map, 0, used)
+
+    def _position(self, key):
+        position = self._positions.get(key)
+        if position is not None:
+            return position
+        encoded = key.encode("utf-8")
+        padded = len(encoded) + (-(4 + len(encoded)) % 8)
+        size = 4 + padded + 8
+        if self._used + size > len(self._map):
+            capacity = len(self._map)
+            while self._used + size > capacity:
+                capacity *= 2
+            self._map.close()
+            self._file.truncate(capacity)
+            self._map = mmap.mmap(self._file.fileno(), capacity)
+        struct.pack_into(f"I{padded}sd", self._map, self._used,
+                         len(encoded), encoded, 0.0)
+        position = self._used + 4 + padded
+        self._used += size
+        struct.pack_into("I", self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def add(self, key, amount):
+        position = self._position(key)
+        value = struct.unpack_from("d", self._map, position)[0]
+        struct.pack_into("d", self._map, position, value + amount)
+
+
+def _entries(data, used):
+    """(ключ, значение, позиция значения) для записей файла."""
+    position = 8
+    while position + 4 <= used:
+        length = struct.unpack_from("I", data, position)[0]
+        padded = length + (-(4 + length) % 8)
+        key = bytes(data[position + 4:position + 4 + length]).decode("utf-8")
+        value_position = position + 4 + padded
+        yield key, struct.unpack_from("d", data, value_position)[0], value_position
+        position = value_position + 8
+
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < 8:
+        return []
+    used = min(struct.unpack_from("I", data, 0)[0], len(data))
+    return [(key, value) for key, value, _ in _entries(data, used)]
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _Store:
+    """
+    Файлы значений текущего процесса: "values" — счётчики и гистограммы,
+    "live" — значения, которые имеют смысл только пока процесс жив.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self._files = {}
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def configure(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self.directory = directory
+            self._files = {}
+
+    def add(self, kind, key, amount):
+        if self.directory is None:
+            return
+        with self._lock:
+            # После fork у воркера свой файл
+            if self._pid != os.getpid():
+                self._files = {}
+                self._pid = os.getpid()
+            values = self._files.get(kind)
+            if values is None:
+                path = os.path.join(self.directory, f"{kind}_{self._pid}.db")
+                values = self._files[kind] = _ValueFile(path)
+            values.add(key, amount)
+
+    def collect(self):
+        """Сумма значений по всем процессам: {ключ: значение}."""
+        totals = {}
+        if self.directory is None:
+            return totals
+        for path in glob.glob(os.path.join(self.directory, "*.db")):
+            kind, _, pid = os.path.basename(path)[:-3].rpartition("_")
+            if kind == "live" and not _pid_alive(int(pid)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            for key, value in _read_file(path):
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+
+_store = _Store()
+
+
+def metrics_directory(app):
+    """Каталог файлов значений: METRICS_DIR или instance/metrics."""
+    return app.config.get("METRICS_DIR") or os.path.join(app.instance_path, "metrics")
+
+
+def reset_directory(directory):
+    """Удаляет файлы значений (вызывается при старте сервера, до воркеров)."""
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+
+
+class _Metric:
+    type = None
+    kind = "values"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def _key(self, sample, labels, extra=()):
+        pairs = [[name, str(labels[name])] for name in self.labelnames]
+        return json.dumps([sample, pairs + list(extra)], ensure_ascii=False)
+
+    def _add(self, sample, amount, labels, extra=()):
+        _store.add(self.kind, self._key(sample, labels, extra), amount)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        self._add(self.name, amount, labels)
+
+
+class Gauge(_Metric):
+    """Сумма по живым процессам (например, запросы в обработке)."""
+    type = "gauge"
+    kind = "live"
+
+    def inc(self, amount=1, **labels):
+        self._add(self.name, amount, labels)
+
+    def dec(self, amount=1, **labels):
+        self._add(self.name, -amount, labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        # Храним попадания в каждый интервал; накопительные суммы — при выводе
+        index = bisect_left(self.buckets, value)
+        bound = _format_value(self.buckets[index]) if index < len(self.buckets) else "+Inf"
+        self._add(f"{self.name}_bucket", 1, labels, [["le", bound]])
+        self._add(f"{self.name}_sum", value, labels)
+        self._add(f"{self.name}_count", 1, labels)
+
+
+REGISTRY = []
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Ответы по маршруту, методу и коду ответа",
+    ("endpoint", "method", "status"))
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds", "Время обработки запроса",
+    ("endpoint", "method"))
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Запросы в обработке", ("endpoint",))
+DB_STATEMENTS = Counter(
+    "db_statements_total", "SQL-запросы, выполненные при обработке запросов",
+    ("endpoint",))
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_seconds",
+    "Время получения соединения из пула (ожидание и открытие нового)",
+    buckets=POOL_BUCKETS)
+BOOKINGS_CREATED = Counter("bookings_created_total", "Созданные бронирования")
+BOOKINGS_CANCELLED = Counter("bookings_cancelled_total", "Отменённые бронирования")
+LOGIN_FAILURES = Counter("login_failures_total", "Неудачные попытки входа")
+WORKER_STARTUP = Histogram(
+    "worker_startup_seconds", "Время от fork воркера до готовности принимать запросы",
+    buckets=STARTUP_BUCKETS)
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample_line(sample, pairs, value):
+    labels = ",".join(f'{name}="{_escape(label)}"' for name, label in pairs)
+    return f"{sample}{{{labels}}} {_format_value(value)}" if labels \
+        else f"{sample} {_format_value(value)}"
+
+
+def _histogram_lines(metric, samples):
+    """Накопительные бакеты, _sum и _count для каждого набора меток."""
+    series = {}
+    for (sample, pairs), value in samples:
+        if sample == f"{metric.name}_bucket":
+            labels, bound = tuple(map(tuple, pairs[:-1])), pairs[-1][1]
+            series.setdefault(labels, {"buckets": {}})["buckets"][bound] = value
+        else:
+            suffix = sample[len(metric.name) + 1:]
+            series.setdefault(tuple(map(tuple, pairs)), {"buckets": {}})[suffix] = value
+
+    lines = []
+    bounds = [_format_value(bound) for bound in metric.buckets] + ["+Inf"]
+    for labels, values in sorted(series.items()):
+        cumulative = 0.0
+        for bound in bounds:
+            cumulative += values["buckets"].get(bound, 0.0)
+            lines.append(_sample_line(f"{metric.name}_bucket",
+                                      [*labels, ("le", bound)], cumulative))
+        lines.append(_sample_line(f"{metric.name}_sum", labels, values.get("sum", 0.0)))
+        lines.append(_sample_line(f"{metric.name}_count", labels, values.get("count", 0.0)))
+    return lines
+
+
+def generate_latest():
+    """Все метрики в текстовом формате Prometheus."""
+    by_metric = {}
+    for key, value in _store.collect().items():
+        sample, pairs = json.loads(key)
+        by_metric.setdefault(sample.rsplit("_", 1)[0] if sample.endswith(
+            ("_bucket", "_sum", "_count")) else sample, []).append(((sample, pairs), value))
+
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        samples = by_metric.get(metric.name, [])
+        if metric.type == "histogram":
+            lines.extend(_histogram_lines(metric, samples))
+        else:
+            lines.extend(_sample_line(sample, pairs, value)
+                         for (sample, pairs), value in sorted(samples))
+    return "\n".join(lines) + "\n"
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool, замеряющий получение соединения (db_pool_checkout_seconds).
+
+    Подкласс, а не события пула: событие checkout приходит уже после
+    получения соединения, и ожидание им не измерить.
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+
+# SQLAlchemy называет логгер пула по модулю класса, то есть
+# app.metrics.TimedQueuePool — дочерний для логгера приложения app. При
+# FLASK_DEBUG тот получает уровень DEBUG, и без явного уровня в журнал
+# попадала бы каждая выдача и возврат соединения. echo_pool по-прежнему
+# включает журнал пула.
+logging.getLogger(f"{__name__}.{TimedQueuePool.__name__}").setLevel(logging.WARNING)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def count_after_commit(session, counter, amount=1):
+    """Увеличивает счётчик после успешного commit текущей транзакции."""
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    pending[counter] = pending.get(counter, 0) + amount
+
+
+@event.listens_for(Booking, "after_insert")
+def _booking_created(mapper, connection, target):
+    count_after_commit(object_session(target), BOOKINGS_CREATED)
+
+
+@event.listens_for(Booking, "after_update")
+def _booking_updated(mapper, connection, target):
+    history = inspect(target).attrs.status.history
+    if history.deleted and history.added == ["cancelled"]:
+        count_after_commit(object_session(target), BOOKINGS_CANCELLED)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    for counter, amount in session.info.pop(_PENDING_KEY, {}).items():
+        counter.inc(amount)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _endpoint():
+    # Для адресов без маршрута (404) — одна метка, а не путь
+    return request.endpoint or "unmatched"
+
+
+def init_app(app):
+    """
+    Подключает сбор метрик и маршрут /metrics. Вызывается до db.init_app:
+    пул соединений с замером задаётся в параметрах движка.
+    """
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+
+    _store.configure(metrics_directory(app))
+    # Для SQLite в памяти Flask-SQLAlchemy всё равно выберет StaticPool
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {}).setdefault(
+        "poolclass", TimedQueuePool)
+
+    @app.before_request
+    def _start_request():
+        g.metrics_started = time.perf_counter()
+        g.metrics_endpoint = _endpoint()
+        HTTP_IN_PROGRESS.inc(endpoint=g.metrics_endpoint)
+        _statements.set([0])
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+        endpoint = g.metrics_endpoint
+        HTTP_DURATION.observe(time.perf_counter() - started,
+                              endpoint=endpoint, method=request.method)
+        HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method,
+                          status=response.status_code)
+        statements = _statements.get()
+        if statements and statements[0]:
+            DB_STATEMENTS.inc(statements[0], endpoint=endpoint)
+        return response
+
+    @app.teardown_request
+    def _finish_request(exc):
+        endpoint = g.pop("metrics_endpoint", None)
+        if endpoint is not None:
+            HTTP_IN_PROGRESS.dec(endpoint=endpoint)
+        _statements.set(None)
+
+    token = app.config.get("METRICS_TOKEN")
+
+    def metrics_view():
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            abort(403)
+        response = Response(generate_latest(),
+                            mimetype="text/plain; version=0.0.4; charset=utf-8")
+        response.cache_control.no_store = True
+        return response
+
+    app.add_url_rule("/metrics", "metrics", metrics_view)
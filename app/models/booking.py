@@ -1,6 +1,11 @@
+from collections import Counter
 from datetime import datetime
 
+from sqlalchemy import delete, event, insert, inspect, select, update
+from sqlalchemy.orm import contains_eager
+
 from ..extensions import db
+from .room_night import RoomNight
 
 
 class Booking(db.Model):
@@ -14,6 +19,17 @@ class Booking(db.Model):
     """
 
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Проверка занятости номера (Room.is_available, индекс занятости)
+        db.Index("ix_bookings_room_status_dates",
+                 "room_id", "status", "check_in", "check_out"),
+        # «Мои бронирования»: фильтр по пользователю, сортировка по дате
+        db.Index("ix_bookings_user_created", "user_id", "created_at"),
+        # Список бронирований в админке: фильтр по статусу, сортировка по дате
+        db.Index("ix_bookings_status_created", "status", "created_at"),
+        # ETag страниц с поиском по датам: max(updated_at) по индексу
+        db.Index("ix_bookings_updated_at", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -23,7 +39,7 @@ class Booking(db.Model):
     guests = db.Column(db.Integer, nullable=False, default=1)
     total_price = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(20), default="pending")
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
@@ -32,6 +48,130 @@ class Booking(db.Model):
     user = db.relationship("User", backref="bookings", lazy=True)
     room = db.relationship("Room", backref="bookings", lazy=True)
 
+    @classmethod
+    def with_room_and_hotel(cls):
+        """
+        Запрос бронирований вместе с номером и отелем.
+
+        Номер и отель подтягиваются тем же JOIN (contains_eager), поэтому
+        booking.room.hotel в шаблоне не порождает отдельных SELECT на
+        каждую строку. К запросу можно добавлять фильтры по Room и Hotel.
+        """
+        from .room import Room
+
+        return (
+            cls.query.join(cls.room)
+            .join(Room.hotel)
+            .options(contains_eager(cls.room).contains_eager(Room.hotel))
+        )
+
+    @classmethod
+    def with_details(cls):
+        """То же, что with_room_and_hotel, плюс пользователь (для админки)."""
+        return cls.with_room_and_hotel().join(cls.user).options(
+            contains_eager(cls.user))
+
+    @classmethod
+    def bulk_set_status(cls, new_status, from_statuses, *criteria):
+        """
+        Меняет статус всех броней, подходящих под criteria, без загрузки
+        объектов: по одному UPDATE ... WHERE status = <исходный> на каждый
+        статус из from_statuses. Условие на исходный статус защищает от
+        гонок: бронь, которую уже изменили параллельно, не затрагивается.
+
+        Массовый UPDATE не вызывает события модели, поэтому производные
+        данные обновляются здесь же, в той же транзакции: журнал ночей,
+        счётчики статистики, индекс занятости и кеш страниц (последние
+        два — после commit). Возвращает Counter {исходный статус: число}.
+
+        criteria должны ссылаться только на столбцы bookings (фильтры по
+        отелю — через подзапрос). Отменённые брони массово не
+        восстанавливаются: для них пришлось бы заново занимать ночи.
+        """
+        if "cancelled" in from_statuses and new_status != "cancelled":
+            raise ValueError("Отменённые бронирования нельзя восстановить массово")
+
+        from app import stats
+        from app.metrics import BOOKINGS_CANCELLED, count_after_commit
+        from app.occupancy import track_changes
+        from app.page_cache import invalidate_after_commit
+
+        session = db.session
+        table = cls.__table__
+        affected = Counter()
+        changes = {}
+        for old_status in from_statuses:
+            if old_status == new_status:
+                continue
+            rows = session.execute(
+                update(table)
+                .where(table.c.status == old_status, *criteria)
+                .values(status=new_status, updated_at=datetime.utcnow())
+                .returning(table.c.id, table.c.room_id,
+                           table.c.check_in, table.c.check_out)
+            ).all()
+            affected[old_status] = len(rows)
+            for booking_id, room_id, check_in, check_out in rows:
+                changes[booking_id] = (room_id, check_in, check_out, new_status)
+
+        if not changes:
+            return affected
+
+        connection = session.connection()
+        if new_status == "cancelled":
+            connection.execute(delete(RoomNight).where(RoomNight.booking_id.in_(
+                select(table.c.id).where(table.c.status == "cancelled", *criteria))))
+
+        deltas = Counter({f"bookings_status:{new_status}": sum(affected.values())})
+        for old_status, count in affected.items():
+            deltas[f"bookings_status:{old_status}"] -= count
+        stats.adjust(connection, deltas)
+
+        track_changes(session, changes)
+        invalidate_after_commit(session, "bookings")
+        if new_status == "cancelled":
+            count_after_commit(session, BOOKINGS_CANCELLED, len(changes))
+        return affected
+
     def __repr__(self) -> str:
         return f"<Booking {self.id} - Room {self.room_id}>"
 
+
+# Журнал занятых ночей (room_nights) ведётся в той же транзакции,
+# что и сама бронь: вставка строк с уже занятой ночью нарушит
+# первичный ключ, и весь commit откатится с IntegrityError.
+
+def _reserve_nights(connection, booking):
+    if booking.status != "cancelled":
+        connection.execute(
+            insert(RoomNight),
+            RoomNight.rows_for(
+                booking.id, booking.room_id, booking.check_in, booking.check_out),
+        )
+
+
+def _release_nights(connection, booking):
+    connection.execute(
+        delete(RoomNight).where(RoomNight.booking_id == booking.id))
+
+
+@event.listens_for(Booking, "after_insert")
+def _booking_inserted(mapper, connection, target):
+    _reserve_nights(connection, target)
+
+
+@event.listens_for(Booking, "after_update")
+def _booking_updated(mapper, connection, target):
+    state = inspect(target)
+    changed = any(
+        state.attrs[name].history.has_changes()
+        for name in ("status", "room_id", "check_in", "check_out")
+    )
+    if changed:
+        _release_nights(connection, target)
+        _reserve_nights(connection, target)
+
+
+@event.listens_for(Booking, "before_delete")
+def _booking_deleted(mapper, connection, target):
+    _release_nights(connection, target)
@@ -1,19 +1,33 @@
 from ..extensions import db
 from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import func
+
+
+class HotelSummary(NamedTuple):
+    """Сводка по номерам отеля для карточек каталога и главной."""
+    room_count: int = 0
+    min_price: int | None = None
+    max_price: int | None = None
+    max_capacity: int | None = None
 
 
 class Hotel(db.Model):
     __tablename__ = 'hotels'
 
     id = db.Column(db.Integer, primary_key=True)
-    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'),
+                         nullable=False, index=True)
     name = db.Column(db.String(150), nullable=False)
     description = db.Column(db.Text)
     address = db.Column(db.String(300), nullable=False)
-    city = db.Column(db.String(100), nullable=False)
+    city = db.Column(db.String(100), nullable=False, index=True)
     phone = db.Column(db.String(20))
     email = db.Column(db.String(150))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Идентификатор во внешней системе партнёра (ключ для flask import)
+    external_id = db.Column(db.String(64), unique=True, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -22,5 +36,38 @@ class Hotel(db.Model):
     rooms = db.relationship('Room', backref='hotel',
                             lazy=True, cascade='all, delete-orphan')
 
+    # Заполняется attach_summaries(); не является колонкой
+    summary = HotelSummary()
+
+    @classmethod
+    def attach_summaries(cls, hotels):
+        """
+        Проставляет hotel.summary для списка отелей одним GROUP BY по rooms.
+
+        Так карточкам не нужно загружать все объекты Room
+        (hotel.rooms) ради количества номеров и минимальной цены.
+        """
+        from .room import Room
+
+        hotels = list(hotels)
+        if not hotels:
+            return hotels
+
+        rows = (
+            db.session.query(
+                Room.hotel_id,
+                func.count(Room.id),
+                func.min(Room.price_per_night),
+                func.max(Room.price_per_night),
+                func.max(Room.capacity),
+            )
+            .filter(Room.hotel_id.in_([hotel.id for hotel in hotels]))
+            .group_by(Room.hotel_id)
+        )
+        summaries = {hotel_id: HotelSummary(*values) for hotel_id, *values in rows}
+        for hotel in hotels:
+            hotel.summary = summaries.get(hotel.id, HotelSummary())
+        return hotels
+
     def __repr__(self):
         return f'<Hotel {self.name}>'
@@ -1,6 +1,9 @@
 from datetime import datetime
 
+from sqlalchemy import and_, select
+
 from ..extensions import db
+from .room_night import RoomNight
 
 
 class Room(db.Model):
@@ -17,13 +20,17 @@ class Room(db.Model):
     __tablename__ = "rooms"
 
     id = db.Column(db.Integer, primary_key=True)
-    hotel_id = db.Column(db.Integer, db.ForeignKey("hotels.id"), nullable=False)
+    hotel_id = db.Column(
+        db.Integer, db.ForeignKey("hotels.id"), nullable=False, index=True
+    )
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     price_per_night = db.Column(db.Integer, nullable=False)
     capacity = db.Column(db.Integer, nullable=False, default=1)
     amenities = db.Column(db.String(300))
     image_url = db.Column(db.String(500))
+    # Идентификатор во внешней системе партнёра (ключ для flask import)
+    external_id = db.Column(db.String(64), unique=True, index=True)
     # Если понадобится «ручное» выключение номера из продажи,
     # лучше добавить поле вроде is_active / is_published, а не дублировать логику доступности по датам.
 
@@ -40,16 +47,62 @@ class Room(db.Model):
         - ищем хотя бы одно бронирование, которое пересекается по датам
           с заданным интервалом;
         - игнорируем отменённые бронирования (status != 'cancelled').
+
+        Если включён индекс занятости (app.occupancy), ответ берётся
+        из памяти; иначе — поиск по первичному ключу журнала room_nights.
         """
-        from .booking import Booking
+        from ..occupancy import occupancy_index
+
+        if occupancy_index.enabled:
+            return occupancy_index.is_available(self.id, check_in, check_out)
 
-        conflicting_booking = Booking.query.filter(
-            Booking.room_id == self.id,
-            Booking.status != "cancelled",
-            Booking.check_in < check_out,
-            Booking.check_out > check_in,
+        occupied_night = RoomNight.query.filter(
+            RoomNight.room_id == self.id,
+            RoomNight.night >= check_in,
+            RoomNight.night < check_out,
         ).first()
-        return conflicting_booking is None
+        return occupied_night is None
+
+    @classmethod
+    def rooms_available(cls, room_ids, check_in, check_out):
+        """
+        Пакетная проверка: возвращает множество id свободных номеров
+        из room_ids. Без индекса занятости — один запрос на все номера.
+        """
+        from ..occupancy import occupancy_index
+
+        room_ids = set(room_ids)
+        if occupancy_index.enabled:
+            return occupancy_index.rooms_available(room_ids, check_in, check_out)
+
+        busy = db.session.query(RoomNight.room_id).filter(
+            RoomNight.room_id.in_(room_ids),
+            RoomNight.night >= check_in,
+            RoomNight.night < check_out,
+        ).distinct()
+        return room_ids - {room_id for (room_id,) in busy}
+
+    @classmethod
+    def availability_filter(cls, check_in, check_out, guests=None):
+        """
+        SQL-условие «номер свободен на даты и вмещает гостей».
+
+        В отличие от is_available, не выполняет запрос сам по себе,
+        а возвращает выражение NOT EXISTS по room_nights (диапазон по
+        первичному ключу), которое можно встроить в любой запрос по Room
+        (или в Hotel.rooms.any(...)). Так поиск по каталогу выполняется
+        одним запросом, а не по запросу на каждый номер.
+        """
+        criteria = [
+            ~select(RoomNight.room_id).where(
+                RoomNight.room_id == cls.id,
+                RoomNight.night >= check_in,
+                RoomNight.night < check_out,
+            ).exists()
+        ]
+        if guests:
+            criteria.append(cls.capacity >= guests)
+        return and_(*criteria)
 
     def __repr__(self) -> str:
         return f"<Room {self.name}>"
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from ..extensions import db
+
+
+class RoomNight(db.Model):
+    """
+    Ночь, занятая бронированием (журнал занятости номеров).
+
+    На каждую ночь активного бронирования хранится одна строка.
+    Первичный ключ (room_id, night) уникален, поэтому двойное
+    бронирование одной ночи отклоняет сама база данных — даже если
+    два воркера одновременно прошли проверку Room.is_available.
+
+    Строки создаются и удаляются событиями модели Booking
+    (см. models/booking.py) в той же транзакции, что и бронь.
+    """
+
+    __tablename__ = "room_nights"
+
+    room_id = db.Column(db.Integer, db.ForeignKey("rooms.id"), primary_key=True)
+    night = db.Column(db.Date, primary_key=True)
+    booking_id = db.Column(
+        db.Integer, db.ForeignKey("bookings.id"), nullable=False, index=True
+    )
+
+    @staticmethod
+    def nights(check_in, check_out):
+        """Список ночей проживания: от check_in включительно до check_out."""
+        return [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+
+    @classmethod
+    def rows_for(cls, booking_id, room_id, check_in, check_out):
+        return [
+            {"room_id": room_id, "night": night, "booking_id": booking_id}
+            for night in cls.nights(check_in, check_out)
+        ]
+
+    def __repr__(self) -> str:
+        return f"<RoomNight room={self.room_id} {self.night}>"
@@ -0,0 +1,32 @@
+from ..extensions import db
+
+
+class StatsCounter(db.Model):
+    """
+    Счётчик для статистики админки.
+
+    Значения поддерживаются событиями моделей (см. app/stats.py) в той же
+    транзакции, что и изменение данных, поэтому панель администратора
+    читает готовые числа вместо COUNT(*) по таблицам.
+
+    Имена счётчиков: "users", "users_role:<роль>", "users_created:<дата>",
+    "hotels", "bookings", "bookings_status:<статус>", "bookings_created:<дата>";
+    "bookings_version" — метка изменений бронирований для индекса занятости
+    (app/occupancy.py), "catalog_version" — отелей и номеров (ETag каталога).
+    """
+
+    __tablename__ = "stats_counters"
+
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def values(cls, names):
+        """Значения указанных счётчиков одним запросом (отсутствующие — 0)."""
+        result = dict.fromkeys(names, 0)
+        result.update(
+            db.session.query(cls.name, cls.value).filter(cls.name.in_(names)))
+        return result
+
+    def __repr__(self) -> str:
+        return f"<StatsCounter {self.name}={self.value}>"
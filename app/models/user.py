@@ -1,10 +1,19 @@
+import re
+
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import func
+from sqlalchemy.orm import validates
 from ..extensions import db
+from ..passwords import hash_password, needs_rehash, verify_password
 from enum import Enum
 from datetime import datetime
 
 
+def phone_digits(phone):
+    """Телефон без форматирования: только цифры (для поиска по индексу)."""
+    return re.sub(r'\D', '', phone or '')
+
+
 class UserRole(Enum):
     USER = 'user'
     HOTEL_OWNER = 'hotel_owner'
@@ -17,6 +26,8 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(150), unique=True, nullable=False)
     phone = db.Column(db.String(20), unique=True, nullable=False)
+    # Заполняется автоматически из phone, см. _sync_phone_digits
+    phone_digits = db.Column(db.String(20), index=True)
     password_hash = db.Column(db.String(256), nullable=False)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
@@ -28,16 +39,30 @@ class User(UserMixin, db.Model):
         nullable=False
     )
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
+    @validates('phone')
+    def _sync_phone_digits(self, key, value):
+        self.phone_digits = phone_digits(value)
+        return value
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """
+        Проверяет пароль. Если хеш создан с устаревшими параметрами
+        (PASSWORD_HASH_METHOD изменился), пароль перехешируется —
+        изменение сохранится при ближайшем commit.
+        """
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
 
     @property
     def is_admin(self):
@@ -53,3 +78,7 @@ class User(UserMixin, db.Model):
 
     def __repr__(self):
         return f'<User {self.email}>'
+
+
+# Поиск по email без учёта регистра в админке — через индекс по выражению
+db.Index('ix_users_email_lower', func.lower(User.email))
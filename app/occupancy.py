@@ -0,0 +1,253 @@
+"""
+Индекс занятости номеров в памяти процесса.
+
+Для каждого номера хранятся отсортированные интервалы активных
+(не отменённых) бронирований. Проверка «свободен ли номер на даты»
+выполняется бинарным поиском, без запроса к таблице bookings.
+
+Как поддерживается актуальность:
+- данные номера загружаются лениво, при первом обращении к нему;
+- изменения бронирований собираются из событий after_insert /
+  after_update / after_delete модели Booking и применяются к индексу
+  только после успешного commit (при rollback — отбрасываются);
+- любое изменение бронирований увеличивает в той же транзакции общую
+  метку версии (строка "bookings_version" в stats_counters). Перед
+  каждой проверкой метка читается одним запросом по первичному ключу;
+  если она сдвинулась не из-за коммитов этого процесса, значит брони
+  менял другой воркер gunicorn, и индекс сбрасывается — номера
+  перечитываются из БД при обращении;
+- дополнительно данные номера перечитываются через OCCUPANCY_INDEX_TTL
+  секунд (страховка от правок в обход приложения).
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, object_session
+
+from .extensions import db
+from .models.booking import Booking
+from .models.stats_counter import StatsCounter
+
+_CHANGES_KEY = "occupancy_changes"
+_FLUSHED_KEY = "occupancy_flushed"
+_VERSION_KEY = "occupancy_version"
+
+VERSION_COUNTER = "bookings_version"
+
+
+class _RoomIntervals:
+    """Отсортированные по дате заезда интервалы бронирований одного номера."""
+
+    __slots__ = ("starts", "ends", "booking_ids", "max_ends", "loaded_at")
+
+    def __init__(self, loaded_at):
+        self.starts = []
+        self.ends = []
+        self.booking_ids = []
+        # max_ends[i] — максимальная дата выезда среди интервалов 0..i.
+        # Позволяет отвечать на запрос пересечения за O(log n),
+        # даже если интервалы пересекаются между собой.
+        self.max_ends = []
+        self.loaded_at = loaded_at
+
+    def add(self, booking_id, check_in, check_out):
+        pos = bisect_left(self.starts, check_in)
+        self.starts.insert(pos, check_in)
+        self.ends.insert(pos, check_out)
+        self.booking_ids.insert(pos, booking_id)
+        self._rebuild_max_ends(pos)
+
+    def remove(self, booking_id):
+        try:
+            pos = self.booking_ids.index(booking_id)
+        except ValueError:
+            return
+        del self.starts[pos]
+        del self.ends[pos]
+        del self.booking_ids[pos]
+        self._rebuild_max_ends(pos)
+
+    def _rebuild_max_ends(self, pos):
+        del self.max_ends[pos:]
+        current = self.max_ends[-1] if self.max_ends else None
+        for end in self.ends[pos:]:
+            current = end if current is None or end > current else current
+            self.max_ends.append(current)
+
+    def is_free(self, check_in, check_out):
+        # Интервалы [0, pos) начинаются раньше check_out; среди них
+        # достаточно проверить самый поздний выезд.
+        pos = bisect_left(self.starts, check_out)
+        return pos == 0 or self.max_ends[pos - 1] <= check_in
+
+
+class OccupancyIndex:
+    """Индекс занятости номеров (один экземпляр на процесс)."""
+
+    def __init__(self):
+        self.enabled = True
+        self.ttl = 30.0
+        self._rooms = {}
+        self._booking_room = {}
+        self._version = None  # метка bookings_version, которой соответствует индекс
+        self._lock = threading.RLock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get("OCCUPANCY_INDEX_ENABLED", True)
+        self.ttl = app.config.get("OCCUPANCY_INDEX_TTL", 30.0)
+        self.clear()
+        app.extensions["occupancy_index"] = self
+
+    def clear(self):
+        """Полностью сбрасывает индекс; данные перечитаются при обращении."""
+        with self._lock:
+            self._rooms.clear()
+            self._booking_room.clear()
+            self._version = None
+
+    def invalidate(self, room_ids):
+        """Сбрасывает данные указанных номеров (например, после массового UPDATE)."""
+        with self._lock:
+            for room_id in room_ids:
+                entry = self._rooms.pop(room_id, None)
+                if entry is not None:
+                    for booking_id in entry.booking_ids:
+                        self._booking_room.pop(booking_id, None)
+
+    def is_available(self, room_id, check_in, check_out):
+        return room_id in self.rooms_available([room_id], check_in, check_out)
+
+    def rooms_available(self, room_ids, check_in, check_out):
+        """Возвращает множество id номеров, свободных на указанные даты."""
+        room_ids = set(room_ids)
+        version = StatsCounter.values([VERSION_COUNTER])[VERSION_COUNTER]
+        with self._lock:
+            if version != self._version:
+                # Брони менял другой процесс: индекс больше не доверяем
+                self._rooms.clear()
+                self._booking_room.clear()
+                self._version = version
+            self._ensure_loaded(room_ids)
+            return {
+                room_id for room_id in room_ids
+                if self._rooms[room_id].is_free(check_in, check_out)
+            }
+
+    def _ensure_loaded(self, room_ids):
+        now = time.monotonic()
+        stale = [
+            room_id for room_id in room_ids
+            if room_id not in self._rooms
+            or now - self._rooms[room_id].loaded_at > self.ttl
+        ]
+        if not stale:
+            return
+
+        # Один запрос на все недостающие номера
+        self.invalidate(stale)
+        for room_id in stale:
+            self._rooms[room_id] = _RoomIntervals(now)
+
+        rows = (
+            db.session.query(
+                Booking.id, Booking.room_id, Booking.check_in, Booking.check_out)
+            .filter(Booking.room_id.in_(stale), Booking.status != "cancelled")
+            .order_by(Booking.room_id, Booking.check_in)
+            .all()
+        )
+        for booking_id, room_id, check_in, check_out in rows:
+            self._rooms[room_id].add(booking_id, check_in, check_out)
+            self._booking_room[booking_id] = room_id
+
+    def apply(self, changes, versions=None):
+        """
+        Применяет зафиксированные изменения бронирований.
+
+        changes: {booking_id: (room_id, check_in, check_out, status) или None},
+        где None означает, что бронирование удалено. versions — метка
+        bookings_version до и после транзакции: если индекс соответствовал
+        метке «до», после применения он соответствует метке «после».
+        """
+        with self._lock:
+            if versions is not None and self._version == versions[0]:
+                self._version = versions[1]
+            for booking_id, change in changes.items():
+                old_room_id = self._booking_room.pop(booking_id, None)
+                if old_room_id in self._rooms:
+                    self._rooms[old_room_id].remove(booking_id)
+
+                if change is None:
+                    continue
+                room_id, check_in, check_out, status = change
+                # Номера, которые ещё не загружены, подтянут бронь из БД сами
+                if status != "cancelled" and room_id in self._rooms:
+                    self._rooms[room_id].add(booking_id, check_in, check_out)
+                    self._booking_room[booking_id] = room_id
+
+
+occupancy_index = OccupancyIndex()
+
+
+def _bump_version(session):
+    """Увеличивает bookings_version в текущей транзакции."""
+    table = StatsCounter.__table__
+    stmt = insert(table).values(name=VERSION_COUNTER, value=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"], set_={"value": table.c.value + 1},
+    ).returning(table.c.value)
+    value = session.connection().execute(stmt).scalar_one()
+    before = session.info.get(_VERSION_KEY, (value - 1, None))[0]
+    session.info[_VERSION_KEY] = (before, value)
+
+
+def _remember(session, changes):
+    session.info.setdefault(_CHANGES_KEY, {}).update(changes)
+    session.info[_FLUSHED_KEY] = True
+
+
+def track_changes(session, changes):
+    """
+    Запоминает изменения бронирований до commit (формат как в apply)
+    и сдвигает метку версии. Нужна для массовых UPDATE, которые не
+    вызывают события модели.
+    """
+    session.info.setdefault(_CHANGES_KEY, {}).update(changes)
+    _bump_version(session)
+
+
+@event.listens_for(Booking, "after_insert")
+@event.listens_for(Booking, "after_update")
+def _track_booking(mapper, connection, target):
+    _remember(object_session(target), {target.id: (
+        target.room_id, target.check_in, target.check_out, target.status)})
+
+
+@event.listens_for(Booking, "after_delete")
+def _track_booking_delete(mapper, connection, target):
+    _remember(object_session(target), {target.id: None})
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_after_flush(session, flush_context):
+    # Одна метка на flush, сколько бы броней в нём ни изменилось
+    if session.info.pop(_FLUSHED_KEY, False):
+        _bump_version(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_booking_changes(session):
+    changes = session.info.pop(_CHANGES_KEY, None)
+    versions = session.info.pop(_VERSION_KEY, None)
+    if changes:
+        occupancy_index.apply(changes, versions)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_booking_changes(session, previous_transaction):
+    session.info.pop(_CHANGES_KEY, None)
+    session.info.pop(_FLUSHED_KEY, None)
+    session.info.pop(_VERSION_KEY, None)
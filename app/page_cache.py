@@ -0,0 +1,417 @@
+"""
+Кеш готовых ответов для публичных страниц.
+
+Кешируются только GET-запросы анонимных пользователей без flash-сообщений.
+Ключ — путь и query string. У каждой записи есть теги данных, от которых
+она зависит («hotels», «hotel:<id>», «bookings»). После commit, изменившего
+Hotel, Room или Booking, соответствующие теги инвалидируются — записи
+удаляются, а версии тегов увеличиваются. Если данные изменились, пока
+страница рендерилась, устаревший результат не сохраняется.
+
+Хранилища (RESPONSE_CACHE_BACKEND):
+- "memory" — LRU в памяти процесса; инвалидация видна только этому процессу;
+- "sqlite" — файл в instance/, общий для всех воркеров gunicorn.
+
+При одновременных промахах по одной странице её перегенерирует только
+один запрос (аренда ключа), остальные ждут готовую запись.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import make_response, request, session
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from .models.booking import Booking
+from .models.hotel import Hotel
+from .models.room import Room
+
+_TAGS_KEY = "page_cache_tags"
+
+
+class MemoryBackend:
+    """Ограниченный по размеру LRU-кеш в памяти процесса."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tag_keys = {}
+        self._versions = {}
+        self._leases = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value, _ = entry
+            if expires < time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def versions(self, tags):
+        with self._lock:
+            return {tag: self._versions.get(tag, 0) for tag in tags}
+
+    def set(self, key, value, tags, ttl, seen_versions):
+        with self._lock:
+            if any(self._versions.get(tag, 0) != version
+                   for tag, version in seen_versions.items()):
+                return False
+            self._drop(key)
+            self._entries[key] = (time.time() + ttl, value, tags)
+            for tag in tags:
+                self._tag_keys.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            return True
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+                for key in self._tag_keys.pop(tag, ()):
+                    self._drop(key)
+
+    def acquire(self, key, ttl):
+        now = time.time()
+        with self._lock:
+            if self._leases.get(key, 0) > now:
+                return False
+            self._leases[key] = now + ttl
+            return True
+
+    def release(self, key):
+        with self._lock:
+            self._leases.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tag_keys.clear()
+            self._leases.clear()
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            for tag in entry[2]:
+                keys = self._tag_keys.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+
+
+class SQLiteBackend:
+    """Кеш в отдельном SQLite-файле, общий для всех процессов на сервере."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL);
+        CREATE INDEX IF NOT EXISTS ix_entries_expires ON entries (expires);
+        CREATE TABLE IF NOT EXISTS entry_tags (
+            tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key));
+        CREATE TABLE IF NOT EXISTS tag_versions (
+            tag TEXT PRIMARY KEY, version INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS leases (
+            key TEXT PRIMARY KEY, expires REAL NOT NULL);
+    """
+
+    def __init__(self, path, max_entries=5000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    def _conn(self):
+        # Соединение на поток и на процесс: после fork открывается новое
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self._SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires >= ?",
+            (key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def versions(self, tags):
+        result = dict.fromkeys(tags, 0)
+        if tags:
+            placeholders = ", ".join("?" * len(tags))
+            result.update(self._conn().execute(
+                f"SELECT tag, version FROM tag_versions WHERE tag IN ({placeholders})",
+                list(tags),
+            ))
+        return result
+
+    def set(self, key, value, tags, ttl, seen_versions):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.versions(list(seen_versions)) != seen_versions:
+                conn.execute("ROLLBACK")
+                return False
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl),
+            )
+            conn.execute("DELETE FROM entry_tags WHERE key = ?", (key,))
+            conn.executemany(
+                "INSERT INTO entry_tags (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in tags],
+            )
+            self._trim(conn, now)
+            conn.execute("COMMIT")
+            return True
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _trim(self, conn, now):
+        conn.execute("DELETE FROM entries WHERE expires < ?", (now,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY expires LIMIT ?)",
+                (count - self.max_entries,),
+            )
+        conn.execute(
+            "DELETE FROM entry_tags WHERE key NOT IN (SELECT key FROM entries)")
+
+    def invalidate(self, tags):
+        tags = list(tags)
+        placeholders = ", ".join("?" * len(tags))
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO tag_versions (tag, version) VALUES (?, 1) "
+                "ON CONFLICT (tag) DO UPDATE SET version = version + 1",
+                [(tag,) for tag in tags],
+            )
+            conn.execute(
+                f"DELETE FROM entries WHERE key IN "
+                f"(SELECT key FROM entry_tags WHERE tag IN ({placeholders}))",
+                tags,
+            )
+            conn.execute(
+                f"DELETE FROM entry_tags WHERE tag IN ({placeholders})", tags)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def acquire(self, key, ttl):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("DELETE FROM leases WHERE key = ? AND expires < ?", (key, now))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO leases (key, expires) VALUES (?, ?)",
+            (key, now + ttl),
+        )
+        return cursor.rowcount == 1
+
+    def release(self, key):
+        self._conn().execute("DELETE FROM leases WHERE key = ?", (key,))
+
+    def clear(self):
+        self._conn().executescript(
+            "DELETE FROM entries; DELETE FROM entry_tags; DELETE FROM leases;")
+
+
+class PageCache:
+    """Кеш ответов публичных страниц (один экземпляр на процесс)."""
+
+    def __init__(self):
+        self.backend = None
+        self.enabled = False
+        self.ttl = 300
+        self.lease_ttl = 10
+        self.wait_timeout = 5
+
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config.get("RESPONSE_CACHE_ENABLED", True)
+        self.ttl = config.get("RESPONSE_CACHE_TTL", 300)
+        self.lease_ttl = config.get("RESPONSE_CACHE_LEASE_TTL", 10)
+        self.wait_timeout = config.get("RESPONSE_CACHE_WAIT_TIMEOUT", 5)
+
+        backend = config.get("RESPONSE_CACHE_BACKEND", "sqlite")
+        if backend == "memory":
+            self.backend = MemoryBackend(config.get("RESPONSE_CACHE_MAX_ENTRIES", 512))
+        elif backend == "sqlite":
+            path = config.get("RESPONSE_CACHE_PATH") or os.path.join(
+                app.instance_path, "response_cache.db")
+            self.backend = SQLiteBackend(
+                path, config.get("RESPONSE_CACHE_MAX_ENTRIES", 5000))
+        else:
+            raise ValueError(f"Неизвестный RESPONSE_CACHE_BACKEND: {backend}")
+
+        app.extensions["page_cache"] = self
+
+    def invalidate(self, tags):
+        if self.backend is not None and tags:
+            self.backend.invalidate(sorted(tags))
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def _wait_for(self, key):
+        """Ждёт, пока другой запрос сохранит страницу; None — не дождались."""
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = self.backend.get(key)
+            if value is not None:
+                return value
+        return None
+
+    def respond(self, key, tags, render):
+        """Отдаёт страницу из кеша или рендерит её через render() и сохраняет."""
+        value = self.backend.get(key)
+        if value is not None:
+            return _to_response(value, "HIT")
+
+        leased = self.backend.acquire(key, self.lease_ttl)
+        if not leased:
+            value = self._wait_for(key)
+            if value is not None:
+                return _to_response(value, "HIT")
+
+        try:
+            versions = self.backend.versions(tags)
+            response = make_response(render())
+            if _storable(response):
+                self.backend.set(key, _to_value(response), tags, self.ttl, versions)
+            response.headers["X-Cache"] = "MISS"
+            return response
+        finally:
+            if leased:
+                self.backend.release(key)
+
+
+page_cache = PageCache()
+
+
+def _to_value(response):
+    return {
+        "status": response.status_code,
+        "headers": [
+            [name, value] for name, value in response.headers.items()
+            if name.lower() not in ("content-length", "set-cookie")
+        ],
+        "body": response.get_data(as_text=True),
+    }
+
+
+def _to_response(value, state):
+    response = make_response(value["body"], value["status"], value["headers"])
+    response.headers["X-Cache"] = state
+    return response
+
+
+def _storable(response):
+    return (
+        response.status_code == 200
+        and response.mimetype == "text/html"
+        and "Set-Cookie" not in response.headers
+        # Страница с новым flash-сообщением или иным изменением сессии
+        and not session.modified
+    )
+
+
+def _cacheable_request():
+    return (
+        request.method in ("GET", "HEAD")
+        and not current_user.is_authenticated
+        and "_flashes" not in session
+    )
+
+
+def cache_page(*tags):
+    """
+    Декоратор маршрута: кеширует ответ для анонимных пользователей.
+
+    tags — теги данных страницы; могут содержать параметры маршрута
+    ("hotel:{hotel_id}"). Страницы с поиском по датам дополнительно
+    зависят от бронирований (тег «bookings»).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if not page_cache.enabled or not _cacheable_request():
+                return view(*args, **kwargs)
+
+            page_tags = {tag.format(**kwargs) for tag in tags}
+            if "check_in" in request.args or "check_out" in request.args:
+                page_tags.add("bookings")
+
+            key = request.full_path
+            return page_cache.respond(
+                key, sorted(page_tags), lambda: view(*args, **kwargs))
+        return wrapped
+    return decorator
+
+
+# Инвалидация: теги собираются событиями моделей и применяются после commit
+
+def invalidate_after_commit(session, *tags):
+    """Инвалидирует теги после commit сессии (для массовых UPDATE)."""
+    session.info.setdefault(_TAGS_KEY, set()).update(tags)
+
+
+def _collect(target, *tags):
+    invalidate_after_commit(object_session(target), *tags)
+
+
+@event.listens_for(Hotel, "after_insert")
+@event.listens_for(Hotel, "after_update")
+@event.listens_for(Hotel, "after_delete")
+def _hotel_changed(mapper, connection, target):
+    _collect(target, "hotels", f"hotel:{target.id}")
+
+
+@event.listens_for(Room, "after_insert")
+@event.listens_for(Room, "after_update")
+@event.listens_for(Room, "after_delete")
+def _room_changed(mapper, connection, target):
+    # Номер, перенесённый в другой отель, меняет страницы обоих отелей
+    hotel_ids = {target.hotel_id, *inspect(target).attrs.hotel_id.history.deleted}
+    _collect(target, "hotels", *(f"hotel:{hotel_id}" for hotel_id in hotel_ids))
+
+
+@event.listens_for(Booking, "after_insert")
+@event.listens_for(Booking, "after_update")
+@event.listens_for(Booking, "after_delete")
+def _booking_changed(mapper, connection, target):
+    _collect(target, "bookings")
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    tags = session.info.pop(_TAGS_KEY, None)
+    if tags:
+        page_cache.invalidate(tags)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_tags(session, previous_transaction):
+    session.info.pop(_TAGS_KEY, None)
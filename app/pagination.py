@@ -0,0 +1,152 @@
+"""
+Курсорная (keyset) пагинация для списков админки.
+
+Вместо OFFSET страница определяется ключом (created_at, id) последней
+или первой строки предыдущей страницы: выборка начинается поиском по
+индексу, поэтому глубокие страницы не медленнее первой. Ключ передаётся
+в URL непрозрачным токеном (cursor). Поэтому created_at у моделей со
+списками в админке обязателен (NOT NULL, миграция 0008): строка с NULL
+не попала бы ни на одну страницу.
+
+Общее число строк не считается на каждой странице: оно кешируется
+в памяти процесса на ADMIN_LIST_TOTAL_TTL секунд.
+"""
+
+import base64
+import binascii
+import json
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import tuple_
+
+
+class KeysetPage:
+    """Страница результатов: элементы и курсоры соседних страниц."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def encode_cursor(row, direction):
+    payload = json.dumps(
+        [direction, row.created_at.isoformat(), row.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Возвращает (направление, created_at, id) или None для неверного токена."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ("next", "prev"):
+            return None
+        return direction, datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError, binascii.Error):
+        return None
+
+
+def keyset_paginate(query, model, per_page, cursor=None, total=None):
+    """
+    Страница query, упорядоченного по (created_at, id) от новых к старым.
+
+    Сортировка задаётся здесь: порядок, уже заданный в query, сбрасывается.
+    """
+    key = tuple_(model.created_at, model.id)
+    query = query.order_by(None)
+    decoded = decode_cursor(cursor)
+
+    if decoded and decoded[0] == "prev":
+        _, created_at, row_id = decoded
+        rows = (
+            query.filter(key > (created_at, row_id))
+            .order_by(model.created_at.asc(), model.id.asc())
+            .limit(per_page + 1)
+            .all()
+        )
+        has_prev = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        if decoded:
+            _, created_at, row_id = decoded
+            query = query.filter(key < (created_at, row_id))
+        rows = (
+            query.order_by(model.created_at.desc(), model.id.desc())
+            .limit(per_page + 1)
+            .all()
+        )
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_prev = decoded is not None
+
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1], "next") if rows and has_next else None,
+        prev_cursor=encode_cursor(rows[0], "prev") if rows and has_prev else None,
+        total=total,
+    )
+
+
+class _TotalsCache:
+    """Небольшой кеш результатов COUNT(*) с ограниченным временем жизни."""
+
+    max_entries = 256
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_or_count(self, key, query, ttl):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        value = query.order_by(None).count()
+
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {
+                    k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (now + ttl, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+totals_cache = _TotalsCache()
+
+
+def estimated_total(key, query):
+    """
+    Приблизительное число строк для подписи «Показано N из M».
+
+    Значение может отставать от реальности на ADMIN_LIST_TOTAL_TTL секунд.
+    Если ADMIN_LIST_TOTALS выключен, возвращает None (итог не показывается).
+    """
+    config = current_app.config
+    if not config.get("ADMIN_LIST_TOTALS", True):
+        return None
+    return totals_cache.get_or_count(
+        key, query, config.get("ADMIN_LIST_TOTAL_TTL", 60))
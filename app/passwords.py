@@ -0,0 +1,120 @@
+"""
+Хеширование паролей.
+
+Алгоритм и его стоимость задаются PASSWORD_HASH_METHOD в формате
+Werkzeug ("scrypt:N:r:p" или "pbkdf2:sha256:итерации"). Хеши, созданные
+с другими параметрами, продолжают проверяться, а при успешном входе
+пароль перехешируется с текущими (User.check_password).
+
+При PASSWORD_HASH_POOL_SIZE > 0 хеширование выполняется в отдельном
+пуле процессов. Число одновременных задач ограничено размером пула
+плюс PASSWORD_HASH_QUEUE_LIMIT: если очередь заполнена, запрос сразу
+получает 503 вместо того, чтобы ждать вместе с остальными.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from flask import current_app, has_app_context
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+)
+
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+
+class HashingBusy(ServiceUnavailable):
+    """Очередь хеширования заполнена: клиенту отдаётся 503."""
+
+    description = "Сервер перегружен. Повторите попытку через несколько секунд."
+
+
+def normalize_method(method):
+    """Полная запись метода: "scrypt" -> "scrypt:32768:8:1" (как в хеше)."""
+    name, *args = method.split(":")
+    if name == "scrypt" and not args:
+        return DEFAULT_METHOD
+    if name == "pbkdf2" and len(args) < 2:
+        hash_name = args[0] if args else "sha256"
+        return f"pbkdf2:{hash_name}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def current_method():
+    return normalize_method(_config("PASSWORD_HASH_METHOD", DEFAULT_METHOD))
+
+
+def needs_rehash(pwhash):
+    """Хеш создан с параметрами, отличными от текущих."""
+    return pwhash.split("$", 1)[0] != current_method()
+
+
+class _HashingPool:
+    """Пул процессов для хеширования (создаётся лениво в каждом воркере)."""
+
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self, size, queue_limit):
+        # После fork пул родителя недоступен: создаём свой
+        if self._executor is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                return
+            self._executor = ProcessPoolExecutor(
+                max_workers=size,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+            self._slots = threading.BoundedSemaphore(size + queue_limit)
+            self._pid = os.getpid()
+
+    def run(self, func, *args):
+        size = _config("PASSWORD_HASH_POOL_SIZE", 0)
+        if size <= 0:
+            return func(*args)
+
+        self._ensure_started(size, _config("PASSWORD_HASH_QUEUE_LIMIT", 8))
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(retry_after=1)
+
+        slots = self._slots
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=_config("PASSWORD_HASH_TIMEOUT", 10))
+        except TimeoutError:
+            raise HashingBusy(retry_after=1) from None
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hashing_pool = _HashingPool()
+
+
+def hash_password(password):
+    return hashing_pool.run(generate_password_hash, password, current_method())
+
+
+def verify_password(pwhash, password):
+    return hashing_pool.run(check_password_hash, pwhash, password)
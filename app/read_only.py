@@ -0,0 +1,119 @@
+"""
+Отдельный пул соединений только для чтения.
+
+GET-запросы к blueprints из READ_ONLY_DB_BLUEPRINTS (каталог, карточка
+отеля, списки админки) читают базу через второй движок, открытый с
+mode=ro и PRAGMA query_only: в режиме WAL такие соединения не ждут
+коммитов бронирований и не занимают соединения основного пула.
+
+Маршрутизация сделана в Session.get_bind, поэтому обработчики ничего
+не знают о двух движках. На основной движок всегда уходят:
+- flush (добавление/изменение объектов ORM);
+- INSERT/UPDATE/DELETE, в том числе текстовые запросы;
+- все запросы сессии после первой записи, чтобы запрос видел свои же
+  изменения;
+- POST и прочие изменяющие запросы, CLI-команды и фоновые задачи.
+
+READ_ONLY_DB_URI позволяет читать из другого файла — например, снимка
+базы, который обновляется отдельно. По умолчанию это тот же файл, что
+и SQLALCHEMY_DATABASE_URI. Для базы в памяти движок не создаётся.
+"""
+
+import os
+import re
+from contextvars import ContextVar
+
+from flask import current_app, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.elements import TextClause
+
+EXTENSION_KEY = "read_only_engine"
+
+_read_only = ContextVar("db_read_only", default=False)
+
+_READ_STATEMENT = re.compile(r"^\s*(SELECT|WITH|EXPLAIN)\b", re.I)
+
+
+def _is_write(clause):
+    if clause is None:
+        return False
+    if getattr(clause, "is_dml", False):
+        return True
+    if isinstance(clause, TextClause):
+        return not _READ_STATEMENT.match(clause.text)
+    return False
+
+
+class RoutingSession(Session):
+    """Сессия, отправляющая чтение GET-запросов на движок только для чтения."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _read_only.get() and not self.info.get("wrote"):
+            if self._flushing or _is_write(clause):
+                self.info["wrote"] = True
+            else:
+                engine = current_app.extensions.get(EXTENSION_KEY)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only_url(url, instance_path):
+    """URL SQLite в виде file:...?mode=ro&uri=true; None для базы в памяти."""
+    url = make_url(url)
+    if not url.drivername.startswith("sqlite"):
+        return None
+    database = url.database or ""
+    if database in ("", ":memory:") or url.query.get("mode") == "memory":
+        return None
+    if url.query.get("uri") and database.startswith("file:"):
+        database = database[5:]
+    # Относительный путь — от instance/, как у Flask-SQLAlchemy
+    database = os.path.join(instance_path, database)
+    return url.set(database=f"file:{database}").update_query_dict(
+        {"mode": "ro", "uri": "true"})
+
+
+def _set_read_pragmas(mmap_size, cache_size):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA query_only=ON;")
+        cursor.execute(f"PRAGMA mmap_size={int(mmap_size)};")
+        cursor.execute(f"PRAGMA cache_size={int(cache_size)};")
+        cursor.execute("PRAGMA temp_store=MEMORY;")
+        cursor.close()
+    return set_pragmas
+
+
+def init_app(app):
+    """
+    Создаёт движок только для чтения и включает выбор движка для каждого
+    запроса. Параметры пула — общие SQLALCHEMY_ENGINE_OPTIONS, поэтому
+    вызывается после metrics.init_app.
+    """
+    config = app.config
+    if not config.get("READ_ONLY_DB_ENABLED", True):
+        return
+    url = read_only_url(config.get("READ_ONLY_DB_URI")
+                        or config["SQLALCHEMY_DATABASE_URI"], app.instance_path)
+    if url is None:
+        return
+
+    engine = create_engine(url, **config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    event.listen(engine, "connect", _set_read_pragmas(
+        config.get("READ_ONLY_DB_MMAP_SIZE", 256 * 1024 * 1024),
+        config.get("READ_ONLY_DB_CACHE_SIZE", -64 * 1024)))
+    app.extensions[EXTENSION_KEY] = engine
+
+    blueprints = frozenset(config.get("READ_ONLY_DB_BLUEPRINTS", ("main", "admin")))
+
+    @app.before_request
+    def _route_reads():
+        _read_only.set(request.method in ("GET", "HEAD")
+                       and request.blueprint in blueprints)
+
+    @app.teardown_request
+    def _reset_routing(exc):
+        _read_only.set(False)
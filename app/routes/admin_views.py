@@ -0,0 +1,391 @@
+"""
+Обработчики админки. Модуль загружается при первом запросе к /admin
+(см. app/routes/admin.py), а не при запуске воркера.
+"""
+
+from datetime import date
+from functools import wraps
+from flask import abort, redirect, render_template, request, url_for, flash
+from flask_login import current_user, login_required
+from flask_wtf.csrf import validate_csrf
+from sqlalchemy import select
+from wtforms import ValidationError
+
+from app import stats
+from app.extensions import db
+from app.pagination import estimated_total, keyset_paginate
+from app.search import search_bookings, search_hotels, search_users
+from app.slow_queries import slow_query_log
+from app.models.booking import Booking
+from app.models.hotel import Hotel
+from app.models.user import User, UserRole
+from app.models.room import Room
+
+
+def admin_required(f):
+    """Декоратор для проверки прав администратора."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not current_user.is_authenticated or current_user.role != UserRole.ADMIN:
+            abort(403)
+        return f(*args, **kwargs)
+    return decorated
+
+
+@login_required
+@admin_required
+def dashboard():
+    """Панель администратора."""
+    # Все показатели читаются из stats_counters одним запросом
+    return render_template("admin/dashboard.html", stats=stats.dashboard_stats())
+
+
+@login_required
+@admin_required
+def users_list():
+    """
+    Список пользователей.
+    """
+    cursor = request.args.get('cursor')
+    per_page = 20
+    search_query = request.args.get('search', '').strip()
+
+    # Email и телефон ищутся по префиксу через индекс, имена — через FTS
+    query = search_users(User.query, search_query)
+
+    users = keyset_paginate(
+        query, User, per_page, cursor,
+        total=estimated_total(('users', search_query), query),
+    )
+
+    return render_template("admin/users.html", users=users, search_query=search_query)
+
+
+@login_required
+@admin_required
+def set_user_role(user_id: int):
+    """
+    Изменение роли пользователя.
+    """
+    try:
+        validate_csrf(request.form.get('csrf_token'))
+
+        role_value = request.form.get("role")
+        if role_value not in {r.value for r in UserRole}:
+            flash("Некорректная роль", "danger")
+            return redirect(url_for("admin.users_list"))
+
+        user = User.query.get_or_404(user_id)
+
+        # Запрет на изменение собственной роли
+        if user.id == current_user.id:
+            flash("Вы не можете изменить свою собственную роль", "danger")
+            return redirect(url_for("admin.users_list"))
+
+        # Запрет на удаление последнего администратора
+        if user.role == UserRole.ADMIN and role_value != UserRole.ADMIN.value:
+            admin_count = User.query.filter_by(role=UserRole.ADMIN).count()
+            if admin_count <= 1:
+                flash("Нельзя удалить последнего администратора", "danger")
+                return redirect(url_for("admin.users_list"))
+
+        old_role = user.role.value
+        user.role = UserRole(role_value)
+        db.session.commit()
+
+        flash(
+            f"Роль пользователя {user.email} изменена с '{old_role}' на '{role_value}'", "success")
+
+    except ValidationError:
+        flash("Ошибка безопасности. Попробуйте еще раз.", "danger")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Ошибка при изменении роли: {str(e)}", "danger")
+
+    return redirect(url_for("admin.users_list"))
+
+
+@login_required
+@admin_required
+def delete_user(user_id: int):
+    """
+    Удаление пользователя.
+    """
+    try:
+        validate_csrf(request.form.get('csrf_token'))
+
+        user = User.query.get_or_404(user_id)
+
+        # Запрет на удаление самого себя
+        if user.id == current_user.id:
+            flash("Вы не можете удалить свой собственный аккаунт", "danger")
+            return redirect(url_for("admin.users_list"))
+
+        # Проверка, есть ли связанные данные
+        if user.hotels:
+            flash(
+                f"Нельзя удалить пользователя {user.email}, так как у него есть отели", "danger")
+            return redirect(url_for("admin.users_list"))
+
+        # Проверка бронирований
+        user_bookings = Booking.query.filter_by(user_id=user_id).count()
+        if user_bookings > 0:
+            flash(
+                f"Нельзя удалить пользователя {user.email}, так как у него есть бронирования", "danger")
+            return redirect(url_for("admin.users_list"))
+
+        email = user.email
+        db.session.delete(user)
+        db.session.commit()
+
+        flash(f"Пользователь {email} успешно удален", "success")
+
+    except ValidationError:
+        flash("Ошибка безопасности. Попробуйте еще раз.", "danger")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Ошибка при удалении пользователя: {str(e)}", "danger")
+
+    return redirect(url_for("admin.users_list"))
+
+
+@login_required
+@admin_required
+def hotels_list():
+    """
+    Список отелей.
+    """
+    cursor = request.args.get('cursor')
+    per_page = 15
+    search_query = request.args.get('search', '').strip()
+    city_filter = request.args.get('city', '').strip()
+
+    query = Hotel.query
+
+    if search_query:
+        query = search_hotels(query, search_query, columns=['name', 'description'])
+
+    if city_filter:
+        # Город выбирается из списка существующих значений
+        query = query.filter(Hotel.city == city_filter)
+
+    # Список упорядочен по дате создания (в том числе при поиске)
+    hotels = keyset_paginate(
+        query, Hotel, per_page, cursor,
+        total=estimated_total(('hotels', search_query, city_filter), query),
+    )
+    Hotel.attach_summaries(hotels.items)
+
+    # Получаем уникальные города для фильтра
+    cities = db.session.query(Hotel.city).distinct().order_by(Hotel.city).all()
+    city_list = [city[0] for city in cities if city[0]]
+
+    return render_template("admin/hotels.html",
+                           hotels=hotels,
+                           search_query=search_query,
+                           city_filter=city_filter,
+                           cities=city_list)
+
+
+@login_required
+@admin_required
+def bookings_list():
+    """
+    Список бронирований.
+    """
+    status = request.args.get("status", "all")
+    cursor = request.args.get('cursor')
+    per_page = 30
+    search_query = request.args.get('search', '').strip()
+
+    query = Booking.with_details()
+
+    if status and status != "all":
+        query = query.filter(Booking.status == status)
+
+    query = search_bookings(query, search_query)
+
+    statuses = ['all', 'pending', 'confirmed', 'cancelled']
+
+    # Статистика по статусам для отображения
+    status_counts = stats.booking_status_counts()
+
+    # Без поиска итог берётся из счётчиков, с поиском — кешированный COUNT
+    if search_query:
+        total = estimated_total(('bookings', status, search_query), query)
+    else:
+        total = status_counts.get(status)
+
+    bookings = keyset_paginate(query, Booking, per_page, cursor, total=total)
+
+    # Для фильтра массовых действий
+    hotels = db.session.query(Hotel.id, Hotel.name).order_by(Hotel.name).all()
+
+    return render_template(
+        "admin/bookings.html",
+        bookings=bookings,
+        hotels=hotels,
+        current_status=status,
+        statuses=statuses,
+        status_counts=status_counts,
+        search_query=search_query
+    )
+
+
+@login_required
+@admin_required
+def cancel_booking_admin(booking_id: int):
+    """
+    Отмена бронирования администратором.
+    """
+    try:
+        validate_csrf(request.form.get('csrf_token'))
+
+        booking = Booking.query.get_or_404(booking_id)
+
+        if booking.status == "cancelled":
+            flash("Бронирование уже отменено", "info")
+        else:
+            old_status = booking.status
+            booking.status = "cancelled"
+            db.session.commit()
+            flash(
+                f"Бронирование #{booking_id} отменено (было: {old_status})", "success")
+
+    except ValidationError:
+        flash("Ошибка безопасности. Попробуйте еще раз.", "danger")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Ошибка при отмене бронирования: {str(e)}", "danger")
+
+    status = request.args.get("status", "all")
+    return redirect(url_for("admin.bookings_list", status=status))
+
+
+@login_required
+@admin_required
+def confirm_booking_admin(booking_id: int):
+    """
+    Подтверждение бронирования администратором.
+    """
+    try:
+        validate_csrf(request.form.get('csrf_token'))
+
+        booking = Booking.query.get_or_404(booking_id)
+
+        if booking.status == "confirmed":
+            flash("Бронирование уже подтверждено", "info")
+        elif booking.status == "cancelled":
+            flash("Невозможно подтвердить отмененное бронирование", "danger")
+        else:
+            old_status = booking.status
+            booking.status = "confirmed"
+            db.session.commit()
+            flash(
+                f"Бронирование #{booking_id} подтверждено (было: {old_status})", "success")
+
+    except ValidationError:
+        flash("Ошибка безопасности. Попробуйте еще раз.", "danger")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Ошибка при подтверждении бронирования: {str(e)}", "danger")
+
+    status = request.args.get("status", "all")
+    return redirect(url_for("admin.bookings_list", status=status))
+
+
+# Массовые действия: новый статус, допустимые исходные статусы, подпись
+BULK_ACTIONS = {
+    "confirm": ("confirmed", ("pending",), "Подтверждено"),
+    "cancel": ("cancelled", ("pending", "confirmed"), "Отменено"),
+}
+
+
+def _bulk_criteria(form):
+    """
+    Условия отбора броней для массового действия: отмеченные в списке
+    (scope=selected) или фильтр по отелю и датам заезда (scope=filter).
+    None (с сообщением пользователю) — если ничего не отмечено или фильтр
+    задан неверно: отброшенное условие расширило бы действие на все брони.
+    """
+    if form.get("scope") == "selected":
+        ids = [int(value) for value in form.getlist("booking_ids") if value.isdigit()]
+        if not ids:
+            flash("Не выбрано ни одного бронирования", "warning")
+            return None
+        return [Booking.id.in_(ids)]
+
+    try:
+        hotel_id = int(form["hotel_id"]) if form.get("hotel_id") else None
+        date_from, date_to = (
+            date.fromisoformat(form[name]) if form.get(name) else None
+            for name in ("date_from", "date_to"))
+    except ValueError:
+        flash("Неверный отель или дата в фильтре", "danger")
+        return None
+    if date_from and date_to and date_from > date_to:
+        flash("Дата «с» позже даты «по»", "danger")
+        return None
+
+    criteria = []
+    if hotel_id:
+        criteria.append(Booking.room_id.in_(
+            select(Room.id).where(Room.hotel_id == hotel_id)))
+    if date_from:
+        criteria.append(Booking.check_in >= date_from)
+    if date_to:
+        criteria.append(Booking.check_in <= date_to)
+    return criteria
+
+
+@login_required
+@admin_required
+def bulk_bookings_admin():
+    """
+    Массовое подтверждение или отмена бронирований.
+
+    Выполняется набором UPDATE с условием на исходный статус, без загрузки
+    броней по одной (см. Booking.bulk_set_status).
+    """
+    try:
+        validate_csrf(request.form.get('csrf_token'))
+
+        action = BULK_ACTIONS.get(request.form.get("action"))
+        if action is None:
+            flash("Неизвестное действие", "danger")
+        elif (criteria := _bulk_criteria(request.form)) is not None:
+            new_status, from_statuses, label = action
+            # Фильтр по статусу сужает допустимые исходные статусы
+            status_filter = request.form.get("status_filter")
+            if status_filter in from_statuses:
+                from_statuses = (status_filter,)
+
+            affected = Booking.bulk_set_status(new_status, from_statuses, *criteria)
+            db.session.commit()
+
+            total = sum(affected.values())
+            details = ", ".join(
+                f"было {status}: {count}" for status, count in affected.items() if count)
+            flash(f"{label} бронирований: {total}" + (f" ({details})" if details else ""),
+                  "success" if total else "info")
+
+    except ValidationError:
+        flash("Ошибка безопасности. Попробуйте еще раз.", "danger")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Ошибка при массовом изменении бронирований: {str(e)}", "danger")
+
+    status = request.args.get("status", "all")
+    return redirect(url_for("admin.bookings_list", status=status))
+
+
+@login_required
+@admin_required
+def slow_queries():
+    """Худшие запросы из журнала медленных запросов."""
+    return render_template(
+        "admin/slow_queries.html",
+        queries=slow_query_log.worst(),
+        enabled=slow_query_log.enabled,
+        threshold_ms=round(slow_query_log.threshold * 1000),
+    )
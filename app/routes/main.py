@@ -1,48 +1,134 @@
+from datetime import date
+
 from flask import render_template, request, flash, redirect, url_for, Blueprint
 from flask_login import login_required, current_user
+from sqlalchemy.exc import IntegrityError
+from app.conditional import changes, conditional_get, page_state, versions
 from app.extensions import db
+from app.page_cache import cache_page
+from app.search import search_hotels
+from app.stats import CATALOG_VERSION
 from app.models.hotel import Hotel
 from app.models.room import Room
 from app.models.booking import Booking
-from app.forms.booking_forms import BookingForm
+from app.occupancy import VERSION_COUNTER
 
 main = Blueprint('main', __name__)
 
 
+def _stay_params():
+    """
+    Читает из query string параметры поиска: даты заезда/выезда и число гостей.
+
+    Некорректные значения отбрасываются (type=... возвращает None),
+    интервал дат учитывается только если выезд позже заезда.
+    """
+    check_in = request.args.get('check_in', type=date.fromisoformat)
+    check_out = request.args.get('check_out', type=date.fromisoformat)
+    guests = request.args.get('guests', type=int)
+
+    if check_in and check_out and check_in >= check_out:
+        flash('Дата выезда должна быть позже даты заезда.', 'warning')
+        check_in = check_out = None
+    elif not (check_in and check_out):
+        check_in = check_out = None
+
+    if guests is not None and guests < 1:
+        guests = None
+
+    return check_in, check_out, guests
+
+
+def _searches_dates():
+    """Поиск по датам зависит от бронирований."""
+    return 'check_in' in request.args or 'check_out' in request.args
+
+
+def _bookings_changes():
+    return [changes(Booking, count=False)] if _searches_dates() else []
+
+
+def _catalog_state():
+    # Каталог зависит от всех отелей и номеров: метки версий вместо
+    # агрегатов по целым таблицам
+    names = [CATALOG_VERSION]
+    if _searches_dates():
+        names.append(VERSION_COUNTER)
+    return page_state(versions(*names))
+
+
+def _hotel_state(hotel_id):
+    return page_state(changes(Hotel, Hotel.id == hotel_id),
+                      changes(Room, Room.hotel_id == hotel_id),
+                      *_bookings_changes())
+
+
 @main.route("/")
+@cache_page("hotels")
 def index():
     """
     Главная страница.
     """
     # Показываем первые 3 отеля из базы
-    popular_hotels = Hotel.query.order_by(
-        Hotel.created_at.desc()).limit(3).all()
+    popular_hotels = Hotel.attach_summaries(
+        Hotel.query.order_by(Hotel.created_at.desc()).limit(3))
     return render_template("index.html", popular_hotels=popular_hotels)
 
 
 @main.route('/catalog')
+@conditional_get(_catalog_state)
+@cache_page("hotels")
 def catalog():
     """
-    Каталог отелей с фильтрацией по городу.
+    Каталог отелей с фильтрацией по городу, датам и числу гостей.
+
+    Если указаны даты, в выдачу попадают только отели, где есть хотя бы
+    один свободный номер подходящей вместимости. Проверка делается одним
+    запросом (EXISTS по rooms + NOT EXISTS по bookings), без вызова
+    Room.is_available для каждого номера.
     """
     city = request.args.get('city', '')
+    check_in, check_out, guests = _stay_params()
     query = Hotel.query
 
     if city:
-        query = query.filter(Hotel.city.ilike(f'%{city}%'))
+        # Полнотекстовый поиск по городу: префиксы слов, без учёта регистра
+        query = search_hotels(query, city, columns=['city'])
+
+    if check_in:
+        query = query.filter(
+            Hotel.rooms.any(Room.availability_filter(check_in, check_out, guests)))
+    elif guests:
+        query = query.filter(Hotel.rooms.any(Room.capacity >= guests))
 
-    hotels = query.all()
-    return render_template('catalog.html', hotels=hotels, city=city)
+    hotels = Hotel.attach_summaries(query)
+    return render_template('catalog.html', hotels=hotels, city=city,
+                           check_in=check_in, check_out=check_out, guests=guests)
 
 
 @main.route('/hotel/<int:hotel_id>')
+@conditional_get(_hotel_state)
+@cache_page("hotel:{hotel_id}")
 def hotel_detail(hotel_id):
     """
     Страница отеля с номерами.
+
+    При заданных датах показываются только свободные номера,
+    вмещающие указанное число гостей.
     """
     hotel = Hotel.query.get_or_404(hotel_id)
-    rooms = Room.query.filter_by(hotel_id=hotel_id).all()
-    return render_template('hotel_detail.html', hotel=hotel, rooms=rooms)
+    check_in, check_out, guests = _stay_params()
+    query = Room.query.filter_by(hotel_id=hotel_id)
+
+    if check_in:
+        query = query.filter(
+            Room.availability_filter(check_in, check_out, guests))
+    elif guests:
+        query = query.filter(Room.capacity >= guests)
+
+    rooms = query.all()
+    return render_template('hotel_detail.html', hotel=hotel, rooms=rooms,
+                           check_in=check_in, check_out=check_out, guests=guests)
 
 
 @main.route('/hotel/<int:hotel_id>/room/<int:room_id>/book', methods=['GET', 'POST'])
@@ -53,7 +139,12 @@ def book_room(hotel_id, room_id):
     """
     hotel = Hotel.query.get_or_404(hotel_id)
     room = Room.query.filter_by(id=room_id, hotel_id=hotel_id).first_or_404()
-    form = BookingForm()
+    # Даты и гости из поиска подставляются в форму как значения по умолчанию
+    check_in, check_out, guests = _stay_params()
+    prefill = {key: value for key, value in (
+        ('check_in', check_in), ('check_out', check_out), ('guests', guests)) if value}
+    from app.forms.booking_forms import BookingForm
+    form = BookingForm(**prefill)
 
     if form.validate_on_submit():
         # 1. Проверяем даты
@@ -81,20 +172,29 @@ def book_room(hotel_id, room_id):
                 status='confirmed'
             )
             db.session.add(booking)
-            db.session.commit()
-            flash('Бронирование успешно создано!', 'success')
-            return redirect(url_for('user.my_bookings'))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Параллельный запрос успел занять одну из ночей:
+                # журнал room_nights не даёт записать двойную бронь.
+                db.session.rollback()
+                flash('К сожалению, номер уже забронирован на эти даты.', 'danger')
+            else:
+                flash('Бронирование успешно создано!', 'success')
+                return redirect(url_for('user.my_bookings'))
 
     return render_template('book_room.html', hotel=hotel, room=room, form=form)
 
 
 @main.route('/about')
+@cache_page()
 def about():
     """Страница о проекте."""
     return render_template('about.html')
 
 
 @main.route('/contact')
+@cache_page()
 def contact():
     """Страница контактов."""
     return render_template('contact.html')
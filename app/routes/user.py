@@ -4,12 +4,11 @@ from flask_wtf.csrf import validate_csrf
 from wtforms import ValidationError
 from flask_wtf import FlaskForm
 from datetime import datetime
+from sqlalchemy import select
 
+from app.conditional import changes, conditional_get, page_state
 from app.extensions import db
-from app.forms.auth_forms import LoginForm, RegistrationForm
-from app.forms.profile_forms import EditProfileForm, ChangePasswordForm
-from app.forms.hotel_forms import HotelForm
-from app.forms.room_forms import RoomForm
+from app.metrics import LOGIN_FAILURES
 from app.models.booking import Booking
 from app.models.hotel import Hotel
 from app.models.room import Room
@@ -24,6 +23,7 @@ def register():
     if current_user.is_authenticated:
         return redirect(url_for("main.index"))
 
+    from app.forms.auth_forms import RegistrationForm
     form = RegistrationForm()
 
     if form.validate_on_submit():
@@ -61,16 +61,20 @@ def login():
     if current_user.is_authenticated:
         return redirect(url_for("main.index"))
 
+    from app.forms.auth_forms import LoginForm
     form = LoginForm()
 
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
 
         if user and user.check_password(form.password.data):
+            # Сохраняем хеш, если check_password его обновил
+            db.session.commit()
             login_user(user, remember=True)
             flash("Вы успешно вошли!", "success")
             return redirect(url_for("main.index"))
         else:
+            LOGIN_FAILURES.inc()
             flash("Неверный email или пароль", "danger")
 
     return render_template("user/login.html", form=form)
@@ -96,6 +100,7 @@ def profile():
 @login_required
 def edit_profile():
     """Редактирование профиля."""
+    from app.forms.profile_forms import EditProfileForm
     form = EditProfileForm(obj=current_user)
 
     if form.validate_on_submit():
@@ -130,6 +135,7 @@ def edit_profile():
 @login_required
 def security():
     """Смена пароля."""
+    from app.forms.profile_forms import ChangePasswordForm
     form = ChangePasswordForm()
 
     if form.validate_on_submit():
@@ -187,14 +193,24 @@ def delete_account():
         return redirect(url_for('user.security'))
 
 
+def _my_bookings_state():
+    """Состояние «Моих бронирований»: брони пользователя, их номера и отели."""
+    own = Booking.user_id == current_user.id
+    room_ids = select(Booking.room_id).where(own)
+    hotel_ids = select(Room.hotel_id).where(Room.id.in_(room_ids))
+    return page_state(changes(Booking, own),
+                      changes(Room, Room.id.in_(room_ids)),
+                      changes(Hotel, Hotel.id.in_(hotel_ids)))
+
+
 @user.route("/my-bookings")
 @login_required
+@conditional_get(_my_bookings_state)
 def my_bookings():
     """Мои бронирования."""
     bookings = (
-        Booking.query.filter_by(user_id=current_user.id)
-        .join(Room, Room.id == Booking.room_id)
-        .join(Hotel, Hotel.id == Room.hotel_id)
+        Booking.with_room_and_hotel()
+        .filter(Booking.user_id == current_user.id)
         .order_by(Booking.created_at.desc())
         .all()
     )
@@ -237,6 +253,7 @@ def create_hotel():
     if not current_user.is_hotel_owner:
         abort(403)
 
+    from app.forms.hotel_forms import HotelForm
     form = HotelForm()
     if form.validate_on_submit():
         hotel = Hotel(
@@ -263,6 +280,7 @@ def edit_hotel(hotel_id):
     if hotel.owner_id != current_user.id or not current_user.is_hotel_owner:
         abort(403)
 
+    from app.forms.hotel_forms import HotelForm
     form = HotelForm(obj=hotel)
     if form.validate_on_submit():
         hotel.name = form.name.data
@@ -322,6 +340,7 @@ def create_room(hotel_id):
     if hotel.owner_id != current_user.id or not current_user.is_hotel_owner:
         abort(403)
 
+    from app.forms.room_forms import RoomForm
     form = RoomForm()
     if form.validate_on_submit():
         room = Room(
@@ -349,6 +368,7 @@ def edit_room(hotel_id, room_id):
     if hotel.owner_id != current_user.id or not current_user.is_hotel_owner or room.hotel_id != hotel_id:
         abort(403)
 
+    from app.forms.room_forms import RoomForm
     form = RoomForm(obj=room)
     if form.validate_on_submit():
         room.name = form.name.data
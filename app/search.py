@@ -0,0 +1,217 @@
+"""
+Полнотекстовый поиск на SQLite FTS5.
+
+Таблицы-индексы (contentless: хранят только индекс):
+- hotels_fts — name, city, address и description отелей;
+- users_fts — имя, фамилия и email пользователей (для админки);
+- rooms_fts — названия номеров (поиск бронирований в админке).
+
+Бронирования своего индекса не имеют: поиск по ним в админке сводится
+к этим индексам (гость, отель, номер).
+
+Синхронизация — триггерами на исходных таблицах, поэтому индекс
+обновляется при любой записи, включая массовые UPDATE мимо ORM.
+
+Токенизатор unicode61 сам приводит регистр для кириллицы (в отличие от
+LIKE/lower() в SQLite, которые работают только с ASCII). Букву «ё»
+токенизатор не сводит к «е», поэтому она нормализуется отдельно —
+и в триггерах, и в поисковом запросе.
+"""
+
+import re
+
+from sqlalchemy import (
+    DDL, and_, column, event, func, literal_column, select, table, text
+)
+
+from .extensions import db
+from .models.booking import Booking
+from .models.hotel import Hotel
+from .models.room import Room
+from .models.user import User, phone_digits
+
+HOTEL_FTS_COLUMNS = ("name", "city", "address", "description")
+USER_FTS_COLUMNS = ("first_name", "last_name", "email")
+ROOM_FTS_COLUMNS = ("name",)
+
+hotels_fts = table("hotels_fts", column("rowid"), column("rank"))
+users_fts = table("users_fts", column("rowid"), column("rank"))
+rooms_fts = table("rooms_fts", column("rowid"), column("rank"))
+
+
+def _norm_sql(expr):
+    return f"replace(replace(coalesce({expr}, ''), 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _values_sql(prefix, columns):
+    return ", ".join(_norm_sql(f"{prefix}.{name}") for name in columns)
+
+
+def fts_ddl(fts_name, source, columns):
+    """DDL индекса fts_name по таблице source и триггеров синхронизации."""
+    names = ", ".join(columns)
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts_name} USING fts5(
+            {names}, content='', tokenize='unicode61 remove_diacritics 2')""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts_name}_ai AFTER INSERT ON {source} BEGIN
+            INSERT INTO {fts_name}(rowid, {names})
+            VALUES (new.id, {_values_sql('new', columns)});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts_name}_ad AFTER DELETE ON {source} BEGIN
+            INSERT INTO {fts_name}({fts_name}, rowid, {names})
+            VALUES ('delete', old.id, {_values_sql('old', columns)});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts_name}_au
+        AFTER UPDATE OF {names} ON {source} BEGIN
+            INSERT INTO {fts_name}({fts_name}, rowid, {names})
+            VALUES ('delete', old.id, {_values_sql('old', columns)});
+            INSERT INTO {fts_name}(rowid, {names})
+            VALUES (new.id, {_values_sql('new', columns)});
+        END""",
+    ]
+
+
+def fts_drop(fts_name):
+    return [
+        f"DROP TRIGGER IF EXISTS {fts_name}_au",
+        f"DROP TRIGGER IF EXISTS {fts_name}_ad",
+        f"DROP TRIGGER IF EXISTS {fts_name}_ai",
+        f"DROP TABLE IF EXISTS {fts_name}",
+    ]
+
+
+def fts_populate(fts_name, source, columns):
+    return (
+        f"INSERT INTO {fts_name}(rowid, {', '.join(columns)}) "
+        f"SELECT id, {_values_sql(source, columns)} FROM {source}"
+    )
+
+
+_INDEXES = (
+    (Hotel.__table__, "hotels_fts", HOTEL_FTS_COLUMNS),
+    (User.__table__, "users_fts", USER_FTS_COLUMNS),
+    (Room.__table__, "rooms_fts", ROOM_FTS_COLUMNS),
+)
+
+# Индексы создаются вместе с исходными таблицами при db.create_all()
+for _table, _fts_name, _columns in _INDEXES:
+    for _statement in fts_ddl(_fts_name, _table.name, _columns):
+        event.listen(_table, "after_create", DDL(_statement))
+    for _statement in fts_drop(_fts_name):
+        event.listen(_table, "before_drop", DDL(_statement))
+
+
+def normalize(value):
+    return value.lower().replace("ё", "е")
+
+
+def match_expression(query, columns=None):
+    """
+    Строит выражение FTS5 MATCH из пользовательского ввода.
+
+    Каждое слово ищется по префиксу ("мос" найдёт «Москва»), все слова
+    обязательны. Спецсимволы синтаксиса FTS5 отбрасываются. Возвращает
+    None, если в запросе нет ни одного слова.
+    """
+    words = re.findall(r"\w+", normalize(query or ""))
+    if not words:
+        return None
+    terms = " ".join(f'"{word}"*' for word in words)
+    if columns:
+        return f"{{{' '.join(columns)}}} : ({terms})"
+    return terms
+
+
+def _match(fts, match):
+    return literal_column(fts.name).op("MATCH")(match)
+
+
+def search_hotels(query, term, columns=None):
+    """
+    Ограничивает запрос по Hotel результатами полнотекстового поиска
+    и сортирует по релевантности (bm25). Пустой term — без изменений.
+    """
+    match = match_expression(term, columns)
+    if match is None:
+        return query
+
+    found = (
+        select(hotels_fts.c.rowid.label("hotel_id"), hotels_fts.c.rank.label("rank"))
+        .where(_match(hotels_fts, match))
+        .subquery()
+    )
+    return query.join(found, found.c.hotel_id == Hotel.id).order_by(found.c.rank)
+
+
+def _prefix_range(expr, prefix):
+    """
+    Условие «expr начинается с prefix» в виде диапазона, который SQLite
+    выполняет поиском по индексу (LIKE 'x%' индекс здесь не использует).
+    """
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(expr >= prefix, expr < upper)
+
+
+_PHONE_RE = re.compile(r"^[\d\s()+-]+$")
+
+
+def search_users(query, term):
+    """
+    Поиск пользователей для админки, каждый вариант — через индекс:
+    - строка с «@» — префикс email (lower(email), индекс по выражению);
+    - строка из цифр и символов телефона — префикс phone_digits;
+    - иначе — полнотекстовый поиск по имени, фамилии и email.
+    """
+    term = (term or "").strip()
+    if not term:
+        return query
+
+    if "@" in term:
+        return query.filter(_prefix_range(func.lower(User.email), term.lower()))
+
+    digits = phone_digits(term)
+    if digits and _PHONE_RE.match(term):
+        return query.filter(_prefix_range(User.phone_digits, digits))
+
+    match = match_expression(term)
+    if match is None:
+        return query
+    found = select(users_fts.c.rowid).where(_match(users_fts, match))
+    return query.filter(User.id.in_(found))
+
+
+def search_bookings(query, term):
+    """
+    Поиск бронирований для админки: гость ищется как в search_users,
+    отель — по названию в hotels_fts, номер — в rooms_fts. Бронирования
+    выбираются по индексам room_id и user_id, без просмотра таблиц
+    bookings и rooms.
+    """
+    term = (term or "").strip()
+    if not term:
+        return query
+
+    users = search_users(select(User.id), term)
+    match = match_expression(term, ["name"])
+    if match is None:
+        return query.filter(Booking.user_id.in_(users))
+    hotels = select(hotels_fts.c.rowid).where(_match(hotels_fts, match))
+    rooms = select(Room.id).where(Room.hotel_id.in_(hotels)).union(
+        select(rooms_fts.c.rowid).where(_match(rooms_fts, match)))
+    return query.filter(Booking.user_id.in_(users) | Booking.room_id.in_(rooms))
+
+
+def rebuild_index(table_name):
+    """Пересоздаёт FTS-индекс для hotels, users или rooms по текущим данным."""
+    for source, fts_name, columns in _INDEXES:
+        if source.name == table_name:
+            for statement in fts_drop(fts_name) + fts_ddl(fts_name, source.name, columns):
+                db.session.execute(text(statement))
+            db.session.execute(text(fts_populate(fts_name, source.name, columns)))
+            return
+    raise ValueError(f"Нет полнотекстового индекса для таблицы {table_name}")
+
+
+def rebuild_all():
+    for source, _, _ in _INDEXES:
+        rebuild_index(source.name)
@@ -0,0 +1,95 @@
+"""
+Запуск под gunicorn и uWSGI с предзагрузкой приложения.
+
+Приложение создаётся один раз в мастер-процессе (wsgi.py), воркеры
+получают его через fork. Хуки сервера (gunicorn.conf.py, uwsgi.ini)
+вызывают функции этого модуля:
+
+- prepare — один раз в мастере до запуска воркеров: схема базы
+  (DB_CREATE_ALL_ON_START), очистка каталога метрик и компиляция
+  шаблонов (TEMPLATES_PRECOMPILE_ON_START), которые воркеры получают
+  уже готовыми;
+- after_fork — в каждом воркере сразу после fork: соединения SQLite,
+  унаследованные от мастера, не закрываются, а забываются (закрыть их
+  должен только процесс, который их открыл), и при необходимости
+  прогревает воркер (WORKER_WARMUP);
+- worker_ready — воркер готов принимать запросы: время от fork пишется
+  в журнал и в метрику worker_startup_seconds.
+"""
+
+import logging
+import os
+import time
+
+from . import metrics, templating
+from .extensions import db
+from .read_only import EXTENSION_KEY as READ_ONLY_ENGINE
+
+logger = logging.getLogger(__name__)
+
+_forked_at = None
+_warmup_time = 0.0
+
+
+def _engines(app):
+    with app.app_context():
+        engines = list(db.engines.values())
+    read_only = app.extensions.get(READ_ONLY_ENGINE)
+    if read_only is not None:
+        engines.append(read_only)
+    return engines
+
+
+def create_schema(app):
+    """Создаёт недостающие таблицы (без миграций, как db.create_all)."""
+    with app.app_context():
+        db.create_all()
+
+
+def prepare(app):
+    """Подготовка в мастер-процессе перед запуском воркеров."""
+    if app.config.get("DB_CREATE_ALL_ON_START", False):
+        create_schema(app)
+    if app.config.get("METRICS_ENABLED", True):
+        metrics.reset_directory(metrics.metrics_directory(app))
+    if app.config.get("TEMPLATES_PRECOMPILE_ON_START", False):
+        templating.precompile(app)
+    # Соединения мастера воркерам не нужны
+    for engine in _engines(app):
+        engine.dispose()
+
+
+def after_fork(app):
+    """Вызывается в воркере сразу после fork."""
+    global _forked_at, _warmup_time
+    _forked_at = time.perf_counter()
+    for engine in _engines(app):
+        engine.dispose(close=False)
+    if app.config.get("WORKER_WARMUP", False):
+        warm_up(app)
+        _warmup_time = time.perf_counter() - _forked_at
+
+
+def warm_up(app):
+    """
+    Прогрев воркера до первого запроса: компиляция всех шаблонов и по
+    одному соединению в каждом пуле (PRAGMA при подключении).
+    """
+    templating.precompile(app)
+    for engine in _engines(app):
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+
+
+def worker_ready(app, log=logger):
+    """
+    Воркер готов принимать запросы: время от fork попадает в метрику
+    worker_startup_seconds и в журнал log (у gunicorn — worker.log).
+    """
+    if _forked_at is None:
+        return
+    startup = time.perf_counter() - _forked_at
+    if app.config.get("METRICS_ENABLED", True):
+        metrics.WORKER_STARTUP.observe(startup)
+    log.info("Воркер %s готов за %.1f мс (прогрев %.1f мс)",
+             os.getpid(), startup * 1000, _warmup_time * 1000)
@@ -0,0 +1,251 @@
+"""
+Журнал медленных SQL-запросов.
+
+Каждый запрос дольше SLOW_QUERY_THRESHOLD_MS записывается JSON-строкой
+в журнал: текст запроса, параметры (строки скрыты — в них бывают email,
+телефоны и поисковые фразы), маршрут, время и план EXPLAIN QUERY PLAN.
+Полный просмотр большой таблицы без индекса (SCAN bookings и т.п.)
+помечается.
+
+У каждого процесса свой файл instance/slow_queries.<pid>.log с ротацией
+по размеру: файл открывается при первой записи уже в воркере, поэтому
+воркеры gunicorn не делят один дескриптор и не ротируют чужой файл.
+Чтение журнала сводит файлы всех процессов.
+
+Время — это время cursor.execute. SQLite отдаёт строки SELECT по мере
+чтения курсора, поэтому в него входит работа до первой строки
+(сортировка, группировка, построение временного индекса), но не
+дочитывание остальных строк: медленный полный просмотр с фильтром,
+который возвращает много строк, будет недооценён. План с пометкой SCAN
+помогает найти такие запросы и при времени ниже порога.
+
+План снимается на том же соединении SQLite отдельным курсором и не
+чаще раза в PLAN_TTL секунд для одного запроса: если база тормозит
+целиком, журнал не должен добавлять ей работы.
+
+Страница /admin/slow-queries показывает худшие запросы по суммарному
+времени.
+"""
+
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .instrumentation import normalize
+
+logger = logging.getLogger(__name__)
+
+PLAN_TTL = 600
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b", re.I)
+_SCAN = re.compile(r"^SCAN (\w+)")
+
+
+def redact(parameters):
+    """Параметры для журнала: строки и байты заменяются типом и длиной."""
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) for value in parameters]
+    if isinstance(parameters, str):
+        return f"<str:{len(parameters)}>"
+    if isinstance(parameters, (bytes, bytearray, memoryview)):
+        return f"<bytes:{len(parameters)}>"
+    if parameters is None or isinstance(parameters, (bool, int, float)):
+        return parameters
+    return str(parameters)
+
+
+def full_scans(plan, large_tables):
+    """Большие таблицы, которые план читает целиком без индекса."""
+    tables = []
+    for line in plan:
+        match = _SCAN.match(line.strip())
+        if match and "INDEX" not in line and match.group(1) in large_tables:
+            tables.append(match.group(1))
+    return tables
+
+
+def explain(dbapi_connection, statement, parameters):
+    """Строки EXPLAIN QUERY PLAN с отступами по вложенности."""
+    depth = {0: -1}
+    lines = []
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        for node_id, parent_id, _, detail in cursor.fetchall():
+            depth[node_id] = depth.get(parent_id, -1) + 1
+            lines.append("  " * depth[node_id] + detail)
+    finally:
+        cursor.close()
+    return lines
+
+
+class SlowQueryLog:
+    """Запись медленных запросов и чтение журнала (один на процесс)."""
+
+    def __init__(self):
+        self.enabled = False
+        self.threshold = 0.2
+        self.large_tables = frozenset()
+        self.path = None
+        self.max_bytes = 5 * 1024 * 1024
+        self.backups = 3
+        self._plans = {}
+        self._lock = threading.Lock()
+        self._handler = None
+        self._pid = None
+
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config.get("SLOW_QUERY_ENABLED", True)
+        self.threshold = config.get("SLOW_QUERY_THRESHOLD_MS", 200) / 1000
+        self.large_tables = frozenset(config.get(
+            "SLOW_QUERY_LARGE_TABLES", ("bookings", "room_nights", "users", "hotels")))
+        self.path = config.get("SLOW_QUERY_LOG_PATH") or os.path.join(
+            app.instance_path, "slow_queries.log")
+        self.max_bytes = config.get("SLOW_QUERY_LOG_MAX_BYTES", 5 * 1024 * 1024)
+        self.backups = config.get("SLOW_QUERY_LOG_BACKUPS", 3)
+        app.extensions["slow_query_log"] = self
+        with self._lock:
+            self._close()
+        logger.setLevel(logging.INFO)
+        # Только в свой файл, не в общий журнал приложения
+        logger.propagate = False
+
+    def _close(self):
+        if self._handler is not None:
+            logger.removeHandler(self._handler)
+            self._handler.close()
+        self._handler = None
+        self._pid = None
+
+    def process_path(self, pid=None):
+        """Файл журнала процесса: slow_queries.log -> slow_queries.<pid>.log."""
+        stem, ext = os.path.splitext(self.path)
+        return f"{stem}.{pid or os.getpid()}{ext}"
+
+    def _ensure_handler(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._close()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            handler = RotatingFileHandler(
+                self.process_path(pid), encoding="utf-8",
+                maxBytes=self.max_bytes, backupCount=self.backups)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            self._handler, self._pid = handler, pid
+
+    def _plan(self, dbapi_connection, key, statement, parameters):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._plans.get(key)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+        try:
+            plan = explain(dbapi_connection, statement, parameters)
+        except Exception as e:  # план — вспомогательная информация
+            plan = [f"EXPLAIN не выполнен: {e}"]
+        with self._lock:
+            if len(self._plans) > 1000:
+                self._plans.clear()
+            self._plans[key] = (now + PLAN_TTL, plan)
+        return plan
+
+    def record(self, conn, cursor, statement, parameters, executemany, duration):
+        key = normalize(statement)
+        plan = None
+        if conn.dialect.name == "sqlite" and not executemany \
+                and _EXPLAINABLE.match(statement):
+            plan = self._plan(cursor.connection, key, statement, parameters)
+
+        entry = {
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "ms": round(duration * 1000, 2),
+            "route": request.endpoint if has_request_context() else None,
+            "statement": statement,
+            "parameters": redact(parameters),
+            "executemany": executemany,
+            "plan": plan,
+            "full_scans": full_scans(plan or [], self.large_tables),
+        }
+        self._ensure_handler()
+        logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+
+    def _files(self):
+        """Файлы всех процессов вместе с ротированными копиями."""
+        if not self.path:
+            return []
+        stem, ext = os.path.splitext(self.path)
+        pattern = glob.escape(stem) + ".*" + glob.escape(ext)
+        paths = glob.glob(pattern) + glob.glob(pattern + ".*")
+        return sorted(paths, key=os.path.getmtime)
+
+    def entries(self):
+        """Записи журналов всех процессов (файлы от старых к новым)."""
+        for path in self._files():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # строка, оборванная при ротации
+
+    def worst(self, limit=50):
+        """Запросы, сгруппированные по тексту, по убыванию суммарного времени."""
+        groups = {}
+        for entry in self.entries():
+            key = normalize(entry["statement"])
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {
+                    "statement": key, "count": 0, "total_ms": 0.0,
+                    "max_ms": 0.0, "routes": set(), "full_scans": set(),
+                }
+            group["count"] += 1
+            group["total_ms"] += entry["ms"]
+            if entry["ms"] >= group["max_ms"]:
+                group["max_ms"] = entry["ms"]
+                group["example"] = entry
+            group["last_seen"] = max(group.get("last_seen", ""), entry["time"])
+            group["routes"].add(entry["route"] or "вне запроса")
+            group["full_scans"].update(entry.get("full_scans") or ())
+
+        for group in groups.values():
+            group["avg_ms"] = group["total_ms"] / group["count"]
+            group["routes"] = sorted(group["routes"])
+            group["full_scans"] = sorted(group["full_scans"])
+        return sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)[:limit]
+
+
+slow_query_log = SlowQueryLog()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if slow_query_log.enabled:
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("slow_query_started")
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    if duration >= slow_query_log.threshold:
+        slow_query_log.record(conn, cursor, statement, parameters, executemany, duration)
@@ -0,0 +1,98 @@
+"""
+Время холодного старта приложения (flask profile-imports, flask check-startup).
+
+Замеры делаются в отдельном интерпретаторе: в текущем процессе модули
+уже импортированы. profile-imports запускает create_app под
+`python -X importtime` и сводит вывод по пакетам и модулям,
+check-startup несколько раз замеряет create_app и сравнивает медиану
+с бюджетом STARTUP_BUDGET_MS, а также проверяет, что модули из
+STARTUP_LAZY_MODULES (формы, обработчики админки, email_validator) не
+загружаются при старте.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import NamedTuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from werkzeug.utils import import_string
+from app import create_app
+create_app(import_string({config!r}))
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+class ImportTime(NamedTuple):
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+class StartupSample(NamedTuple):
+    seconds: float
+    modules: list
+
+
+def _run_probe(config, *flags):
+    result = subprocess.run(
+        [sys.executable, *flags, "-c", _PROBE.format(config=config)],
+        cwd=ROOT, capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"create_app завершился с ошибкой:\n{result.stderr}")
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    return StartupSample(data["seconds"], data["modules"]), result.stderr
+
+
+def parse_importtime(output):
+    """Строки `-X importtime` в список ImportTime (в порядке вывода)."""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # заголовок
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append(ImportTime(name.strip(), int(parts[0]), int(parts[1]), depth))
+    return entries
+
+
+def import_profile(config):
+    """Время импортов при создании приложения: (замер, список ImportTime)."""
+    sample, stderr = _run_probe(config, "-X", "importtime")
+    return sample, parse_importtime(stderr)
+
+
+def by_package(entries):
+    """Собственное время импортов, сложенное по пакетам верхнего уровня."""
+    totals = defaultdict(int)
+    for entry in entries:
+        totals[entry.name.partition(".")[0]] += entry.self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def measure(config, runs=3):
+    """Замеры create_app в новых интерпретаторах."""
+    return [_run_probe(config)[0] for _ in range(runs)]
+
+
+def eager_modules(sample, lazy_modules):
+    """Модули, которые должны загружаться лениво, но загружены при старте."""
+    return sorted(
+        name for name in sample.modules
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in lazy_modules))
+
+
+def median_seconds(samples):
+    return statistics.median(sample.seconds for sample in samples)
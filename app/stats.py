@@ -0,0 +1,227 @@
+"""
+Статистика для панели администратора на основе счётчиков.
+
+Изменения пользователей, отелей и бронирований отслеживаются событиями
+моделей; накопленные за flush приращения записываются в stats_counters
+одним UPSERT в той же транзакции. Если счётчики разошлись с данными
+(например, после ручных правок в БД), их можно пересчитать командой
+flask rebuild-stats.
+
+Там же хранятся метки версий: catalog_version растёт при любом
+изменении отелей и номеров (ETag каталога, app/routes/main.py),
+bookings_version — бронирований (app/occupancy.py).
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, object_session
+
+from .extensions import db
+from .models.booking import Booking
+from .models.hotel import Hotel
+from .models.room import Room
+from .models.stats_counter import StatsCounter
+from .models.user import User, UserRole
+
+_DELTAS_KEY = "stats_deltas"
+
+BOOKING_STATUSES = ("pending", "confirmed", "cancelled")
+
+CATALOG_VERSION = "catalog_version"
+# Метки версий не пересчитываются по данным, а только растут
+VERSIONS = (CATALOG_VERSION, "bookings_version")
+
+# Сколько дней учитывается в «активности за неделю»
+RECENT_DAYS = 7
+
+
+def _day_key(prefix, value):
+    return f"{prefix}:{value.date().isoformat()}"
+
+
+def _role_key(role):
+    # role может быть строкой, если объект создан с role=UserRole.X.value
+    return f"users_role:{role.value if isinstance(role, UserRole) else role}"
+
+
+def _user_keys(user):
+    return ["users", _role_key(user.role), _day_key("users_created", user.created_at)]
+
+
+def _booking_keys(booking):
+    return [
+        "bookings",
+        f"bookings_status:{booking.status}",
+        _day_key("bookings_created", booking.created_at),
+    ]
+
+
+def _bump(target, names, delta):
+    deltas = object_session(target).info.setdefault(_DELTAS_KEY, Counter())
+    for name in names:
+        deltas[name] += delta
+
+
+def _history_change(target, attr):
+    """(старое, новое) значение атрибута, если оно изменилось в этом flush."""
+    history = inspect(target).attrs[attr].history
+    if history.deleted and history.added:
+        return history.deleted[0], history.added[0]
+    return None
+
+
+def adjust(connection, deltas):
+    """Прибавляет приращения к счётчикам в рамках текущей транзакции."""
+    rows = [{"name": name, "value": value} for name, value in deltas.items() if value]
+    if not rows:
+        return
+    stmt = insert(StatsCounter.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"value": StatsCounter.__table__.c.value + stmt.excluded.value},
+    )
+    connection.execute(stmt, rows)
+
+
+@event.listens_for(User, "after_insert")
+def _user_inserted(mapper, connection, target):
+    _bump(target, _user_keys(target), 1)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target):
+    _bump(target, _user_keys(target), -1)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target):
+    change = _history_change(target, "role")
+    if change:
+        old, new = change
+        _bump(target, [_role_key(old)], -1)
+        _bump(target, [_role_key(new)], 1)
+
+
+@event.listens_for(Hotel, "after_insert")
+def _hotel_inserted(mapper, connection, target):
+    _bump(target, ["hotels", CATALOG_VERSION], 1)
+
+
+@event.listens_for(Hotel, "after_delete")
+def _hotel_deleted(mapper, connection, target):
+    _bump(target, ["hotels"], -1)
+    _bump(target, [CATALOG_VERSION], 1)
+
+
+@event.listens_for(Hotel, "after_update")
+@event.listens_for(Room, "after_insert")
+@event.listens_for(Room, "after_update")
+@event.listens_for(Room, "after_delete")
+def _catalog_changed(mapper, connection, target):
+    _bump(target, [CATALOG_VERSION], 1)
+
+
+@event.listens_for(Booking, "after_insert")
+def _booking_inserted(mapper, connection, target):
+    _bump(target, _booking_keys(target), 1)
+
+
+@event.listens_for(Booking, "after_delete")
+def _booking_deleted(mapper, connection, target):
+    _bump(target, _booking_keys(target), -1)
+
+
+@event.listens_for(Booking, "after_update")
+def _booking_updated(mapper, connection, target):
+    change = _history_change(target, "status")
+    if change:
+        old, new = change
+        _bump(target, [f"bookings_status:{old}"], -1)
+        _bump(target, [f"bookings_status:{new}"], 1)
+
+
+@event.listens_for(Session, "after_flush")
+def _write_deltas(session, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if deltas:
+        adjust(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_deltas(session, previous_transaction):
+    session.info.pop(_DELTAS_KEY, None)
+
+
+def _recent_keys(prefix, now):
+    # Окно считается по дням (UTC), включая неполный первый день
+    first_day = (now - timedelta(days=RECENT_DAYS)).date()
+    return [
+        f"{prefix}:{(first_day + timedelta(days=i)).isoformat()}"
+        for i in range(RECENT_DAYS + 1)
+    ]
+
+
+def dashboard_stats():
+    """Статистика для admin.dashboard — одним запросом к stats_counters."""
+    now = datetime.utcnow()
+    recent_users = _recent_keys("users_created", now)
+    recent_bookings = _recent_keys("bookings_created", now)
+    owners_key = _role_key(UserRole.HOTEL_OWNER)
+
+    values = StatsCounter.values(
+        ["users", "hotels", "bookings", owners_key]
+        + [f"bookings_status:{status}" for status in BOOKING_STATUSES]
+        + recent_users + recent_bookings
+    )
+
+    return {
+        "total_users": values["users"],
+        "total_hotels": values["hotels"],
+        "total_bookings": values["bookings"],
+        "pending_bookings": values["bookings_status:pending"],
+        "confirmed_bookings": values["bookings_status:confirmed"],
+        "cancelled_bookings": values["bookings_status:cancelled"],
+        "recent_users": sum(values[key] for key in recent_users),
+        "recent_bookings": sum(values[key] for key in recent_bookings),
+        "hotel_owners": values[owners_key],
+    }
+
+
+def booking_status_counts():
+    """Число бронирований по статусам для admin.bookings_list."""
+    values = StatsCounter.values(
+        ["bookings"] + [f"bookings_status:{status}" for status in BOOKING_STATUSES])
+    counts = {"all": values["bookings"]}
+    for status in BOOKING_STATUSES:
+        counts[status] = values[f"bookings_status:{status}"]
+    return counts
+
+
+def rebuild():
+    """Пересчитывает все счётчики по текущим данным (в текущей транзакции)."""
+    counters = Counter()
+    counters["users"] = User.query.count()
+    counters["hotels"] = Hotel.query.count()
+    counters["bookings"] = Booking.query.count()
+
+    for role, count in db.session.query(User.role, func.count()).group_by(User.role):
+        counters[_role_key(role)] = count
+    for status, count in db.session.query(Booking.status, func.count()).group_by(Booking.status):
+        counters[f"bookings_status:{status}"] = count
+
+    for prefix, model in (("users_created", User), ("bookings_created", Booking)):
+        day = func.date(model.created_at)
+        for value, count in db.session.query(day, func.count()).group_by(day):
+            if value:
+                counters[f"{prefix}:{value}"] = count
+
+    # Метки версий не сбрасываем (иначе старое значение можно принять за
+    # текущее), а сдвигаем: данные могли меняться в обход приложения
+    db.session.execute(db.delete(StatsCounter).where(
+        StatsCounter.name.not_in(VERSIONS)))
+    counters.update(dict.fromkeys(VERSIONS, 1))
+    adjust(db.session.connection(), counters)
+    return counters
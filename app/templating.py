@@ -0,0 +1,36 @@
+"""
+Кеш байткода шаблонов Jinja и их предварительная компиляция.
+
+Без кеша каждый воркер компилирует шаблон при первом обращении к нему
+(в hotel_detail.html и admin/dashboard.html — сотни строк со стилями),
+и после каждого деплоя или перезапуска воркера первые запросы заметно
+медленнее. FileSystemBytecodeCache хранит скомпилированный код в
+instance/jinja_cache: файл общий для всех воркеров, ключ — имя шаблона
+и хеш исходника, поэтому изменённый шаблон просто получает новую запись.
+
+`flask build-templates` компилирует все шаблоны заранее (шаг сборки, как
+build-assets). Под gunicorn/uWSGI с предзагрузкой шаблоны компилируются
+ещё и в мастере (app/server.py), и воркеры получают их через fork.
+"""
+
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+
+def init_app(app):
+    if not app.config.get("JINJA_BYTECODE_CACHE_ENABLED", True):
+        return
+    directory = app.config.get("JINJA_BYTECODE_CACHE_DIR") or os.path.join(
+        app.instance_path, "jinja_cache")
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def precompile(app):
+    """Компилирует все HTML-шаблоны приложения; возвращает их имена."""
+    env = app.jinja_env
+    names = env.list_templates(extensions=("html",))
+    for name in names:
+        env.get_template(name)
+    return names
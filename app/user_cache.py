@@ -0,0 +1,114 @@
+"""
+Кеш пользователей для Flask-Login.
+
+load_user вызывается на каждом запросе авторизованного пользователя,
+хотя шапке и admin_required нужны только имя и роль. Загруженный User
+хранится в памяти процесса (ограниченный LRU с TTL) в отсоединённом виде;
+на запрос он подключается к сессии через merge(load=False) — без SELECT.
+
+Запись в кеше сверяется с меткой версии пользователя. Метка
+увеличивается после commit, изменившего или удалившего пользователя
+(смена роли, профиля, пароля), и хранится в общем хранилище кеша
+страниц (page_cache.backend). С бэкендом "sqlite" её видят все
+воркеры, поэтому смена роли и удаление действуют сразу.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from .extensions import db
+from .models.user import User
+from .page_cache import page_cache
+
+_CHANGED_KEY = "user_cache_changed"
+
+
+def _version_tag(user_id):
+    return f"user:{user_id}"
+
+
+class UserCache:
+    """Кеш пользователей для load_user (один экземпляр на процесс)."""
+
+    def __init__(self):
+        self.enabled = True
+        self.ttl = 300
+        self.max_entries = 1024
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get("USER_CACHE_ENABLED", True)
+        self.ttl = app.config.get("USER_CACHE_TTL", 300)
+        self.max_entries = app.config.get("USER_CACHE_MAX_ENTRIES", 1024)
+        self.clear()
+        app.extensions["user_cache"] = self
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, user_ids):
+        """Сбрасывает пользователей здесь и увеличивает их метки для всех воркеров."""
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+        page_cache.invalidate({_version_tag(user_id) for user_id in user_ids})
+
+    def _version(self, user_id):
+        tag = _version_tag(user_id)
+        return page_cache.backend.versions([tag])[tag]
+
+    def load(self, user_id):
+        """User для текущей сессии БД или None, если пользователя нет."""
+        if not self.enabled or page_cache.backend is None:
+            return db.session.get(User, user_id)
+
+        version = self._version(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == version and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                return db.session.merge(entry[2], load=False)
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            with self._lock:
+                self._entries.pop(user_id, None)
+            return None
+
+        # В кеше — отсоединённая копия: commit текущего запроса
+        # не сбросит её атрибуты, а запрос работает со своим экземпляром
+        db.session.expunge(user)
+        with self._lock:
+            self._entries[user_id] = (version, now + self.ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return db.session.merge(user, load=False)
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _track_user(mapper, connection, target):
+    object_session(target).info.setdefault(_CHANGED_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_versions(session):
+    user_ids = session.info.pop(_CHANGED_KEY, None)
+    if user_ids:
+        user_cache.invalidate(user_ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session, previous_transaction):
+    session.info.pop(_CHANGED_KEY, None)
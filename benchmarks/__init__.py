@@ -0,0 +1,57 @@
+"""
+Нагрузочные замеры приложения на синтетических данных.
+
+    python -m benchmarks seed --db instance/bench.db --hotels 2000 --bookings 100000
+    python -m benchmarks run --db instance/bench.db --target client
+    python -m benchmarks run --db instance/bench.db --target gunicorn --workers 4
+    python -m benchmarks compare benchmarks/results/a.json benchmarks/results/b.json
+
+seed (datagen.py) заполняет отдельную базу SQLite пользователями, отелями,
+номерами и бронированиями. Генератор детерминирован (--seed): одинаковые
+параметры дают одинаковые данные на любом коммите (даты отсчитываются
+от текущего дня).
+
+run (runner.py) прогоняет сценарии (scenarios.py) через реальные маршруты —
+тестовым клиентом Flask в том же процессе или по HTTP через локальный
+gunicorn — и сохраняет JSON с p50/p95/p99, пропускной способностью и
+числом SQL-запросов на запрос. Файлы результатов сравниваются командой
+compare. Сценарий book_room добавляет брони, поэтому для сравнения
+коммитов базу стоит пересоздавать тем же seed перед каждым прогоном.
+
+Приложение для замеров собирается с обычной конфигурацией, кроме пути к
+базе, отдельного файла кеша страниц, профиля SQL для каждого запроса и
+выключенной CSRF-защиты форм (иначе каждый POST требовал бы лишнего GET
+за токеном).
+"""
+
+import os
+
+from app import create_app
+from app.config import Config
+
+DATABASE_ENV = "BENCH_DATABASE"
+
+
+def bench_config(db_path, **overrides):
+    """Класс конфигурации для замеров поверх базового Config."""
+    db_path = os.path.abspath(db_path)
+    settings = {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "RESPONSE_CACHE_PATH": db_path + ".cache",
+        "WTF_CSRF_ENABLED": False,
+        # Число SQL-запросов runner берёт из заголовка Server-Timing
+        "SQL_PROFILE_SAMPLE_RATE": 1.0,
+        **overrides,
+    }
+    return type("BenchConfig", (Config,), settings)
+
+
+def create_bench_app(db_path=None, **overrides):
+    """
+    Приложение для замеров. Для gunicorn база передаётся через
+    переменную окружения: gunicorn "benchmarks:create_bench_app()".
+    """
+    db_path = db_path or os.environ[DATABASE_ENV]
+    if os.environ.get("BENCH_NO_PAGE_CACHE"):
+        overrides.setdefault("RESPONSE_CACHE_ENABLED", False)
+    return create_app(bench_config(db_path, **overrides))
@@ -0,0 +1,91 @@
+"""
+Командная строка замеров: python -m benchmarks seed|run|compare.
+"""
+
+import json
+import os
+
+import click
+
+from . import create_bench_app, datagen, runner
+from .scenarios import SCENARIOS
+
+DEFAULT_DB = os.path.join(runner.ROOT, "instance", "bench.db")
+
+
+@click.group()
+def cli():
+    """Синтетические данные и нагрузочные замеры."""
+
+
+@cli.command()
+@click.option("--db", "db_path", default=DEFAULT_DB, show_default=True,
+              type=click.Path(dir_okay=False), help="Файл базы для замеров.")
+@click.option("--users", default=2000, show_default=True)
+@click.option("--hotels", default=500, show_default=True)
+@click.option("--rooms-min", default=3, show_default=True,
+              help="Минимум номеров в отеле.")
+@click.option("--rooms-max", default=12, show_default=True,
+              help="Максимум номеров в отеле.")
+@click.option("--bookings", default=20000, show_default=True)
+@click.option("--skew", default=1.1, show_default=True,
+              help="Показатель Ципфа для популярности отелей и городов.")
+@click.option("--seed", default=42, show_default=True)
+@click.option("--yes", is_flag=True, help="Не спрашивать подтверждение.")
+def seed(db_path, users, hotels, rooms_min, rooms_max, bookings, skew, seed, yes):
+    """Пересоздаёт базу для замеров и заполняет её синтетическими данными."""
+    if os.path.exists(db_path) and not yes:
+        click.confirm(f"Все данные в {db_path} будут удалены. Продолжить?", abort=True)
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    app = create_bench_app(db_path)
+    with app.app_context():
+        counts = datagen.generate(users=users, hotels=hotels, rooms_min=rooms_min,
+                                  rooms_max=rooms_max, bookings=bookings,
+                                  seed=seed, skew=skew, echo=click.echo)
+    click.echo("Готово: " + ", ".join(f"{k} {v}" for k, v in counts.items()))
+
+
+@cli.command()
+@click.option("--db", "db_path", default=DEFAULT_DB, show_default=True,
+              type=click.Path(exists=True, dir_okay=False))
+@click.option("--target", type=click.Choice(["client", "gunicorn"]),
+              default="client", show_default=True)
+@click.option("--url", help="Адрес уже запущенного сервера (вместо --target).")
+@click.option("--scenario", "scenarios", multiple=True,
+              type=click.Choice(list(SCENARIOS)),
+              help="Сценарий; можно указать несколько. По умолчанию — все.")
+@click.option("--requests", default=200, show_default=True,
+              help="Запросов на сценарий (без прогрева).")
+@click.option("--warmup", default=20, show_default=True)
+@click.option("--concurrency", default=1, show_default=True,
+              help="Параллельных сессий.")
+@click.option("--workers", default=2, show_default=True,
+              help="Воркеров gunicorn (--target gunicorn).")
+@click.option("--no-page-cache", is_flag=True,
+              help="Выключить кеш страниц, чтобы мерить рендеринг.")
+@click.option("--seed", default=1, show_default=True)
+@click.option("--output", type=click.Path(dir_okay=False),
+              help="Файл результата; по умолчанию benchmarks/results/<время>-<коммит>-<цель>.json.")
+def run(db_path, target, url, scenarios, requests, warmup, concurrency,
+        workers, no_page_cache, seed, output):
+    """Прогоняет сценарии и сохраняет результат в JSON."""
+    result = runner.run(db_path, target=target, scenarios=scenarios,
+                        requests=requests, warmup=warmup, concurrency=concurrency,
+                        workers=workers, url=url, seed=seed,
+                        page_cache_enabled=not no_page_cache, echo=click.echo)
+    output = output or runner.default_output(result)
+    runner.save(result, output)
+    click.echo(f"Результат: {output}")
+
+
+@cli.command()
+@click.argument("before", type=click.File(encoding="utf-8"))
+@click.argument("after", type=click.File(encoding="utf-8"))
+def compare(before, after):
+    """Сравнивает два файла результатов (время — в мс)."""
+    for line in runner.compare(json.load(before), json.load(after)):
+        click.echo(line)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,268 @@
+"""
+Генератор синтетических данных для замеров.
+
+Данные пишутся пачками через INSERT ... executemany, минуя ORM, поэтому
+производные таблицы заполняются здесь же: журнал room_nights — вместе с
+бронированиями, счётчики статистики — stats.rebuild() в конце.
+Поисковый индекс FTS обновляют триггеры базы.
+
+Распределения приближены к реальным:
+- популярность отелей и городов подчиняется закону Ципфа (--skew):
+  небольшая доля «горячих» отелей собирает большую часть броней;
+- бронь создаётся в случайный момент последнего года, заезд — через
+  экспоненциально распределённый срок (в среднем три недели), короткие
+  поездки встречаются чаще длинных, с пиком на неделе;
+- активные брони одного номера не пересекаются: при конфликте выбирается
+  другой номер того же отеля, а если свободного нет — бронь отменена.
+"""
+
+import random
+from bisect import bisect
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import insert, text
+
+from app import stats
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.hotel import Hotel
+from app.models.room import Room
+from app.models.room_night import RoomNight
+from app.models.user import User, UserRole, phone_digits
+from app.passwords import hash_password
+
+PASSWORD = "bench-password"
+ADMIN_EMAIL = "admin@bench.example.com"
+
+CITIES = ("Москва", "Санкт-Петербург", "Сочи", "Казань", "Калининград",
+          "Екатеринбург", "Новосибирск", "Нижний Новгород", "Ярославль",
+          "Владивосток", "Иркутск", "Суздаль", "Псков", "Мурманск", "Томск",
+          "Пятигорск", "Кисловодск", "Анапа", "Геленджик", "Самара")
+FIRST_NAMES = ("Александр", "Мария", "Иван", "Анна", "Дмитрий", "Елена",
+               "Сергей", "Ольга", "Андрей", "Наталья", "Павел", "Татьяна")
+LAST_NAMES = ("Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев",
+              "Петров", "Соколов", "Михайлов", "Новиков", "Фёдоров")
+HOTEL_WORDS = ("Гранд", "Парк", "Ривьера", "Империал", "Волна", "Сосны",
+               "Панорама", "Бриз", "Уют", "Старый город", "Северная", "Маяк")
+ROOM_TYPES = (
+    # название, базовая цена, вместимость
+    ("Эконом", 1800, 1), ("Стандарт", 3200, 2), ("Улучшенный", 4500, 2),
+    ("Семейный", 6500, 4), ("Полулюкс", 8000, 3), ("Люкс", 14000, 4),
+)
+AMENITIES = ("Wi-Fi", "Кондиционер", "Мини-бар", "Сейф", "Балкон",
+             "Вид на море", "Ванна", "Кофемашина", "Телевизор")
+
+# Длительность проживания в ночах и её относительная частота
+STAY_NIGHTS = tuple(range(1, 15))
+STAY_WEIGHTS = tuple(10 / n + (6 if n == 7 else 0) for n in STAY_NIGHTS)
+MEAN_LEAD_DAYS = 21
+MAX_LEAD_DAYS = 300
+
+
+class Picker:
+    """Выбор элемента с весами Ципфа: вес ранга r равен 1 / r**skew."""
+
+    def __init__(self, rng, items, skew):
+        self.rng = rng
+        self.items = list(items)
+        rng.shuffle(self.items)  # «горячие» — не обязательно первые по id
+        self.cum_weights = list(accumulate(
+            1 / rank ** skew for rank in range(1, len(self.items) + 1)))
+
+    def pick(self):
+        point = self.rng.random() * self.cum_weights[-1]
+        return self.items[bisect(self.cum_weights, point)]
+
+
+def _insert(model, rows):
+    if rows:
+        db.session.execute(insert(model.__table__), rows)
+
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _created_at(rng, now, days):
+    return now - timedelta(seconds=rng.uniform(0, days * 86400))
+
+
+def generate_users(rng, now, count, owners):
+    """Администратор, владельцы отелей и гости; у всех пароль PASSWORD."""
+    password_hash = hash_password(PASSWORD)  # один раз: хеширование дорогое
+    rows = []
+    for i in range(1, count + 1):
+        if i == 1:
+            role, email = UserRole.ADMIN, ADMIN_EMAIL
+        elif i <= owners + 1:
+            role, email = UserRole.HOTEL_OWNER, f"owner{i}@bench.example.com"
+        else:
+            role, email = UserRole.USER, f"user{i}@bench.example.com"
+        phone = f"+7900{i:07d}"
+        created = _created_at(rng, now, 730)
+        rows.append({
+            "id": i, "email": email, "phone": phone,
+            "phone_digits": phone_digits(phone),
+            "password_hash": password_hash,
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "role": role, "created_at": created, "updated_at": created,
+        })
+    return rows
+
+
+def generate_hotels(rng, now, count, owner_ids, skew):
+    cities = Picker(rng, CITIES, skew)
+    rows = []
+    for i in range(1, count + 1):
+        city = cities.pick()
+        created = _created_at(rng, now, 730)
+        rows.append({
+            "id": i, "owner_id": rng.choice(owner_ids),
+            "name": f"{rng.choice(HOTEL_WORDS)} {i}",
+            "description": f"Отель в городе {city}. " + ", ".join(
+                rng.sample(AMENITIES, 3)),
+            "address": f"{city}, ул. Центральная, {rng.randint(1, 200)}",
+            "city": city, "phone": f"+7495{i:07d}",
+            "email": f"hotel{i}@bench.example.com",
+            "created_at": created, "updated_at": created,
+        })
+    return rows
+
+
+def generate_rooms(rng, now, hotel_ids, rooms_min, rooms_max):
+    rows = []
+    for hotel_id in hotel_ids:
+        for _ in range(rng.randint(rooms_min, rooms_max)):
+            name, base_price, capacity = rng.choice(ROOM_TYPES)
+            created = _created_at(rng, now, 365)
+            rows.append({
+                "id": len(rows) + 1, "hotel_id": hotel_id, "name": name,
+                "description": f"{name} номер",
+                "price_per_night": int(round(base_price * rng.uniform(0.7, 1.6), -1)),
+                "capacity": capacity,
+                "amenities": ", ".join(rng.sample(AMENITIES, rng.randint(2, 5))),
+                "created_at": created, "updated_at": created,
+            })
+    return rows
+
+
+def _status(rng, check_in, today):
+    if check_in < today:
+        return "cancelled" if rng.random() < 0.12 else "confirmed"
+    roll = rng.random()
+    return "pending" if roll < 0.15 else "cancelled" if roll < 0.25 else "confirmed"
+
+
+def generate_bookings(rng, now, count, guest_ids, hotel_rooms, skew):
+    """
+    Генератор строк bookings. Занятые ночи номеров отслеживаются
+    в памяти: активные брони не пересекаются.
+    """
+    hotels = Picker(rng, list(hotel_rooms), skew)
+    guests = Picker(rng, guest_ids, 0.5)  # есть частые путешественники
+    occupied = {}
+    today = now.date()
+
+    for booking_id in range(1, count + 1):
+        created = _created_at(rng, now, 365)
+        lead = min(int(rng.expovariate(1 / MEAN_LEAD_DAYS)), MAX_LEAD_DAYS)
+        check_in = created.date() + timedelta(days=lead)
+        nights = rng.choices(STAY_NIGHTS, STAY_WEIGHTS)[0]
+        check_out = check_in + timedelta(days=nights)
+        status = _status(rng, check_in, today)
+
+        candidates = hotel_rooms[hotels.pick()]
+        room = rng.choice(candidates)
+        stay = RoomNight.nights(check_in, check_out)
+        if status != "cancelled":
+            free = [r for r in rng.sample(candidates, min(3, len(candidates)))
+                    if occupied.get(r["id"], set()).isdisjoint(stay)]
+            if free:
+                room = free[0]
+                occupied.setdefault(room["id"], set()).update(stay)
+            else:
+                status = "cancelled"
+
+        yield {
+            "id": booking_id, "user_id": guests.pick(), "room_id": room["id"],
+            "check_in": check_in, "check_out": check_out,
+            "guests": rng.randint(1, room["capacity"]),
+            "total_price": nights * room["price_per_night"],
+            "status": status, "created_at": created,
+            # Изменения статуса — не позже сегодняшнего дня
+            "updated_at": min(created + timedelta(days=rng.randint(0, 3)), now),
+        }
+
+
+def generate(users=2000, hotels=500, rooms_min=3, rooms_max=12,
+             bookings=20000, seed=42, skew=1.1, batch_size=5000, echo=print):
+    """
+    Пересоздаёт таблицы текущей базы и заполняет их. Вызывается в
+    контексте приложения; возвращает число созданных строк по таблицам.
+    """
+    rng = random.Random(seed)
+    now = datetime.combine(date.today(), datetime.min.time()) + timedelta(hours=12)
+    owners = max(1, min(users - 1, hotels // 5))
+    if users - owners - 1 < 1:
+        raise ValueError("Пользователей должно быть больше, чем владельцев отелей + 1")
+
+    db.drop_all()
+    db.create_all()
+
+    user_rows = generate_users(rng, now, users, owners)
+    for chunk in _chunks(user_rows, batch_size):
+        _insert(User, chunk)
+    owner_ids = [row["id"] for row in user_rows if row["role"] is UserRole.HOTEL_OWNER]
+    guest_ids = [row["id"] for row in user_rows if row["role"] is UserRole.USER]
+    echo(f"Пользователей: {len(user_rows)}")
+
+    hotel_rows = generate_hotels(rng, now, hotels, owner_ids, skew)
+    for chunk in _chunks(hotel_rows, batch_size):
+        _insert(Hotel, chunk)
+    echo(f"Отелей: {len(hotel_rows)}")
+
+    room_rows = generate_rooms(rng, now, [row["id"] for row in hotel_rows],
+                               rooms_min, rooms_max)
+    for chunk in _chunks(room_rows, batch_size):
+        _insert(Room, chunk)
+    echo(f"Номеров: {len(room_rows)}")
+    db.session.commit()
+
+    hotel_rooms = {}
+    for room in room_rows:
+        hotel_rooms.setdefault(room["hotel_id"], []).append(room)
+
+    booking_total = night_total = 0
+    batch, nights = [], []
+    for booking in generate_bookings(rng, now, bookings, guest_ids, hotel_rooms, skew):
+        batch.append(booking)
+        if booking["status"] != "cancelled":
+            nights.extend(RoomNight.rows_for(
+                booking["id"], booking["room_id"],
+                booking["check_in"], booking["check_out"]))
+        if len(batch) >= batch_size:
+            _insert(Booking, batch)
+            _insert(RoomNight, nights)
+            booking_total += len(batch)
+            night_total += len(nights)
+            batch, nights = [], []
+            db.session.commit()
+            echo(f"Бронирований: {booking_total}")
+    _insert(Booking, batch)
+    _insert(RoomNight, nights)
+    booking_total += len(batch)
+    night_total += len(nights)
+
+    stats.rebuild()
+    db.session.commit()
+    # Статистика планировщика как у «живой» базы
+    db.session.execute(text("ANALYZE"))
+    db.session.commit()
+    echo(f"Бронирований: {booking_total}, занятых ночей: {night_total}")
+
+    return {"users": len(user_rows), "hotels": len(hotel_rows),
+            "rooms": len(room_rows), "bookings": booking_total,
+            "room_nights": night_total}
@@ -0,0 +1,365 @@
+"""
+Прогон сценариев и отчёт о результатах.
+
+Каждый сценарий выполняется отдельно: сначала прогрев (--warmup), затем
+заданное число запросов в --concurrency потоков, у каждого потока своя
+сессия (клиент и cookie). Для сценария считаются p50/p95/p99 и среднее
+время ответа, пропускная способность, доля попаданий в кеш страниц
+(заголовок X-Cache) и число SQL-запросов на запрос (заголовок
+Server-Timing, профиль включается для всех запросов).
+
+Цели:
+- "client" — тестовый клиент Flask в том же процессе, без сети и воркеров;
+- "gunicorn" — локальный gunicorn с --workers воркерами, запросы по HTTP
+  (или уже запущенный сервер по --url; число SQL известно, только если
+  у него SQL_PROFILE_SAMPLE_RATE = 1).
+"""
+
+import json
+import logging
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.cookiejar import CookieJar
+from itertools import count
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import (
+    HTTPCookieProcessor, HTTPRedirectHandler, Request as UrlRequest, build_opener
+)
+
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.user import User
+from app.page_cache import page_cache
+
+from . import DATABASE_ENV, create_bench_app
+from .scenarios import SCENARIOS, Dataset, Request, credentials
+
+PERCENTILES = (50, 95, 99)
+_STATEMENTS = re.compile(r'db;[^,]*desc="(\d+) statements"')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def sql_statements(headers):
+    """Число SQL-запросов из заголовка Server-Timing (app/instrumentation.py)."""
+    match = _STATEMENTS.search(headers.get("Server-Timing", ""))
+    return int(match.group(1)) if match else None
+
+
+class ClientSession:
+    """Сессия тестового клиента Flask."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, request):
+        response = self.client.open(request.path, method=request.method,
+                                    data=request.data)
+        response.get_data()
+        return response.status_code, response.headers.get("X-Cache"), \
+            sql_statements(response.headers)
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    # Редирект — сам по себе результат запроса (например, после брони)
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """HTTP-сессия с cookie; редиректы не выполняются."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()), _NoRedirect())
+
+    def send(self, request):
+        data = urlencode(request.data).encode() if request.data else None
+        url_request = UrlRequest(self.base_url + request.path, data=data,
+                                 method=request.method)
+        try:
+            with self.opener.open(url_request, timeout=60) as response:
+                response.read()
+                return response.status, response.headers.get("X-Cache"), \
+                    sql_statements(response.headers)
+        except HTTPError as e:
+            e.read()
+            return e.code, e.headers.get("X-Cache"), sql_statements(e.headers)
+
+
+@contextmanager
+def client_target(app):
+    """Тестовый клиент Flask в том же процессе."""
+    # Журнал профиля (app/instrumentation.py) здесь только мешал бы отчёту
+    profile_logger = logging.getLogger("app.instrumentation")
+    level = profile_logger.level
+    profile_logger.setLevel(logging.ERROR)
+    try:
+        yield lambda: ClientSession(app)
+    finally:
+        profile_logger.setLevel(level)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn завершился с кодом {process.returncode}")
+        try:
+            with build_opener(_NoRedirect()).open(url + "/login", timeout=5):
+                return
+        except HTTPError:
+            return
+        except (URLError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError(f"gunicorn не ответил за {timeout} с")
+
+
+@contextmanager
+def gunicorn_target(db_path, workers, page_cache_enabled=True):
+    """Запускает локальный gunicorn на свободном порту на время прогона."""
+    port = _free_port()
+    env = dict(os.environ, **{DATABASE_ENV: os.path.abspath(db_path)})
+    if not page_cache_enabled:
+        env["BENCH_NO_PAGE_CACHE"] = "1"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--workers", str(workers),
+         "--bind", f"127.0.0.1:{port}", "--log-level", "warning",
+         "benchmarks:create_bench_app()"],
+        cwd=ROOT, env=env)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_until_ready(url, process)
+        yield lambda: HttpSession(url)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+@contextmanager
+def http_target(url):
+    """Уже запущенный сервер."""
+    yield lambda: HttpSession(url)
+
+
+def _login(session, creds):
+    email, password = creds
+    status, _, _ = session.send(Request("POST", "/login",
+                                        {"email": email, "password": password}))
+    if status != 302:
+        raise RuntimeError(f"Не удалось войти как {email}: ответ {status}")
+
+
+def percentile(sorted_values, p):
+    """Перцентиль методом ближайшего ранга."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def run_scenario(scenario, make_session, data, requests, warmup=20,
+                 concurrency=1, seed=1):
+    """Прогоняет сценарий и возвращает сводку (см. summarize)."""
+    samples = []
+    lock = threading.Lock()
+    numbers = count()
+    ready = threading.Barrier(concurrency + 1)
+    failures = []
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        try:
+            session = make_session()
+            creds = credentials(scenario.session, data, rng)
+            if creds:
+                _login(session, creds)
+            for _ in range(max(1, warmup // concurrency)):
+                session.send(scenario.build(data, rng))
+        except Exception as e:
+            failures.append(e)
+            ready.abort()
+            return
+        try:
+            ready.wait()
+        except threading.BrokenBarrierError:
+            return  # прогрев не удался в другом потоке
+
+        while next(numbers) < requests:
+            request = scenario.build(data, rng)
+            started = time.perf_counter()
+            try:
+                status, cache, statements = session.send(request)
+            except Exception:
+                status, cache, statements = None, None, None
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples.append((elapsed, status, cache, statements))
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True)
+               for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        for thread in threads:
+            thread.join()
+        raise failures[0] if failures else RuntimeError("Прогрев не удался")
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return summarize(scenario, samples, time.perf_counter() - started)
+
+
+def summarize(scenario, samples, wall_time):
+    latencies = sorted(elapsed * 1000 for elapsed, *_ in samples)
+    statuses = Counter(str(status) for _, status, _, _ in samples)
+    errors = sum(1 for _, status, _, _ in samples if status not in scenario.expected)
+    statements = [value for *_, value in samples if value is not None]
+    cache_states = [cache for _, _, cache, _ in samples if cache]
+
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "statuses": dict(statuses),
+        "throughput_rps": round(len(samples) / wall_time, 2) if wall_time else None,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            **{f"p{p}": round(percentile(latencies, p), 3) if latencies else None
+               for p in PERCENTILES},
+            "max": round(latencies[-1], 3) if latencies else None,
+        },
+        "sql_per_request": {
+            "mean": round(sum(statements) / len(statements), 2),
+            "max": max(statements),
+        } if statements else None,
+        "cache_hit_ratio": round(
+            cache_states.count("HIT") / len(cache_states), 3) if cache_states else None,
+    }
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(app, data, **options):
+    """Сведения о прогоне: коммит, окружение, размер данных, параметры."""
+    with app.app_context():
+        dataset = {**data.summary,
+                   "users": db.session.query(func.count(User.id)).scalar(),
+                   "bookings": db.session.query(func.count(Booking.id)).scalar()}
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "dataset": dataset,
+        "options": options,
+    }
+
+
+def run(db_path, target="client", scenarios=None, requests=200, warmup=20,
+        concurrency=1, workers=2, url=None, page_cache_enabled=True, seed=1,
+        echo=print):
+    """Прогоняет сценарии и возвращает результат для сохранения в JSON."""
+    app = create_bench_app(db_path, RESPONSE_CACHE_ENABLED=page_cache_enabled)
+    with app.app_context():
+        data = Dataset.load()
+        page_cache.clear()  # прогоны сравнимы: кеш страниц в начале пуст
+
+    if url:
+        target = "http"
+        target_context = http_target(url)
+    elif target == "gunicorn":
+        target_context = gunicorn_target(db_path, workers, page_cache_enabled)
+    else:
+        target_context = client_target(app)
+
+    result = {
+        "meta": metadata(app, data, target=target, url=url, requests=requests,
+                         warmup=warmup, concurrency=concurrency,
+                         workers=workers if target == "gunicorn" else None,
+                         page_cache=page_cache_enabled, seed=seed),
+        "scenarios": {},
+    }
+    with target_context as make_session:
+        for name in scenarios or SCENARIOS:
+            summary = run_scenario(SCENARIOS[name], make_session, data, requests,
+                                   warmup, concurrency, seed)
+            result["scenarios"][name] = summary
+            echo(format_summary(name, summary))
+    return result
+
+
+def format_summary(name, summary):
+    latency = summary["latency_ms"]
+    sql = summary["sql_per_request"]
+    return (f"{name:<16} p50 {latency['p50']:>8.2f}  p95 {latency['p95']:>8.2f}  "
+            f"p99 {latency['p99']:>8.2f} мс  {summary['throughput_rps']:>8.1f} зап/с  "
+            f"SQL {sql['mean'] if sql else '-':>6}  ошибок {summary['errors']}")
+
+
+def default_output(result):
+    meta = result["meta"]
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    name = f"{stamp}-{meta['commit'] or 'nogit'}-{meta['options']['target']}.json"
+    return os.path.join(RESULTS_DIR, name)
+
+
+def save(result, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+COMPARED = (
+    ("p50", lambda s: s["latency_ms"]["p50"]),
+    ("p95", lambda s: s["latency_ms"]["p95"]),
+    ("p99", lambda s: s["latency_ms"]["p99"]),
+    ("зап/с", lambda s: s["throughput_rps"]),
+    ("SQL", lambda s: s["sql_per_request"] and s["sql_per_request"]["mean"]),
+)
+
+
+def compare(before, after):
+    """Строки таблицы сравнения двух результатов по общим сценариям."""
+    lines = [f"{before['meta']['commit']} -> {after['meta']['commit']}"]
+    for name, old in before["scenarios"].items():
+        new = after["scenarios"].get(name)
+        if new is None:
+            continue
+        cells = []
+        for label, value in COMPARED:
+            a, b = value(old), value(new)
+            if a is None or b is None:
+                continue
+            delta = f"{(b - a) / a * 100:+.0f}%" if a else "n/a"
+            cells.append(f"{label} {a:g} -> {b:g} ({delta})")
+        lines.append(f"{name:<16} " + "  ".join(cells))
+    return lines
@@ -0,0 +1,140 @@
+"""
+Сценарии замеров: какой маршрут вызывать и от чьего имени.
+
+Параметры запросов выбираются из данных базы с тем же перекосом, что
+у реальной нагрузки: популярные города и отели запрашиваются чаще
+(вес отеля — число его бронирований).
+"""
+
+import random
+from datetime import date, timedelta
+from typing import Callable, NamedTuple
+from urllib.parse import urlencode
+
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.hotel import Hotel
+from app.models.room import Room
+from app.models.user import User, UserRole
+
+from .datagen import ADMIN_EMAIL, PASSWORD
+
+BOOKING_STATUSES = ("all", "pending", "confirmed", "cancelled")
+
+
+class Dataset:
+    """Города, отели, номера и гости базы — источник параметров запросов."""
+
+    def __init__(self, cities, hotels, rooms, guest_emails):
+        self.cities, self.city_weights = zip(*cities)
+        self.hotels, self.hotel_weights = zip(*hotels)
+        self.rooms = rooms
+        self.guest_emails = guest_emails
+
+    @classmethod
+    def load(cls, guests=200):
+        """Читает данные в контексте приложения."""
+        cities = db.session.query(Hotel.city, func.count()).group_by(Hotel.city).all()
+        popularity = dict(
+            db.session.query(Room.hotel_id, func.count(Booking.id))
+            .join(Booking, Booking.room_id == Room.id)
+            .group_by(Room.hotel_id))
+        rooms = {}
+        for room_id, hotel_id, capacity in db.session.query(
+                Room.id, Room.hotel_id, Room.capacity).order_by(Room.id):
+            rooms.setdefault(hotel_id, []).append((room_id, capacity))
+        hotels = [(hotel_id, popularity.get(hotel_id, 0) + 1) for hotel_id in rooms]
+        guest_emails = [email for email, in db.session.query(User.email)
+                        .filter(User.role == UserRole.USER)
+                        .order_by(User.id).limit(guests)]
+        if not hotels or not guest_emails:
+            raise ValueError("В базе нет данных: сначала выполните `python -m benchmarks seed`")
+        return cls(cities, hotels, rooms, guest_emails)
+
+    @property
+    def summary(self):
+        return {"cities": len(self.cities), "hotels": len(self.hotels),
+                "rooms": sum(len(rooms) for rooms in self.rooms.values())}
+
+    def city(self, rng):
+        return rng.choices(self.cities, self.city_weights)[0]
+
+    def hotel(self, rng):
+        return rng.choices(self.hotels, self.hotel_weights)[0]
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    data: dict | None = None
+
+
+class Scenario(NamedTuple):
+    name: str
+    # Чья сессия: "anonymous", "user" или "admin"
+    session: str
+    build: Callable[[Dataset, random.Random], Request]
+    # Коды ответа, которые считаются успешными
+    expected: tuple = (200,)
+
+
+def _stay(rng, earliest=1, latest=60):
+    check_in = date.today() + timedelta(days=rng.randint(earliest, latest))
+    return check_in, check_in + timedelta(days=rng.randint(1, 7))
+
+
+def _stay_params(rng):
+    # Треть запросов — с поиском по датам (проверка занятости)
+    if rng.random() >= 1 / 3:
+        return {}
+    check_in, check_out = _stay(rng)
+    return {"check_in": check_in, "check_out": check_out,
+            "guests": rng.randint(1, 3)}
+
+
+def _catalog(data, rng):
+    query = urlencode({"city": data.city(rng), **_stay_params(rng)})
+    return Request("GET", f"/catalog?{query}")
+
+
+def _hotel(data, rng):
+    query = urlencode(_stay_params(rng))
+    return Request("GET", f"/hotel/{data.hotel(rng)}" + (f"?{query}" if query else ""))
+
+
+def _book(data, rng):
+    hotel_id = data.hotel(rng)
+    room_id, capacity = rng.choice(data.rooms[hotel_id])
+    # Даты подальше от сгенерированных броней, чтобы конфликты были редки
+    check_in, check_out = _stay(rng, 200, 700)
+    return Request("POST", f"/hotel/{hotel_id}/room/{room_id}/book", {
+        "check_in": check_in.isoformat(), "check_out": check_out.isoformat(),
+        "guests": str(rng.randint(1, capacity)),
+    })
+
+
+def _admin_bookings(data, rng):
+    return Request("GET", f"/admin/bookings?status={rng.choice(BOOKING_STATUSES)}")
+
+
+SCENARIOS = {scenario.name: scenario for scenario in (
+    Scenario("catalog", "anonymous", _catalog),
+    Scenario("hotel_detail", "anonymous", _hotel),
+    # 302 — бронь создана, 200 — форма с сообщением о занятых датах
+    Scenario("book_room", "user", _book, expected=(302, 200)),
+    Scenario("my_bookings", "user", lambda data, rng: Request("GET", "/my-bookings")),
+    Scenario("admin_users", "admin", lambda data, rng: Request("GET", "/admin/users")),
+    Scenario("admin_hotels", "admin", lambda data, rng: Request("GET", "/admin/hotels")),
+    Scenario("admin_bookings", "admin", _admin_bookings),
+)}
+
+
+def credentials(session, data, rng):
+    """(email, пароль) для входа или None для анонимной сессии."""
+    if session == "admin":
+        return ADMIN_EMAIL, PASSWORD
+    if session == "user":
+        return rng.choice(data.guest_emails), PASSWORD
+    return None
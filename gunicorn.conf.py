@@ -0,0 +1,40 @@
+"""
+Конфигурация gunicorn: gunicorn -c gunicorn.conf.py
+
+Приложение загружается один раз в мастере (preload_app), воркеры
+получают его через fork. Переменные окружения: GUNICORN_BIND,
+GUNICORN_WORKERS, GUNICORN_THREADS, GUNICORN_TIMEOUT, WORKER_WARMUP=1.
+"""
+
+import multiprocessing
+import os
+
+wsgi_app = "wsgi:application"
+bind = os.environ.get("GUNICORN_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 1))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+preload_app = True
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+accesslog = "-"
+
+
+def _app(arbiter_or_worker):
+    return arbiter_or_worker.app.wsgi()
+
+
+def on_starting(arbiter):
+    from app import server
+    import wsgi
+    arbiter.log.info("Приложение загружено за %.1f мс", wsgi.LOAD_TIME * 1000)
+    server.prepare(_app(arbiter))
+
+
+def post_fork(arbiter, worker):
+    from app import server
+    server.after_fork(_app(arbiter))
+
+
+def post_worker_init(worker):
+    from app import server
+    server.worker_ready(_app(worker), log=worker.log)
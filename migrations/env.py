@@ -0,0 +1,83 @@
+"""
+Окружение Alembic.
+
+Подключение и метаданные берутся из Flask-приложения, чтобы миграции
+работали с той же базой, что и само приложение. Приложение здесь
+минимальное — конфигурация и Flask-SQLAlchemy без create_app: иначе
+db.create_all() (DB_CREATE_ALL) создал бы новые таблицы по моделям
+раньше миграций. sqlalchemy.url в alembic.ini (или -x db_url=...)
+подменяет SQLALCHEMY_DATABASE_URI.
+
+Ревизии применяются к базе со схемой до их появления. База, созданная
+db.create_all() или `flask init-db` текущей версией, уже соответствует
+последней ревизии: её помечают командой `alembic stamp head`.
+
+Использование:
+    alembic upgrade head
+    alembic revision --autogenerate -m "описание"
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+from flask import Flask
+
+from app.config import Config
+from app.extensions import db
+
+# Все модели схемы
+from app.models import (  # noqa: F401
+    booking, hotel, review, room, room_night, stats_counter, user
+)
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+
+def create_migration_app():
+    app = Flask("app")
+    app.config.from_object(Config)
+    url = context.get_x_argument(as_dictionary=True).get("db_url") \
+        or config.get_main_option("sqlalchemy.url")
+    if url:
+        app.config["SQLALCHEMY_DATABASE_URI"] = url
+    db.init_app(app)
+    return app
+
+
+app = create_migration_app()
+target_metadata = db.metadata
+
+
+def run_migrations_offline():
+    """Генерация SQL без подключения к базе (alembic upgrade --sql)."""
+    context.configure(
+        url=app.config["SQLALCHEMY_DATABASE_URI"],
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Применение миграций к базе приложения."""
+    with app.app_context():
+        with db.engine.connect() as connection:
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                # SQLite не умеет большинство ALTER TABLE
+                render_as_batch=True,
+            )
+            with context.begin_transaction():
+                context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,77 @@
+"""Журнал room_nights и индексы для основных запросов
+
+Базовые таблицы (users, hotels, rooms, bookings, reviews) исторически
+создаются db.create_all(): ревизия добавляет к ним журнал и индексы.
+
+Журнал room_nights сразу заполняется ночами активных бронирований
+(как `flask rebuild-room-nights`): иначе проверки занятости читали бы
+пустой журнал и существующие брони можно было бы занять повторно.
+Из исторических пересечений броней ночь остаётся за более ранней
+бронью (INSERT OR IGNORE в порядке id).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (имя индекса, таблица, колонки)
+INDEXES = [
+    # Room.is_available / индекс занятости
+    ('ix_bookings_room_status_dates', 'bookings',
+     ['room_id', 'status', 'check_in', 'check_out']),
+    # user.my_bookings
+    ('ix_bookings_user_created', 'bookings', ['user_id', 'created_at']),
+    # admin.bookings_list
+    ('ix_bookings_status_created', 'bookings', ['status', 'created_at']),
+    # main.catalog, список городов в admin.hotels_list
+    ('ix_hotels_city', 'hotels', ['city']),
+    # user.my_hotels
+    ('ix_hotels_owner_id', 'hotels', ['owner_id']),
+    # main.hotel_detail, user.hotel_rooms
+    ('ix_rooms_hotel_id', 'rooms', ['hotel_id']),
+    # admin.users_list, статистика за неделю
+    ('ix_users_created_at', 'users', ['created_at']),
+    # Освобождение ночей при отмене бронирования
+    ('ix_room_nights_booking_id', 'room_nights', ['booking_id']),
+]
+
+
+def upgrade():
+    op.create_table(
+        'room_nights',
+        sa.Column('room_id', sa.Integer(), sa.ForeignKey('rooms.id'), nullable=False),
+        sa.Column('night', sa.Date(), nullable=False),
+        sa.Column('booking_id', sa.Integer(), sa.ForeignKey('bookings.id'), nullable=False),
+        sa.PrimaryKeyConstraint('room_id', 'night'),
+    )
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+    op.execute("""
+        WITH RECURSIVE nights(room_id, night, booking_id, check_out) AS (
+            SELECT room_id, check_in, id, check_out FROM bookings
+            WHERE status != 'cancelled' AND check_in < check_out
+            UNION ALL
+            SELECT room_id, date(night, '+1 day'), booking_id, check_out
+            FROM nights WHERE date(night, '+1 day') < check_out
+        )
+        INSERT OR IGNORE INTO room_nights (room_id, night, booking_id)
+        SELECT room_id, night, booking_id FROM nights ORDER BY booking_id, night
+    """)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+
+    op.drop_table('room_nights')
@@ -0,0 +1,44 @@
+"""Таблица счётчиков статистики админки
+
+Счётчики сразу заполняются по существующим данным, дальше их
+поддерживают события моделей (app/stats.py).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'stats_counters',
+        sa.Column('name', sa.String(length=64), primary_key=True),
+        sa.Column('value', sa.Integer(), nullable=False),
+    )
+
+    op.execute("""
+        INSERT INTO stats_counters (name, value)
+        SELECT 'users', COUNT(*) FROM users
+        UNION ALL SELECT 'hotels', COUNT(*) FROM hotels
+        UNION ALL SELECT 'bookings', COUNT(*) FROM bookings
+        UNION ALL SELECT 'users_role:' || role, COUNT(*) FROM users GROUP BY role
+        UNION ALL SELECT 'bookings_status:' || status, COUNT(*)
+            FROM bookings WHERE status IS NOT NULL GROUP BY status
+        UNION ALL SELECT 'users_created:' || date(created_at), COUNT(*)
+            FROM users WHERE created_at IS NOT NULL GROUP BY date(created_at)
+        UNION ALL SELECT 'bookings_created:' || date(created_at), COUNT(*)
+            FROM bookings WHERE created_at IS NOT NULL GROUP BY date(created_at)
+    """)
+
+
+def downgrade():
+    op.drop_table('stats_counters')
@@ -0,0 +1,66 @@
+"""Полнотекстовый индекс отелей (FTS5)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def _norm(expr):
+    # «ё» -> «е»: токенизатор unicode61 не сводит их друг к другу
+    return f"replace(replace(coalesce({expr}, ''), 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _values(prefix):
+    return ", ".join(
+        _norm(f"{prefix}.{name}")
+        for name in ('name', 'city', 'address', 'description'))
+
+
+def upgrade():
+    op.execute("""
+        CREATE VIRTUAL TABLE hotels_fts USING fts5(
+            name, city, address, description,
+            content='', tokenize='unicode61 remove_diacritics 2')
+    """)
+    op.execute(f"""
+        CREATE TRIGGER hotels_fts_ai AFTER INSERT ON hotels BEGIN
+            INSERT INTO hotels_fts(rowid, name, city, address, description)
+            VALUES (new.id, {_values('new')});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER hotels_fts_ad AFTER DELETE ON hotels BEGIN
+            INSERT INTO hotels_fts(hotels_fts, rowid, name, city, address, description)
+            VALUES ('delete', old.id, {_values('old')});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER hotels_fts_au
+        AFTER UPDATE OF name, city, address, description ON hotels BEGIN
+            INSERT INTO hotels_fts(hotels_fts, rowid, name, city, address, description)
+            VALUES ('delete', old.id, {_values('old')});
+            INSERT INTO hotels_fts(rowid, name, city, address, description)
+            VALUES (new.id, {_values('new')});
+        END
+    """)
+
+    op.execute(
+        "INSERT INTO hotels_fts(rowid, name, city, address, description) "
+        f"SELECT id, {_values('hotels')} FROM hotels"
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER hotels_fts_au")
+    op.execute("DROP TRIGGER hotels_fts_ad")
+    op.execute("DROP TRIGGER hotels_fts_ai")
+    op.execute("DROP TABLE hotels_fts")
@@ -0,0 +1,90 @@
+"""Индексы для поиска пользователей в админке
+
+- phone_digits: телефон без форматирования, для поиска по префиксу;
+- ix_users_email_lower: индекс по lower(email);
+- users_fts: полнотекстовый индекс по имени, фамилии и email.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('first_name', 'last_name', 'email')
+
+
+def _values(prefix):
+    # «ё» -> «е»: токенизатор unicode61 не сводит их друг к другу
+    return ", ".join(
+        f"replace(replace(coalesce({prefix}.{name}, ''), 'ё', 'е'), 'Ё', 'Е')"
+        for name in COLUMNS)
+
+
+def upgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('phone_digits', sa.String(length=20)))
+
+    users = sa.table('users', sa.column('id'), sa.column('phone'), sa.column('phone_digits'))
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(users.c.id, users.c.phone)).all()
+    if rows:
+        connection.execute(
+            users.update().where(users.c.id == sa.bindparam('user_id')),
+            [{'user_id': user_id, 'phone_digits': re.sub(r'\D', '', phone or '')}
+             for user_id, phone in rows],
+        )
+
+    op.create_index('ix_users_phone_digits', 'users', ['phone_digits'])
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')])
+
+    op.execute("""
+        CREATE VIRTUAL TABLE users_fts USING fts5(
+            first_name, last_name, email,
+            content='', tokenize='unicode61 remove_diacritics 2')
+    """)
+    op.execute(f"""
+        CREATE TRIGGER users_fts_ai AFTER INSERT ON users BEGIN
+            INSERT INTO users_fts(rowid, first_name, last_name, email)
+            VALUES (new.id, {_values('new')});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER users_fts_ad AFTER DELETE ON users BEGIN
+            INSERT INTO users_fts(users_fts, rowid, first_name, last_name, email)
+            VALUES ('delete', old.id, {_values('old')});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER users_fts_au
+        AFTER UPDATE OF first_name, last_name, email ON users BEGIN
+            INSERT INTO users_fts(users_fts, rowid, first_name, last_name, email)
+            VALUES ('delete', old.id, {_values('old')});
+            INSERT INTO users_fts(rowid, first_name, last_name, email)
+            VALUES (new.id, {_values('new')});
+        END
+    """)
+    op.execute(
+        "INSERT INTO users_fts(rowid, first_name, last_name, email) "
+        f"SELECT id, {_values('users')} FROM users"
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER users_fts_au")
+    op.execute("DROP TRIGGER users_fts_ad")
+    op.execute("DROP TRIGGER users_fts_ai")
+    op.execute("DROP TABLE users_fts")
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.drop_index('ix_users_phone_digits', table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('phone_digits')
@@ -0,0 +1,22 @@
+"""Индекс hotels(created_at) для курсорной пагинации в админке
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_hotels_created_at', 'hotels', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_hotels_created_at', table_name='hotels')
@@ -0,0 +1,22 @@
+"""Индекс bookings(updated_at) для ETag страниц с поиском по датам
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_bookings_updated_at', 'bookings', ['updated_at'])
+
+
+def downgrade():
+    op.drop_index('ix_bookings_updated_at', table_name='bookings')
@@ -0,0 +1,32 @@
+"""external_id отелей и номеров — ключ для импорта (flask import)
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+TABLES = ('hotels', 'rooms')
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('external_id', sa.String(length=64)))
+        op.create_index(f'ix_{table}_external_id', table, ['external_id'],
+                        unique=True)
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_external_id', table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('external_id')
@@ -0,0 +1,49 @@
+"""created_at обязателен у пользователей, отелей и бронирований
+
+Курсорная пагинация админки (app/pagination.py) упорядочивает строки по
+(created_at, id): строка с NULL не попала бы ни на одну страницу, а
+курсор по ней не кодировался бы. Пустые значения заполняются из
+updated_at (или минимальной датой — такие строки окажутся в конце
+списка), а вставка и обновление с NULL запрещаются триггерами: SQLite
+не умеет добавлять NOT NULL к существующему столбцу без пересоздания
+таблицы, а пересоздание удалило бы триггеры полнотекстового поиска.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+TABLES = ('users', 'hotels', 'bookings')
+
+# Формат, в котором SQLAlchemy хранит DateTime в SQLite
+EPOCH = '1970-01-01 00:00:00.000000'
+
+
+def upgrade():
+    for table in TABLES:
+        op.execute(
+            f"UPDATE {table} SET created_at = coalesce(updated_at, '{EPOCH}') "
+            f"WHERE created_at IS NULL")
+        for event in ('INSERT', 'UPDATE OF created_at'):
+            suffix = 'insert' if event == 'INSERT' else 'update'
+            op.execute(f"""
+                CREATE TRIGGER {table}_created_at_not_null_{suffix}
+                BEFORE {event} ON {table}
+                WHEN new.created_at IS NULL BEGIN
+                    SELECT RAISE(ABORT, 'NOT NULL constraint failed: {table}.created_at');
+                END
+            """)
+
+
+def downgrade():
+    for table in TABLES:
+        for suffix in ('insert', 'update'):
+            op.execute(f"DROP TRIGGER {table}_created_at_not_null_{suffix}")
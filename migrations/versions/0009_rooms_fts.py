@@ -0,0 +1,56 @@
+"""Полнотекстовый индекс названий номеров (FTS5)
+
+Поиск бронирований в админке (search.search_bookings) ищет номер по
+названию через индекс, а не LIKE по всей таблице rooms.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def _values(prefix):
+    # «ё» -> «е»: токенизатор unicode61 не сводит их друг к другу
+    return f"replace(replace(coalesce({prefix}.name, ''), 'ё', 'е'), 'Ё', 'Е')"
+
+
+def upgrade():
+    op.execute("""
+        CREATE VIRTUAL TABLE rooms_fts USING fts5(
+            name, content='', tokenize='unicode61 remove_diacritics 2')
+    """)
+    op.execute(f"""
+        CREATE TRIGGER rooms_fts_ai AFTER INSERT ON rooms BEGIN
+            INSERT INTO rooms_fts(rowid, name) VALUES (new.id, {_values('new')});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER rooms_fts_ad AFTER DELETE ON rooms BEGIN
+            INSERT INTO rooms_fts(rooms_fts, rowid, name)
+            VALUES ('delete', old.id, {_values('old')});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER rooms_fts_au AFTER UPDATE OF name ON rooms BEGIN
+            INSERT INTO rooms_fts(rooms_fts, rowid, name)
+            VALUES ('delete', old.id, {_values('old')});
+            INSERT INTO rooms_fts(rowid, name) VALUES (new.id, {_values('new')});
+        END
+    """)
+
+    op.execute(f"INSERT INTO rooms_fts(rowid, name) SELECT id, {_values('rooms')} FROM rooms")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER rooms_fts_au")
+    op.execute("DROP TRIGGER rooms_fts_ad")
+    op.execute("DROP TRIGGER rooms_fts_ai")
+    op.execute("DROP TABLE rooms_fts")
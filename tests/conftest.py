@@ -0,0 +1,102 @@
+"""
+Общие фикстуры: приложение с временной базой SQLite и подсчёт SQL-запросов.
+"""
+
+import importlib.util
+import os
+from contextlib import contextmanager
+from itertools import count
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models.user import User, UserRole
+
+PASSWORD = "test-password"
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), os.pardir, "migrations",
+                          "versions")
+
+_phones = count(1)
+
+
+def make_app(tmp_path, **overrides):
+    """Приложение с базой и служебными файлами в tmp_path."""
+    settings = {
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "WTF_CSRF_ENABLED": False,
+        "RESPONSE_CACHE_PATH": str(tmp_path / "cache.db"),
+        "METRICS_DIR": str(tmp_path / "metrics"),
+        "SLOW_QUERY_LOG_PATH": str(tmp_path / "slow_queries.log"),
+        "JINJA_BYTECODE_CACHE_DIR": str(tmp_path / "jinja_cache"),
+        # Быстрый хеш: стоимость хеширования здесь не проверяется
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+        **overrides,
+    }
+    return create_app(type("TestConfig", (Config,), settings))
+
+
+def dispose(app):
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    read_only = app.extensions.get("read_only_engine")
+    if read_only is not None:
+        read_only.dispose()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    yield app
+    dispose(app)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def create_user(email, role=UserRole.USER):
+    """Пользователь с паролем PASSWORD (в текущей сессии, без commit)."""
+    user = User(email=email, phone=f"+7900{next(_phones):07d}",
+                first_name="Тест", last_name="Пользователь", role=role)
+    user.set_password(PASSWORD)
+    db.session.add(user)
+    return user
+
+
+def login(client, email):
+    response = client.post("/login", data={"email": email, "password": PASSWORD})
+    assert response.status_code == 302, "вход не удался"
+    return response
+
+
+@contextmanager
+def count_statements():
+    """Список SQL-запросов, выполненных внутри блока (все движки)."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+
+def load_migration(filename):
+    """Модуль ревизии из migrations/versions (для вызова upgrade() в тесте)."""
+    spec = importlib.util.spec_from_file_location(
+        f"migration_{filename[:4]}", os.path.join(MIGRATIONS, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,77 @@
+"""
+Массовые действия над бронированиями: неверный фильтр не должен
+превращаться в действие над всеми бронями.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from flask_wtf.csrf import generate_csrf
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.hotel import Hotel
+from app.models.room import Room
+from app.models.user import UserRole
+
+from conftest import create_user, login
+
+START = date.today() + timedelta(days=30)
+
+
+@pytest.fixture
+def bookings(app):
+    with app.app_context():
+        guest = create_user("guest@example.com")
+        create_user("admin@example.com", role=UserRole.ADMIN)
+        owner = create_user("owner@example.com", role=UserRole.HOTEL_OWNER)
+        db.session.flush()
+        hotel = Hotel(name="Отель", city="Москва", address="ул. Тестовая, 1",
+                      owner_id=owner.id)
+        db.session.add(hotel)
+        db.session.flush()
+        room = Room(hotel_id=hotel.id, name="Номер", price_per_night=1000,
+                    capacity=2, description="")
+        db.session.add(room)
+        db.session.flush()
+        for week in range(3):
+            check_in = START + timedelta(weeks=week)
+            db.session.add(Booking(
+                user_id=guest.id, room_id=room.id, check_in=check_in,
+                check_out=check_in + timedelta(days=2), guests=1,
+                total_price=2000, status="confirmed"))
+        db.session.commit()
+    return app
+
+
+def _cancel(client, **fields):
+    with client:
+        client.get("/admin/bookings")
+        token = generate_csrf()
+    data = {"csrf_token": token, "action": "cancel", "scope": "filter", **fields}
+    return client.post("/admin/bookings/bulk", data=data, follow_redirects=True)
+
+
+def _cancelled(app):
+    with app.app_context():
+        return Booking.query.filter_by(status="cancelled").count()
+
+
+@pytest.mark.parametrize("fields", [
+    {"date_from": "2026-13-01"},
+    {"date_to": "вчера"},
+    {"hotel_id": "abc"},
+    {"date_from": START.isoformat(), "date_to": (START - timedelta(days=1)).isoformat()},
+])
+def test_invalid_filter_changes_nothing(bookings, client, fields):
+    login(client, "admin@example.com")
+    response = _cancel(client, **fields)
+    assert response.status_code == 200
+    assert _cancelled(bookings) == 0
+
+
+def test_date_range_limits_cancel(bookings, client):
+    login(client, "admin@example.com")
+    _cancel(client, date_from=START.isoformat(),
+            date_to=(START + timedelta(days=7)).isoformat())
+    assert _cancelled(bookings) == 2
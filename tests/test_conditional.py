@@ -0,0 +1,51 @@
+"""
+Условный GET каталога: состояние берётся из меток версий stats_counters,
+без агрегатов по целым таблицам.
+"""
+
+import pytest
+
+from app.extensions import db
+from app.models.hotel import Hotel
+from app.models.room import Room
+from app.models.user import UserRole
+
+from conftest import count_statements, create_user
+
+
+@pytest.fixture
+def hotel_id(app):
+    with app.app_context():
+        owner = create_user("owner@example.com", role=UserRole.HOTEL_OWNER)
+        db.session.flush()
+        hotel = Hotel(name="Отель", city="Москва", address="ул. Тестовая, 1",
+                      owner_id=owner.id)
+        db.session.add(hotel)
+        db.session.flush()
+        db.session.add(Room(hotel_id=hotel.id, name="Номер", price_per_night=1000,
+                            capacity=2, description=""))
+        db.session.commit()
+        return hotel.id
+
+
+@pytest.mark.parametrize("path", ["/catalog", "/catalog?check_in=2030-01-01&check_out=2030-01-03"])
+def test_catalog_revalidation_reads_only_versions(client, hotel_id, path):
+    etag = client.get(path).headers["ETag"]
+
+    with count_statements() as statements:
+        response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert len(statements) == 1
+    assert "stats_counters" in statements[0]
+    assert "max(" not in statements[0] and "count(" not in statements[0]
+
+
+def test_catalog_etag_changes_with_rooms(app, client, hotel_id):
+    etag = client.get("/catalog").headers["ETag"]
+    with app.app_context():
+        room = Room.query.filter_by(hotel_id=hotel_id).one()
+        room.price_per_night = 1500
+        db.session.commit()
+    response = client.get("/catalog", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,19 @@
+import json
+
+from conftest import dispose, make_app
+
+
+def test_profile_line_is_written(tmp_path):
+    path = tmp_path / "sql_profile.log"
+    app = make_app(tmp_path, SQL_PROFILE_SAMPLE_RATE=1.0,
+                   SQL_PROFILE_LOG_PATH=str(path))
+    try:
+        response = app.test_client().get("/catalog")
+        assert response.status_code == 200
+        assert "db;dur=" in response.headers["Server-Timing"]
+    finally:
+        dispose(app)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["path"] for record in records] == ["/catalog"]
+    assert records[0]["statements"] >= 1
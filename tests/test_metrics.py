@@ -0,0 +1,18 @@
+import logging
+
+from app.extensions import db
+from app.metrics import TimedQueuePool
+
+from conftest import dispose, make_app
+
+
+def test_pool_is_quiet_in_debug_mode(tmp_path):
+    app = make_app(tmp_path, DEBUG=True)
+    try:
+        assert app.logger.isEnabledFor(logging.DEBUG)
+        with app.app_context():
+            pool = db.engine.pool
+            assert isinstance(pool, TimedQueuePool)
+            assert not pool.logger.isEnabledFor(logging.DEBUG)
+    finally:
+        dispose(app)
@@ -0,0 +1,91 @@
+"""
+Цепочка миграций на базе со схемой до их появления (db.create_all()
+исходной версии) приводит к той же схеме, что и db.create_all() сейчас.
+"""
+
+import os
+
+import sqlalchemy as sa
+from alembic import command
+from alembic.config import Config as AlembicConfig
+
+from conftest import dispose, make_app
+
+ROOT = os.path.join(os.path.dirname(__file__), os.pardir)
+
+LEGACY_SCHEMA = (
+    """CREATE TABLE users (
+        id INTEGER NOT NULL PRIMARY KEY, email VARCHAR(150) NOT NULL UNIQUE,
+        phone VARCHAR(20) NOT NULL UNIQUE, password_hash VARCHAR(256) NOT NULL,
+        first_name VARCHAR(50) NOT NULL, last_name VARCHAR(50) NOT NULL,
+        role VARCHAR(11) NOT NULL, created_at DATETIME, updated_at DATETIME)""",
+    """CREATE TABLE hotels (
+        id INTEGER NOT NULL PRIMARY KEY,
+        owner_id INTEGER NOT NULL REFERENCES users (id),
+        name VARCHAR(150) NOT NULL, description TEXT,
+        address VARCHAR(300) NOT NULL, city VARCHAR(100) NOT NULL,
+        phone VARCHAR(20), email VARCHAR(150),
+        created_at DATETIME, updated_at DATETIME)""",
+    """CREATE TABLE rooms (
+        id INTEGER NOT NULL PRIMARY KEY,
+        hotel_id INTEGER NOT NULL REFERENCES hotels (id),
+        name VARCHAR(100) NOT NULL, description TEXT,
+        price_per_night INTEGER NOT NULL, capacity INTEGER NOT NULL,
+        amenities VARCHAR(300), image_url VARCHAR(500),
+        created_at DATETIME, updated_at DATETIME)""",
+    """CREATE TABLE bookings (
+        id INTEGER NOT NULL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        room_id INTEGER NOT NULL REFERENCES rooms (id),
+        check_in DATE NOT NULL, check_out DATE NOT NULL,
+        guests INTEGER NOT NULL, total_price INTEGER NOT NULL,
+        status VARCHAR(20), created_at DATETIME, updated_at DATETIME)""",
+    """CREATE TABLE reviews (
+        id INTEGER NOT NULL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        room_id INTEGER NOT NULL REFERENCES rooms (id),
+        rating INTEGER NOT NULL, comment TEXT,
+        created_at DATETIME, updated_at DATETIME)""",
+)
+
+
+def _schema(url):
+    """Объекты базы и колонки таблиц."""
+    engine = sa.create_engine(url)
+    with engine.connect() as conn:
+        objects = conn.exec_driver_sql(
+            "SELECT type, name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%' "
+            "AND name != 'alembic_version'").all()
+        columns = {
+            (name, column["name"])
+            for kind, name in objects if kind == "table"
+            for column in sa.inspect(conn).get_columns(name)
+        }
+    engine.dispose()
+    return set(objects), columns
+
+
+def test_migrations_reach_create_all_schema(tmp_path):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    engine = sa.create_engine(url)
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.exec_driver_sql(statement)
+    engine.dispose()
+
+    config = AlembicConfig()
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+
+    app = make_app(tmp_path)
+    dispose(app)
+    created_objects, created_columns = _schema(app.config["SQLALCHEMY_DATABASE_URI"])
+    migrated_objects, migrated_columns = _schema(url)
+
+    # SQLite не меняет NOT NULL у существующей колонки: 0008 ставит триггеры
+    not_null = {("trigger", f"{table}_created_at_not_null_{suffix}")
+                for table in ("users", "hotels", "bookings")
+                for suffix in ("insert", "update")}
+    assert migrated_objects == created_objects | not_null
+    assert migrated_columns == created_columns
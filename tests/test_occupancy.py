@@ -0,0 +1,85 @@
+"""
+Индекс занятости должен видеть брони, сделанные другим процессом, сразу,
+а не через OCCUPANCY_INDEX_TTL.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.hotel import Hotel
+from app.models.room import Room
+from app.models.user import UserRole
+from app.occupancy import VERSION_COUNTER, occupancy_index
+
+from conftest import create_user
+
+CHECK_IN = date.today() + timedelta(days=60)
+CHECK_OUT = CHECK_IN + timedelta(days=2)
+
+
+@pytest.fixture
+def rooms(app):
+    with app.app_context():
+        owner = create_user("owner@example.com", role=UserRole.HOTEL_OWNER)
+        guest = create_user("guest@example.com")
+        db.session.flush()
+        hotel = Hotel(name="Отель", city="Москва", address="ул. 1", owner_id=owner.id)
+        db.session.add(hotel)
+        db.session.flush()
+        rooms = [Room(hotel_id=hotel.id, name=name, price_per_night=1000,
+                      capacity=2, description="") for name in ("A", "B")]
+        db.session.add_all(rooms)
+        db.session.commit()
+        return guest.id, [room.id for room in rooms]
+
+
+def _book_from_other_process(user_id, room_id):
+    # Как это сделал бы другой воркер: мимо индекса этого процесса
+    with db.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO bookings (user_id, room_id, check_in, check_out, guests, "
+            "total_price, status, created_at) VALUES (:user_id, :room_id, :check_in, "
+            ":check_out, 1, 2000, 'pending', CURRENT_TIMESTAMP)"),
+            {"user_id": user_id, "room_id": room_id,
+             "check_in": CHECK_IN, "check_out": CHECK_OUT})
+        conn.execute(text(
+            "INSERT INTO stats_counters (name, value) VALUES (:name, 1) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + 1"),
+            {"name": VERSION_COUNTER})
+
+
+def test_own_commit_updates_index_without_reload(app, rooms):
+    user_id, (room_id, _) = rooms
+    with app.app_context():
+        assert occupancy_index.is_available(room_id, CHECK_IN, CHECK_OUT)
+        version = occupancy_index._version
+        db.session.add(Booking(user_id=user_id, room_id=room_id, check_in=CHECK_IN,
+                               check_out=CHECK_OUT, guests=1, total_price=2000))
+        db.session.commit()
+        assert occupancy_index._version == version + 1
+        assert room_id in occupancy_index._rooms
+        assert not occupancy_index.is_available(room_id, CHECK_IN, CHECK_OUT)
+
+
+def test_booking_by_other_process_is_visible_immediately(app, rooms):
+    user_id, (_, room_id) = rooms
+    with app.app_context():
+        assert occupancy_index.is_available(room_id, CHECK_IN, CHECK_OUT)
+        _book_from_other_process(user_id, room_id)
+        assert not occupancy_index.is_available(room_id, CHECK_IN, CHECK_OUT)
+
+
+def test_bulk_cancel_frees_room(app, rooms):
+    user_id, (room_id, _) = rooms
+    with app.app_context():
+        db.session.add(Booking(user_id=user_id, room_id=room_id, check_in=CHECK_IN,
+                               check_out=CHECK_OUT, guests=1, total_price=2000))
+        db.session.commit()
+        assert not occupancy_index.is_available(room_id, CHECK_IN, CHECK_OUT)
+        Booking.bulk_set_status("cancelled", ("pending",), Booking.room_id == room_id)
+        db.session.commit()
+        assert occupancy_index.is_available(room_id, CHECK_IN, CHECK_OUT)
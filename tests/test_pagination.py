@@ -0,0 +1,76 @@
+"""
+Курсорная пагинация админки и миграция 0008 (created_at NOT NULL).
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from app.extensions import db
+from app.models.hotel import Hotel
+from app.models.user import UserRole
+from app.pagination import decode_cursor, keyset_paginate
+
+from conftest import create_user, load_migration
+
+def test_pages_cover_all_rows_without_duplicates(app):
+    with app.app_context():
+        owner = create_user("owner@example.com", role=UserRole.HOTEL_OWNER)
+        db.session.flush()
+        created = datetime(2026, 1, 1)
+        for number in range(25):
+            # Одинаковые created_at у пар строк: порядок задаёт id
+            db.session.add(Hotel(name=f"Отель {number}", city="Казань",
+                                 address="ул. 1", owner_id=owner.id,
+                                 created_at=created + timedelta(hours=number // 2)))
+        db.session.commit()
+
+        seen, cursor = [], None
+        while True:
+            page = keyset_paginate(Hotel.query, Hotel, 10, cursor)
+            seen.extend(hotel.id for hotel in page.items)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        assert sorted(seen) == sorted({hotel.id for hotel in Hotel.query})
+        assert len(seen) == 25
+        assert decode_cursor(cursor)[0] == "next"
+
+
+def test_created_at_is_required(app):
+    with app.app_context():
+        owner = create_user("owner@example.com", role=UserRole.HOTEL_OWNER)
+        db.session.flush()
+        hotel = Hotel(name="Отель", city="Казань", address="ул. 1", owner_id=owner.id)
+        db.session.add(hotel)
+        db.session.flush()
+        hotel.created_at = None
+        with pytest.raises(sa.exc.IntegrityError):
+            db.session.flush()
+        db.session.rollback()
+
+
+def test_migration_backfills_and_forbids_null(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for table in ("users", "hotels", "bookings"):
+            conn.exec_driver_sql(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, "
+                                 f"created_at DATETIME, updated_at DATETIME)")
+        conn.exec_driver_sql("INSERT INTO users VALUES (1, NULL, '2025-05-01 10:00:00.000000')")
+        conn.exec_driver_sql("INSERT INTO hotels VALUES (1, NULL, NULL)")
+
+        migration = load_migration("0008_created_at_not_null.py")
+        migration.op = Operations(MigrationContext.configure(conn))
+        migration.upgrade()
+
+        assert conn.exec_driver_sql("SELECT created_at FROM users").scalar() \
+            == "2025-05-01 10:00:00.000000"
+        assert conn.exec_driver_sql("SELECT created_at FROM hotels").scalar() \
+            == migration.EPOCH
+        with pytest.raises(sa.exc.IntegrityError):
+            conn.exec_driver_sql("INSERT INTO bookings VALUES (1, NULL, NULL)")
+        with pytest.raises(sa.exc.IntegrityError):
+            conn.exec_driver_sql("UPDATE users SET created_at = NULL")
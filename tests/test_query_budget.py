@@ -0,0 +1,86 @@
+"""
+Число SQL-запросов на страницах со списками бронирований не должно
+зависеть от числа строк: номер, отель и пользователь подгружаются тем
+же JOIN (Booking.with_room_and_hotel / with_details), а не отдельным
+SELECT на каждую бронь.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.hotel import Hotel
+from app.models.room import Room
+from app.models.user import UserRole
+
+from conftest import count_statements, create_user, login
+
+# Запросов на страницу, включая загрузку пользователя и счётчики
+MY_BOOKINGS_BUDGET = 4
+ADMIN_BOOKINGS_BUDGET = 5
+
+
+def _create_bookings(app, count):
+    with app.app_context():
+        guest = create_user("guest@example.com")
+        create_user("admin@example.com", role=UserRole.ADMIN)
+        owner = create_user("owner@example.com", role=UserRole.HOTEL_OWNER)
+        db.session.flush()
+        rooms = []
+        for number in range(5):
+            hotel = Hotel(name=f"Отель {number}", city="Москва",
+                          address=f"ул. Тестовая, {number}", owner_id=owner.id)
+            db.session.add(hotel)
+            db.session.flush()
+            for suffix in ("A", "B"):
+                room = Room(hotel_id=hotel.id, name=f"Номер {suffix}",
+                            price_per_night=1000, capacity=2, description="")
+                db.session.add(room)
+                rooms.append(room)
+        db.session.flush()
+
+        start = date.today() + timedelta(days=30)
+        for number in range(count):
+            check_in = start + timedelta(days=3 * (number // len(rooms)))
+            db.session.add(Booking(
+                user_id=guest.id, room_id=rooms[number % len(rooms)].id,
+                check_in=check_in, check_out=check_in + timedelta(days=2),
+                guests=1, total_price=2000, status="confirmed"))
+        db.session.commit()
+
+
+def _statements_for(client, email, path):
+    login(client, email)
+    client.get(path)  # прогрев кешей процесса (пользователь, шаблоны)
+    with count_statements() as statements:
+        response = client.get(path)
+    assert response.status_code == 200
+    return statements
+
+
+@pytest.mark.parametrize("email, path, budget", [
+    ("guest@example.com", "/my-bookings", MY_BOOKINGS_BUDGET),
+    ("admin@example.com", "/admin/bookings", ADMIN_BOOKINGS_BUDGET),
+])
+def test_booking_lists_within_query_budget(app, client, email, path, budget):
+    _create_bookings(app, 30)
+    statements = _statements_for(client, email, path)
+    assert len(statements) <= budget, "\n".join(statements)
+
+
+@pytest.mark.parametrize("email, path", [
+    ("guest@example.com", "/my-bookings"),
+    ("admin@example.com", "/admin/bookings"),
+])
+def test_booking_lists_query_count_does_not_grow(app, email, path):
+    counts = []
+    for size in (3, 30):
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+        client = app.test_client()
+        _create_bookings(app, size)
+        counts.append(len(_statements_for(client, email, path)))
+    assert counts[0] == counts[1]
@@ -0,0 +1,31 @@
+import sqlite3
+
+from sqlalchemy import text
+
+from app.extensions import db
+from app.models.hotel import Hotel
+from app.models.user import UserRole
+
+from conftest import create_user, dispose, make_app
+
+
+def test_catalog_is_served_from_non_wal_snapshot(tmp_path):
+    snapshot = tmp_path / "snapshot.db"
+    app = make_app(tmp_path, READ_ONLY_DB_URI=f"sqlite:///{snapshot}")
+    try:
+        with app.app_context():
+            owner = create_user("owner@example.com", role=UserRole.HOTEL_OWNER)
+            db.session.flush()
+            db.session.add(Hotel(name="Снимок", city="Казань",
+                                 address="ул. Тестовая, 1", owner_id=owner.id))
+            db.session.commit()
+            db.session.execute(text(f"VACUUM INTO '{snapshot}'"))
+        with sqlite3.connect(snapshot) as conn:
+            assert conn.execute("PRAGMA journal_mode=DELETE").fetchone() == ("delete",)
+        conn.close()
+
+        response = app.test_client().get("/catalog")
+        assert response.status_code == 200
+        assert "Снимок" in response.get_data(as_text=True)
+    finally:
+        dispose(app)
@@ -0,0 +1,53 @@
+"""
+Журнал room_nights: миграция 0001 заполняет его по уже существующим
+бронированиям.
+"""
+
+import pytest
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from conftest import load_migration
+
+LEGACY_SCHEMA = (
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, created_at DATETIME)",
+    "CREATE TABLE hotels (id INTEGER PRIMARY KEY, city VARCHAR, owner_id INTEGER)",
+    "CREATE TABLE rooms (id INTEGER PRIMARY KEY, hotel_id INTEGER)",
+    "CREATE TABLE bookings (id INTEGER PRIMARY KEY, room_id INTEGER, "
+    "user_id INTEGER, status VARCHAR(20), check_in DATE, check_out DATE, "
+    "created_at DATETIME)",
+)
+
+
+def test_migration_backfills_existing_bookings(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql("INSERT INTO rooms VALUES (1, 1), (2, 1)")
+        conn.exec_driver_sql("""
+            INSERT INTO bookings (id, room_id, status, check_in, check_out) VALUES
+                (1, 1, 'confirmed', '2026-03-30', '2026-04-02'),
+                (2, 2, 'pending', '2026-05-01', '2026-05-02'),
+                (3, 2, 'cancelled', '2026-06-01', '2026-06-03'),
+                -- пересечение, созданное до появления журнала
+                (4, 1, 'pending', '2026-04-01', '2026-04-03')
+        """)
+
+        migration = load_migration("0001_performance_indexes.py")
+        migration.op = Operations(MigrationContext.configure(conn))
+        migration.upgrade()
+
+        rows = conn.exec_driver_sql(
+            "SELECT room_id, night, booking_id FROM room_nights "
+            "ORDER BY room_id, night").all()
+        assert rows == [
+            (1, "2026-03-30", 1), (1, "2026-03-31", 1), (1, "2026-04-01", 1),
+            (1, "2026-04-02", 4),
+            (2, "2026-05-01", 2),
+        ]
+        # Ночь существующей брони больше нельзя занять повторно
+        with pytest.raises(sa.exc.IntegrityError):
+            conn.exec_driver_sql(
+                "INSERT INTO room_nights VALUES (1, '2026-03-31', 5)")
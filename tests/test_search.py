@@ -0,0 +1,80 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.hotel import Hotel
+from app.models.room import Room
+from app.models.user import UserRole
+from app.search import search_bookings
+
+from conftest import create_user, login
+
+
+@pytest.fixture
+def bookings(app):
+    with app.app_context():
+        owner = create_user("owner@example.com", role=UserRole.HOTEL_OWNER)
+        anna = create_user("anna@example.com")
+        anna.last_name = "Ёлкина"
+        petr = create_user("petr@example.com")
+        db.session.flush()
+        hotels = [Hotel(name=name, city="Москва", address="ул. Тестовая, 1",
+                        owner_id=owner.id) for name in ("Гранд Отель", "Приют")]
+        db.session.add_all(hotels)
+        db.session.flush()
+        rooms = [Room(hotel_id=hotel.id, name=name, price_per_night=1000,
+                      capacity=2, description="")
+                 for hotel, name in zip(hotels, ("Люкс", "Стандарт"))]
+        db.session.add_all(rooms)
+        db.session.flush()
+        check_in = date.today() + timedelta(days=10)
+        for user, room in ((anna, rooms[0]), (petr, rooms[1])):
+            db.session.add(Booking(
+                user_id=user.id, room_id=room.id, check_in=check_in,
+                check_out=check_in + timedelta(days=2), guests=1,
+                total_price=2000, status="confirmed"))
+        db.session.commit()
+    return app
+
+
+def _emails(term):
+    return sorted(booking.user.email
+                  for booking in search_bookings(Booking.query, term))
+
+
+@pytest.mark.parametrize("term, expected", [
+    ("елкин", ["anna@example.com"]),        # фамилия гостя, «ё» как «е»
+    ("petr@", ["petr@example.com"]),        # префикс email
+    ("гранд", ["anna@example.com"]),        # название отеля (hotels_fts)
+    ("стандарт", ["petr@example.com"]),     # название номера (rooms_fts)
+    ("москва", []),                         # город в поиск не входит
+    ("", ["anna@example.com", "petr@example.com"]),
+])
+def test_search_bookings(bookings, term, expected):
+    with bookings.app_context():
+        assert _emails(term) == expected
+
+
+def test_search_bookings_uses_indexes(bookings):
+    with bookings.app_context():
+        query = search_bookings(Booking.query, "гранд")
+        statement = query.statement.compile(compile_kwargs={"literal_binds": True})
+        plan = db.session.execute(text(f"EXPLAIN QUERY PLAN {statement}")).all()
+    details = [row[3] for row in plan]
+    scans = [detail.split()[:2] for detail in details]
+    assert ["SCAN", "bookings"] not in scans, details
+    assert ["SCAN", "rooms"] not in scans, details
+
+
+def test_admin_bookings_search_page(bookings, client):
+    with bookings.app_context():
+        create_user("admin@example.com", role=UserRole.ADMIN)
+        db.session.commit()
+    login(client, "admin@example.com")
+    response = client.get("/admin/bookings", query_string={"search": "гранд"})
+    assert response.status_code == 200
+    assert "Люкс" in response.get_data(as_text=True)
+    assert "Стандарт" not in response.get_data(as_text=True)
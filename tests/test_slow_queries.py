@@ -0,0 +1,51 @@
+import os
+
+from sqlalchemy import text
+
+from app.extensions import db
+from app.slow_queries import SlowQueryLog
+
+from conftest import dispose, make_app
+
+
+def _entry(ms):
+    return ('{"time": "2026-01-01T00:00:00+00:00", "ms": %s, "route": null, '
+            '"statement": "SELECT 1", "parameters": [], "plan": null}\n' % ms)
+
+
+def test_logs_of_all_processes_are_merged(tmp_path):
+    app = make_app(tmp_path, SLOW_QUERY_THRESHOLD_MS=0)
+    log = app.extensions["slow_query_log"]
+    try:
+        with app.app_context():
+            db.session.execute(text("SELECT 1"))
+    finally:
+        dispose(app)
+
+    own = log.process_path()
+    assert os.path.exists(own)
+    assert not os.path.exists(log.path)
+
+    # Файл другого воркера и его ротированная копия
+    other = log.process_path(12345)
+    for path, ms in ((other, 5), (other + ".1", 7)):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(_entry(ms))
+
+    assert set(log._files()) == {own, other, other + ".1"}
+    group = next(group for group in log.worst() if group["statement"] == "SELECT ?")
+    assert group["count"] == 3
+    assert group["max_ms"] == 7
+
+
+def test_handler_is_reopened_after_fork(tmp_path, monkeypatch):
+    log = SlowQueryLog()
+    log.path = str(tmp_path / "slow_queries.log")
+    log._ensure_handler()
+    master = log._handler
+
+    monkeypatch.setattr(os, "getpid", lambda: 4242)
+    log._ensure_handler()
+    assert log._handler is not master
+    assert log._handler.baseFilename == str(tmp_path / "slow_queries.4242.log")
+    log._close()
@@ -0,0 +1,31 @@
+"""
+Холодный старт: модули из STARTUP_LAZY_MODULES при старте не
+импортируются, а create_app в новом интерпретаторе укладывается в
+STARTUP_BUDGET_MS (то же, что `flask check-startup`).
+
+Время зависит от машины и её загрузки, поэтому проверка бюджета
+включается только явно: STARTUP_BUDGET_CHECK=1 python -m pytest.
+"""
+
+import os
+
+import pytest
+
+from app import startup
+from app.config import ProductionConfig
+
+CONFIG = "app.config.ProductionConfig"
+
+
+def test_lazy_modules_not_imported():
+    [sample] = startup.measure(CONFIG, runs=1)
+    assert startup.eager_modules(sample, ProductionConfig.STARTUP_LAZY_MODULES) == []
+
+
+@pytest.mark.skipif(os.environ.get("STARTUP_BUDGET_CHECK") != "1",
+                    reason="замер времени: STARTUP_BUDGET_CHECK=1")
+def test_startup_within_budget():
+    median_ms = startup.median_seconds(startup.measure(CONFIG, runs=3)) * 1000
+    assert median_ms <= ProductionConfig.STARTUP_BUDGET_MS, (
+        f"create_app: {median_ms:.0f} мс при бюджете "
+        f"{ProductionConfig.STARTUP_BUDGET_MS:.0f} мс")
@@ -0,0 +1,34 @@
+"""
+Точка входа для продакшена (gunicorn, uWSGI).
+
+    gunicorn -c gunicorn.conf.py
+    uwsgi --ini uwsgi.ini
+
+Приложение создаётся при импорте модуля — один раз в мастер-процессе,
+до fork воркеров. Хуки после fork — в app/server.py.
+"""
+
+import logging
+import time
+
+from app import create_app, server
+from app.config import ProductionConfig
+
+_started = time.perf_counter()
+application = create_app(ProductionConfig)
+LOAD_TIME = time.perf_counter() - _started
+
+try:
+    from uwsgidecorators import postfork
+except ImportError:  # не под uWSGI: хуки вызывает gunicorn.conf.py
+    pass
+else:
+    # uWSGI импортирует модуль в мастере (без lazy-apps), затем делает fork
+    logging.basicConfig(level=logging.INFO)
+    server.logger.info("Приложение загружено за %.1f мс", LOAD_TIME * 1000)
+    server.prepare(application)
+
+    @postfork
+    def _after_fork():
+        server.after_fork(application)
+        server.worker_ready(application)